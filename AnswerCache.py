@@ -0,0 +1,111 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from typing import Dict, List, Optional
+
+
+# 问答结果的持久化缓存（SQLite文件，进程重启后仍有效），两级缓存键：
+#   q: 规范化后的问题文本，相同问题直接返回，不再调用大模型和查询图谱
+#   i: 规范化的查询意图（实体 + 查询模板 + 参数），表述不同但查询相同的问题在意图识别后命中
+# 每条记录保存写入时的图谱版本号，图谱重新导入后旧记录失效；条目数超过上限时淘汰最久未使用的记录
+class AnswerCache:
+    def __init__(self, path: str, max_size: int = 10000):
+        self.path = path
+        self.max_size = max_size
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # 异步问答时在不同线程中访问，由lock保证同一时刻只有一个线程使用连接
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS answers (
+                key TEXT PRIMARY KEY,
+                answer TEXT NOT NULL,
+                version TEXT NOT NULL,
+                used REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS answers_used ON answers (used)")
+        self.conn.commit()
+        self.lock = threading.Lock()
+        self.hits = {"q": 0, "i": 0}
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def question_key(question: str) -> str:
+        """问题缓存键：在QuestionPreprocessor.process的基础上统一全角/半角和大小写，去掉空白和句末标点"""
+        text = unicodedata.normalize('NFKC', question).lower()
+        text = re.sub(r'\s+', '', text)
+        text = re.sub(r'[?？。.!！~～]+$', '', text)
+        return 'q:' + text
+
+    @staticmethod
+    def intent_key(cyphers: List[Dict]) -> str:
+        """意图缓存键：各意图对应的 (实体名称, 实体类型, 模板id, 参数)，排序后与意图的先后和表述无关"""
+        items = sorted(
+            [c["entity"]["name"], c["entity"]["type"], c["template"], c["params"]] for c in cyphers
+        )
+        text = json.dumps(items, ensure_ascii=False, sort_keys=True, default=str)
+        return 'i:' + hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def get(self, key: str, version: Optional[str]) -> Optional[str]:
+        """查找缓存的回答；记录的图谱版本与当前版本不同时删除该记录并视为未命中"""
+        version = version or ''
+        with self.lock:
+            row = self.conn.execute("SELECT answer, version FROM answers WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[1] != version:
+                with self.conn:
+                    self.conn.execute("DELETE FROM answers WHERE key = ?", (key,))
+                self.invalidations += 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            with self.conn:
+                self.conn.execute("UPDATE answers SET used = ? WHERE key = ?", (time.time(), key))
+            self.hits[key[0]] += 1
+            return row[0]
+
+    def put(self, keys: List[str], answer: str, version: Optional[str]):
+        """以多个缓存键（问题键、意图键）写入同一个回答，超出容量时淘汰最久未使用的记录"""
+        version = version or ''
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO answers (key, answer, version, used) VALUES (?, ?, ?, ?)",
+                                  [(key, answer, version, now) for key in keys])
+            excess = self.conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0] - self.max_size
+            if excess > 0:
+                self.conn.execute("DELETE FROM answers WHERE key IN "
+                                  "(SELECT key FROM answers ORDER BY used LIMIT ?)", (excess,))
+                self.evictions += excess
+
+    def purge(self, version: Optional[str]) -> int:
+        """删除所有不属于当前图谱版本的记录，返回删除条数"""
+        with self.lock, self.conn:
+            removed = self.conn.execute("DELETE FROM answers WHERE version != ?", (version or '',)).rowcount
+            self.invalidations += removed
+        return removed
+
+    def stats(self) -> Dict:
+        """各级命中、未命中（按查找次数）、淘汰、失效计数"""
+        with self.lock:
+            size = self.conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        total = self.hits["q"] + self.hits["i"] + self.misses
+        return {
+            "size": size,
+            "question_hits": self.hits["q"],
+            "intent_hits": self.hits["i"],
+            "misses": self.misses,
+            "hit_rate": (self.hits["q"] + self.hits["i"]) / total if total else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def close(self):
+        self.conn.close()
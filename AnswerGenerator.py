@@ -1,61 +1,233 @@
-import json
-from typing import List, Dict
-from QuestionAnalyzer import Config, client  # 导入配置和客户端
-
-
-class AnswerGenerator:
-    def __init__(self):
-        self.client = client
-
-    def generate(self, question: str, kg_results: List[Dict]) -> str:
-        if not kg_results:
-            return "未查询到相关信息，请尝试其他问题。"
-
-        # 格式化多个查询结果
-        formatted_results = []
-        for result in kg_results:
-            if result["results"]:  # 只包含有结果的查询
-                formatted_results.append({
-                    "intent": result["intent"],
-                    "entity": result["entity"]["name"],
-                    "results": result["results"]
-                })
-
-        if not formatted_results:
-            return "未查询到相关信息，请尝试其他问题。"
-
-        formatted_json = json.dumps(formatted_results, ensure_ascii=False, indent=2)
-
-        system_prompt = """
-        请根据以下多个知识图谱查询结果（JSON格式），用自然语言回答用户问题。
-        要求：
-        1. 每个意图的结果单独成段，先说明意图，再列出结果
-        2. 结果为合作学者时，直接列出姓名（含中英文），如"1. 刘丹（Liu Dan）"
-        3. 必须严格基于查询结果，结果非空时直接列出（如论文标题、年份）
-        4. 严格基于查询结果，不添加额外内容
-        5. 用中文简洁回答，无需解释
-        """
-
-        try:
-            response = self.client.chat.completions.create(
-                model=Config.DEEPSEEK_MODEL,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"查询结果：\n{formatted_json}\n\n用户问题：{question}"}
-                ],
-                timeout=Config.API_TIMEOUT
-            )
-
-            return response.choices[0].message.content
-        except Exception as e:
-            print(f"答案生成失败：{str(e)}")
-            # 降级处理：直接格式化输出
-            answer_parts = []
-            for result in formatted_results:
-                answer_parts.append(f"关于{result['entity']}的{result['intent']}：")
-                for i, item in enumerate(result['results'], 1):
-                    item_str = ", ".join([f"{k}：{v}" for k, v in item.items()])
-                    answer_parts.append(f"{i}. {item_str}")
-                answer_parts.append("")  # 空行分隔不同意图
-
-            return "\n".join(answer_parts)
\ No newline at end of file
+import asyncio
+from itertools import islice
+from typing import List, Dict, Optional, Iterable, Iterator, AsyncIterator
+from QuestionAnalyzer import Config, client, async_client  # 导入配置和客户端
+from AnswerRenderer import render
+from PromptBudget import compact_results
+from Tracing import tracer
+
+
+class AnswerGenerator:
+    def __init__(self, llm_client=None, llm_async_client=None, llm_limit: Optional[asyncio.Semaphore] = None):
+        """
+        :param llm_client: 同步大模型客户端，默认使用QuestionAnalyzer中的client
+        :param llm_async_client: 异步大模型客户端，默认使用QuestionAnalyzer中的async_client
+        :param llm_limit: 限制异步大模型请求并发数的信号量，可与IntentAnalyzer共用
+        """
+        self.client = llm_client or client
+        self.async_client = llm_async_client or async_client
+        self.llm_limit = llm_limit or asyncio.Semaphore(Config.LLM_CONCURRENCY)
+        # 本地渲染与调用大模型的回答数，以及大模型调用失败（改为格式化输出）的次数
+        self.rendered = 0
+        self.llm_calls = 0
+        self.failures = 0
+
+    system_prompt = """
+        请根据以下多个知识图谱查询结果，用自然语言回答用户问题。
+        查询结果每行一个意图（JSON格式），columns为列名，rows为各行按列顺序的取值。
+        要求：
+        1. 每个意图的结果单独成段，先说明意图，再列出结果
+        2. 结果为合作学者时，直接列出姓名（含中英文），如"1. 刘丹（Liu Dan）"
+        3. 必须严格基于查询结果，结果非空时直接列出（如论文标题、年份）
+        4. 严格基于查询结果，不添加额外内容
+        5. 用中文简洁回答，无需解释
+        6. 某个意图带有note字段时，在该段末尾照实说明未列出的结果
+        """
+
+    def generate(self, question: str, kg_results: List[Dict]) -> str:
+        formatted_results = self.format_results(kg_results)
+        if not formatted_results:
+            return "未查询到相关信息，请尝试其他问题。"
+
+        rendered = self.render_local(formatted_results)
+        if rendered is not None:
+            return rendered
+
+        self.llm_calls += 1
+        tracer.count("answer_path_total", path="llm")
+        try:
+            response = self.client.chat.completions.create(
+                model=Config.DEEPSEEK_MODEL,
+                messages=self.messages(question, formatted_results),
+                timeout=Config.API_TIMEOUT
+            )
+            tracer.record_usage("answer", response.usage)
+            return response.choices[0].message.content
+        except Exception as e:
+            print(f"答案生成失败：{str(e)}")
+            self.failures += 1
+            tracer.count("answer_path_total", path="fallback")
+            return self.fallback_answer(formatted_results)
+
+    async def generate_async(self, question: str, kg_results: List[Dict]) -> str:
+        """generate的异步版本，并发请求数受llm_limit限制"""
+        formatted_results = self.format_results(kg_results)
+        if not formatted_results:
+            return "未查询到相关信息，请尝试其他问题。"
+
+        rendered = self.render_local(formatted_results)
+        if rendered is not None:
+            return rendered
+
+        self.llm_calls += 1
+        tracer.count("answer_path_total", path="llm")
+        try:
+            async with self.llm_limit:
+                response = await self.async_client.chat.completions.create(
+                    model=Config.DEEPSEEK_MODEL,
+                    messages=self.messages(question, formatted_results),
+                    timeout=Config.API_TIMEOUT
+                )
+            tracer.record_usage("answer", response.usage)
+            return response.choices[0].message.content
+        except Exception as e:
+            print(f"答案生成失败：{str(e)}")
+            self.failures += 1
+            tracer.count("answer_path_total", path="fallback")
+            return self.fallback_answer(formatted_results)
+
+    def generate_stream(self, question: str, kg_results: List[Dict]) -> Iterator[str]:
+        """流式生成：大模型每返回一段文本就立即产出；调用失败时改为逐行产出格式化结果"""
+        formatted_results = self.format_results(kg_results)
+        if not formatted_results:
+            yield "未查询到相关信息，请尝试其他问题。"
+            return
+
+        rendered = self.render_local(formatted_results)
+        if rendered is not None:
+            yield rendered
+            return
+
+        self.llm_calls += 1
+        tracer.count("answer_path_total", path="llm")
+        emitted = False
+        try:
+            stream = self.client.chat.completions.create(
+                model=Config.DEEPSEEK_MODEL,
+                messages=self.messages(question, formatted_results),
+                timeout=Config.API_TIMEOUT,
+                stream=True,
+                **self.stream_options()
+            )
+            for chunk in stream:
+                tracer.record_usage("answer", getattr(chunk, "usage", None))
+                text = self.chunk_text(chunk)
+                if text:
+                    emitted = True
+                    yield text
+        except Exception as e:
+            print(f"答案生成失败：{str(e)}")
+            self.failures += 1
+            tracer.count("answer_path_total", path="fallback")
+            if not emitted:
+                yield from self.fallback_lines(formatted_results)
+
+    async def generate_stream_async(self, question: str, kg_results: List[Dict]) -> AsyncIterator[str]:
+        """generate_stream的异步版本，整个流式响应期间占用一个llm_limit名额"""
+        formatted_results = self.format_results(kg_results)
+        if not formatted_results:
+            yield "未查询到相关信息，请尝试其他问题。"
+            return
+
+        rendered = self.render_local(formatted_results)
+        if rendered is not None:
+            yield rendered
+            return
+
+        self.llm_calls += 1
+        tracer.count("answer_path_total", path="llm")
+        emitted = False
+        try:
+            async with self.llm_limit:
+                stream = await self.async_client.chat.completions.create(
+                    model=Config.DEEPSEEK_MODEL,
+                    messages=self.messages(question, formatted_results),
+                    timeout=Config.API_TIMEOUT,
+                    stream=True,
+                    **self.stream_options()
+                )
+                async for chunk in stream:
+                    tracer.record_usage("answer", getattr(chunk, "usage", None))
+                    text = self.chunk_text(chunk)
+                    if text:
+                        emitted = True
+                        yield text
+        except Exception as e:
+            print(f"答案生成失败：{str(e)}")
+            self.failures += 1
+            tracer.count("answer_path_total", path="fallback")
+            if not emitted:
+                for line in self.fallback_lines(formatted_results):
+                    yield line
+
+    def render_local(self, formatted_results: List[Dict]) -> Optional[str]:
+        """结果全部为列表类意图时直接按固定格式渲染，否则返回None交给大模型"""
+        if not Config.TEMPLATE_RENDER_ENABLED:
+            return None
+        rendered = render(formatted_results)
+        if rendered is not None:
+            self.rendered += 1
+            tracer.count("answer_path_total", path="rendered")
+        return rendered
+
+    @staticmethod
+    def stream_options() -> Dict:
+        """启用跟踪时要求流式响应在最后一段附带token用量（最后一段没有choices，不产出文本）"""
+        return {"stream_options": {"include_usage": True}} if tracer.enabled else {}
+
+    @staticmethod
+    def chunk_text(chunk) -> Optional[str]:
+        """流式响应中一段增量文本（角色信息、结束标记等片段没有文本）"""
+        if not chunk.choices:
+            return None
+        return chunk.choices[0].delta.content
+
+    @staticmethod
+    def format_results(kg_results: Iterable[Dict]) -> List[Dict]:
+        """
+        格式化多个查询结果，只包含有结果的查询
+        :param kg_results: 查询结果（可以是迭代器）；每个结果的results也可以是逐行产出的迭代器（如KGQueryExecutor.iter_rows），
+                           此时最多读取Config.QUERY_MAX_ROWS行
+        """
+        formatted_results = []
+        for result in kg_results or []:
+            rows = result["results"]
+            truncated = result.get("truncated", False)
+            if not isinstance(rows, list):
+                rows = list(islice(rows, Config.QUERY_MAX_ROWS + 1))
+                if len(rows) > Config.QUERY_MAX_ROWS:
+                    rows, truncated = rows[:-1], True
+            if rows:
+                formatted_results.append({
+                    "intent": result["intent"],
+                    "entity": result["entity"]["name"],
+                    "template": result.get("template"),
+                    "truncated": truncated,
+                    "results": rows
+                })
+        return formatted_results
+
+    def messages(self, question: str, formatted_results: List[Dict]) -> List[Dict]:
+        # 列式压缩，并按token预算截断过长的结果
+        compact = compact_results(formatted_results, Config.ANSWER_RESULT_TOKEN_BUDGET)
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": f"查询结果：\n{compact}\n\n用户问题：{question}"}
+        ]
+
+    @classmethod
+    def fallback_answer(cls, formatted_results: List[Dict]) -> str:
+        """降级处理：直接格式化输出"""
+        return "".join(cls.fallback_lines(formatted_results))[:-1]  # 去掉末尾空行的换行符
+
+    @staticmethod
+    def fallback_lines(formatted_results: List[Dict]) -> Iterator[str]:
+        """逐行产出格式化结果（每行带换行符），流式输出的降级处理也使用"""
+        for result in formatted_results:
+            yield f"关于{result['entity']}的{result['intent']}：\n"
+            for i, item in enumerate(result['results'], 1):
+                item_str = ", ".join([f"{k}：{v}" for k, v in item.items()])
+                yield f"{i}. {item_str}\n"
+            if result.get("truncated"):
+                yield "（结果较多，只列出部分）\n"
+            yield "\n"  # 空行分隔不同意图
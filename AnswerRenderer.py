@@ -0,0 +1,124 @@
+from typing import Callable, Dict, List, Optional
+
+# 列表类意图的本地渲染：结果已经是要列出的行，按固定格式直接输出，无需再调用大模型
+# 列名与CypherTemplates中各模板RETURN子句的别名一致
+
+
+def join_values(*values) -> str:
+    """跳过空值，多个值之间用中文逗号连接"""
+    return "，".join(str(v) for v in values if v not in (None, ""))
+
+
+def person(row: Dict) -> str:
+    """学者姓名：刘丹（Liu Dan），只有一种姓名时只列出该姓名"""
+    zh, en = row.get("中文名"), row.get("英文名")
+    if zh and en:
+        return f"{zh}（{en}）"
+    return zh or en or ""
+
+
+def collaborator(row: Dict) -> str:
+    name = person(row)
+    return f"{name}，合作{row['合作次数']}次" if row.get("合作次数") else name
+
+
+def paper(row: Dict) -> str:
+    """论文：标题（年份，期刊）"""
+    detail = join_values(row.get("发表年份"), row.get("期刊名称"))
+    return f"{row['论文标题']}（{detail}）" if detail else row["论文标题"]
+
+
+def journal(row: Dict) -> str:
+    """期刊：名称（影响因子：x，年份）"""
+    factor = row.get("影响因子")
+    detail = join_values(f"影响因子：{factor}" if factor is not None else None, row.get("发表年份"))
+    return f"{row['期刊名称']}（{detail}）" if detail else row["期刊名称"]
+
+
+def discipline(row: Dict) -> str:
+    zh, en = row.get("二级学科"), row.get("英文领域")
+    if zh and en:
+        return f"{zh}（{en}）"
+    return zh or en or ""
+
+
+def column(name: str) -> Callable[[Dict], str]:
+    """单列结果，列表值（如关键词）用顿号连接"""
+    def render_column(row: Dict) -> str:
+        value = row.get(name)
+        if isinstance(value, list):
+            return "、".join(str(v) for v in value)
+        return "" if value is None else str(value)
+    return render_column
+
+
+# {模板id: (段落标题, 单行格式化函数)}；未列出的模板（如摘要、发表趋势）交给大模型组织语言
+RENDERERS = {
+    "author.collab": ("合作学者", collaborator),
+    "author.paper": ("论文列表", paper),
+    "author.journal": ("发表期刊", journal),
+    "author.discipline": ("研究领域", discipline),
+    "author.method": ("使用的方法技术", column("方法技术")),
+    "author.scenario": ("应用场景", column("应用场景")),
+    "article.author": ("作者", person),
+    "article.journal": ("发表期刊", journal),
+    "article.time": ("发表时间", column("发表年份")),
+    "article.keyword": ("关键词", column("关键词")),
+    "article.discipline": ("所属领域", column("二级学科")),
+    "article.topic": ("涉及主题", column("研究主题")),
+    "article.method": ("使用方法", column("方法技术")),
+    "article.scenario": ("应用场景", column("应用场景")),
+    "topic.paper": ("相关论文", paper),
+    "topic.author": ("研究学者", person),
+    "journal.paper": ("发表论文", paper),
+    "journal.factor": ("影响因子", column("影响因子")),
+    "discipline.paper": ("相关论文", paper),
+    "discipline.author": ("研究学者", person),
+    "method.paper": ("相关论文", paper),
+    "method.author": ("应用学者", person),
+    "scenario.paper": ("相关论文", paper),
+    "scenario.author": ("应用学者", person),
+}
+
+
+def can_render(results: List[Dict]) -> bool:
+    """所有有结果的意图都是列表类意图时才在本地渲染，混合了开放式意图的回答仍由大模型组织"""
+    return bool(results) and all(r.get("template") in RENDERERS for r in results)
+
+
+def render(results: List[Dict]) -> Optional[str]:
+    """
+    按固定格式渲染查询结果：每个意图单独成段，先说明意图，再逐行编号列出结果；只有一项结果时直接写在意图后
+    :param results: AnswerGenerator.format_results 的输出
+    :return: 渲染后的回答；含无法本地渲染的意图，或某个意图的结果全为空值（如期刊没有影响因子）时返回None
+    """
+    if not can_render(results):
+        return None
+    paragraphs = []
+    for result in results:
+        title, render_row = RENDERERS[result["template"]]
+        items, seen = [], set()
+        for row in result["results"]:
+            text = render_row(row)
+            if text and text not in seen:
+                seen.add(text)
+                items.append(text)
+        if not items:
+            # 结果行中要列出的值全为空，渲染出来只有标题，交给大模型或降级输出处理
+            return None
+        heading = f"{result['entity']}的{title}："
+        if len(items) == 1:
+            lines = [heading + items[0]]
+        else:
+            lines = [heading] + [f"{i}. {text}" for i, text in enumerate(items, 1)]
+        if result.get("truncated"):
+            lines.append(truncation_note(len(result["results"]), len(items)))
+        paragraphs.append("\n".join(lines))
+    return "\n\n".join(paragraphs)
+
+
+def truncation_note(rows: int, items: int) -> str:
+    """结果被截断时的说明：按查询返回的行数说明，重复的行合并后列出的项数较少时一并说明"""
+    if items == rows:
+        return f"（结果较多，只列出前{rows}项）"
+    return f"（结果较多，只取了前{rows}条结果，合并重复项后列出{items}项）"
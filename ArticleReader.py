@@ -0,0 +1,78 @@
+import json
+from typing import Dict, Iterator
+
+# 每次从文件读取的字符数
+CHUNK_SIZE = 1 << 16
+
+
+def iter_articles(path: str) -> Iterator[Dict]:
+    """逐篇读取论文数据：.jsonl/.ndjson 文件按行解析，其余按顶层JSON数组增量解析"""
+    if path.endswith(('.jsonl', '.ndjson')):
+        return iter_json_lines(path)
+    return iter_json_array(path)
+
+
+def iter_json_lines(path: str) -> Iterator[Dict]:
+    """JSON Lines格式：每行一篇论文，空行跳过"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path} 第{line_no}行JSON解析失败：{e}") from e
+
+
+def iter_json_array(path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[Dict]:
+    """
+    增量解析顶层JSON数组，每次只在内存中保留当前正在解析的元素
+    :param path: JSON文件路径，内容形如 [{...}, {...}, ...]
+    :param chunk_size: 每次读取的字符数
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buf = f.read(chunk_size)
+        eof = not buf
+        pos = 0
+
+        def skip(chars):
+            """跳过空白及指定分隔符，必要时继续读取文件"""
+            nonlocal buf, pos, eof
+            while True:
+                while pos < len(buf) and (buf[pos].isspace() or buf[pos] in chars):
+                    pos += 1
+                if pos < len(buf) or eof:
+                    return
+                buf, pos = f.read(chunk_size), 0
+                eof = not buf
+
+        # 定位数组起始的'['
+        skip('\ufeff')
+        if pos >= len(buf) or buf[pos] != '[':
+            raise ValueError(f"{path} 不是以JSON数组开头")
+        pos += 1
+
+        while True:
+            skip(',')
+            if pos >= len(buf):
+                raise ValueError(f"{path} JSON数组未正常结束")
+            if buf[pos] == ']':
+                return
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+                # 元素恰好解析到缓冲区末尾时可能被截断（如数字），需要读入更多内容确认
+                complete = end < len(buf) or eof
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                complete = False
+            if not complete:
+                # 当前元素不完整：丢弃已解析部分，追加下一块数据后重试
+                more = f.read(chunk_size)
+                eof = not more
+                buf, pos = buf[pos:] + more, 0
+                continue
+            yield obj
+            pos = end
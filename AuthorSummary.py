@@ -0,0 +1,85 @@
+import time
+from typing import Iterable, List
+
+# 学者汇总：导入时为每位学者预先计算分析类查询需要的统计，查询模板直接读取，不再每次遍历学者的全部论文
+#   a.topic_years / a.topic_year_counts    按年份统计涉及研究主题的发表数（升序排列的年份及对应数量，
+#                                           与原模板相同，每篇论文按涉及的主题数计数）
+#   (a)-[:AUTHOR_JOURNAL {papers}]->(j)    学者在各期刊发表的论文数（影响因子查询时从期刊节点读取）
+#   (a)-[:AUTHOR_DISCIPLINE {papers}]->(d) 学者在各二级学科的论文数
+#   (a)-[:AUTHOR_METHOD {papers}]->(m)     学者使用各方法技术的论文数
+#   (a)-[:AUTHOR_SCENARIO {papers}]->(s)   学者涉及各应用场景的论文数
+# 全量导入后对全部学者计算一次；增量导入时在写入论文的同一事务中重新计算受影响学者（变更论文的新旧作者）的汇总
+
+# 汇总关系类型 -> (论文到终点节点的关系类型, 终点标签)
+SUMMARY_RELATIONS = {
+    'AUTHOR_JOURNAL': ('BE_PUBLISHED_IN', 'Journal'),
+    'AUTHOR_DISCIPLINE': ('BELONG_TO', 'Discipline'),
+    'AUTHOR_METHOD': ('USE', 'Method'),
+    'AUTHOR_SCENARIO': ('APPLY_TO', 'Scenario'),
+}
+# 全量计算时每个事务处理的学者数
+REFRESH_BATCH = 1000
+
+# 对变量a表示的学者重新计算汇总：删除旧的汇总关系，再按当前的论文关系重建
+SUMMARY_BODY = f"""
+    OPTIONAL MATCH (a)-[old:{'|'.join(SUMMARY_RELATIONS)}]->()
+    DELETE old
+    WITH DISTINCT a
+    CALL {{
+        WITH a
+        UNWIND [(a)-[:PUBLISH]->(p:Article)-[:INVOLVE]->(:Topic) | p.date] AS year
+        WITH year, count(*) AS n ORDER BY year
+        RETURN collect(year) AS years, collect(n) AS counts
+    }}
+    SET a.topic_years = years, a.topic_year_counts = counts
+""" + "".join(f"""
+    WITH a
+    CALL {{
+        WITH a
+        MATCH (a)-[:PUBLISH]->(p:Article)-[:{rel}]->(n:{label})
+        WITH a, n, count(DISTINCT p) AS papers
+        CREATE (a)-[:{summary} {{papers: papers}}]->(n)
+    }}
+""" for summary, (rel, label) in SUMMARY_RELATIONS.items())
+
+# 增量导入：按学者unique_id批量重新计算（作为BULK_QUERIES中的一项，与论文数据在同一事务中执行）
+AUTHOR_SUMMARY_QUERY = """
+    UNWIND $rows AS row
+    MATCH (a:Author {unique_id: row.author_id})
+""" + SUMMARY_BODY
+# 全量计算：服务端分批提交，需在自动提交事务中执行
+REFRESH_ALL_QUERY = f"""
+    MATCH (a:Author)
+    CALL {{
+        WITH a
+        {SUMMARY_BODY}
+    }} IN TRANSACTIONS OF {REFRESH_BATCH} ROWS
+"""
+# 变更论文的原作者（在清理旧关系之前查询）
+ARTICLE_AUTHORS_QUERY = """
+    MATCH (p:Article)<-[:PUBLISH]-(a:Author)
+    WHERE p.id IN $ids
+    RETURN DISTINCT a.unique_id AS author_id
+"""
+
+
+def refresh_all(graph) -> float:
+    """为全部学者重新计算汇总，返回耗时（秒）"""
+    start = time.perf_counter()
+    graph.run(REFRESH_ALL_QUERY)
+    return time.perf_counter() - start
+
+
+def article_authors(graph, article_ids: Iterable[str]) -> List[str]:
+    """论文当前在图谱中的作者unique_id"""
+    ids = list(article_ids)
+    if not ids:
+        return []
+    return [record['author_id'] for record in graph.run(ARTICLE_AUTHORS_QUERY, ids=ids)]
+
+
+# 独立运行：为已有图谱（如用neo4j-admin离线导入的图谱）计算全部学者的汇总
+if __name__ == '__main__':
+    from GraphPool import shared_pool
+    with shared_pool().session() as graph:
+        print(f"学者汇总已更新，耗时{refresh_all(graph):.2f}秒")
@@ -0,0 +1,282 @@
+import os
+import csv
+import time
+import uuid
+import zlib
+import shutil
+from datetime import datetime, timezone
+from typing import Dict
+from ArticleReader import iter_articles
+from build_graph import CLASSIFICATIONS, ScholarGraph, last_build
+
+# 离线全量重建：流式读取一遍数据集，导出neo4j-admin database import格式的节点/关系CSV文件，
+# 导入时不经过事务和MERGE，比ScholarGraph的在线导入快得多（需停库后导入到空数据库）
+# - 论文节点及以论文为中心的关系（PUBLISH、BE_PUBLISHED_IN、BELONG_TO、INVOLVE、USE、APPLY_TO）边读边写
+# - 作者（按unique_id）、期刊、分类节点在内存中去重，属性按出现顺序覆盖（与在线导入的 SET n += row 一致），最后写出
+# - 合作关系的作者对计数表超过buffer_pairs对时按作者对哈希分区溢写到临时文件，最后逐个分区汇总，
+#   内存中最多同时保留一个分区的作者对，数据集再大内存占用也有上限
+# 属性与在线导入完全相同（同样由ScholarGraph.collect_rows拆分），另写出GraphMeta版本号节点，问答端缓存据此失效
+# 数据集中重复的论文id只导出第一次出现的论文（节点、关系和合作次数），记录已导出的论文id用于判断
+
+# 数组属性（论文关键词）的元素分隔符，导入命令中以 --array-delimiter 指定
+ARRAY_DELIMITER = "\x1f"
+
+# 节点文件：标签 -> (文件名, 表头, 属性顺序)；ID列即merge键，导入后作为同名属性保存
+NODE_FILES = {
+    'Article': ('articles.csv', ['id:ID(Article)', 'title', 'date', 'keywords:string[]', 'abstract', 'language'],
+                ['id', 'title', 'date', 'keywords', 'abstract', 'language']),
+    'Journal': ('journals.csv', ['name:ID(Journal)', 'issn_isbn', 'impact_factor:double'],
+                ['name', 'issn_isbn', 'impact_factor']),
+    'Author': ('authors.csv', ['unique_id:ID(Author)', 'english_name', 'chinese_name'],
+               ['unique_id', 'english_name', 'chinese_name']),
+}
+for _, _, _label, _ in CLASSIFICATIONS:
+    NODE_FILES[_label] = (f'{_label.lower()}s.csv', [f'english_name:ID({_label})', 'chinese_name'],
+                          ['english_name', 'chinese_name'])
+# 去重的共享节点及其merge键
+SHARED_NODES = {'Journal': 'name', 'Author': 'unique_id'}
+SHARED_NODES.update({label: 'english_name' for _, _, label, _ in CLASSIFICATIONS})
+
+# 关系文件：关系类型 -> (文件名, 起点ID空间, 终点ID空间, 起点字段, 终点字段)，字段为collect_rows产出的行中的键
+RELATION_FILES = {
+    'BE_PUBLISHED_IN': ('be_published_in.csv', 'Article', 'Journal', 'article_id', 'journal'),
+    'PUBLISH': ('publish.csv', 'Author', 'Article', 'author_id', 'article_id'),
+}
+for _, _, _label, _rel_type in CLASSIFICATIONS:
+    RELATION_FILES[_rel_type] = (f'{_rel_type.lower()}.csv', 'Article', _label, 'article_id', 'english_name')
+COLLABORATE_FILE = 'collaborate.csv'
+COLLABORATE_HEADER = [':START_ID(Author)', ':END_ID(Author)', 'count:int', 'first_year:int', 'last_year:int']
+META_FILE = 'graph_meta.csv'
+
+# 合作计数表的默认溢写阈值（作者对数）与分区数
+BUFFER_PAIRS = 1000000
+PARTITIONS = 16
+
+
+def field(value) -> str:
+    """单个字段：None为不加引号的空字段，数值原样写出，其余按字符串加引号（内部引号双写）"""
+    if value is None:
+        return ''
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+class CsvWriter:
+    """
+    与csv.writer用法相同的写出器：字符串一律加引号、None写为空字段，导入时空字段为缺失属性，""为空字符串，与在线导入一致
+    （csv模块的QUOTE_NONNUMERIC会把None也写成""，导入后成为空字符串属性）
+    """
+    def __init__(self, f):
+        self.f = f
+
+    def writerow(self, row):
+        self.f.write(','.join(field(value) for value in row) + '\n')
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+
+def open_csv(path: str):
+    f = open(path, 'w', encoding='utf-8', newline='')
+    return f, CsvWriter(f)
+
+
+def cell(value):
+    if isinstance(value, list):
+        return ARRAY_DELIMITER.join(str(item) for item in value)
+    return value
+
+
+class CollaborationSpill:
+    """合作计数表的分区溢写：按作者对的哈希分到固定的分区文件，同一作者对总在同一分区，可逐个分区汇总"""
+    def __init__(self, directory: str, partitions: int = PARTITIONS):
+        self.directory = directory
+        self.partitions = partitions
+        self.spills = 0
+        self.files = None
+
+    def spill(self, table: Dict):
+        if self.files is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self.files = [open(self.path(i), 'w', encoding='utf-8', newline='') for i in range(self.partitions)]
+        writers = [csv.writer(f) for f in self.files]
+        for (source, target), (count, first, last) in table.items():
+            writers[zlib.crc32(f"{source}\x00{target}".encode('utf-8')) % self.partitions].writerow(
+                [source, target, count, first, last])
+        table.clear()
+        self.spills += 1
+
+    def path(self, index: int) -> str:
+        return os.path.join(self.directory, f'part-{index:03d}.csv')
+
+    def merged_partitions(self, table: Dict):
+        """依次产出每个分区汇总后的计数表；table为尚未溢写的部分，按同样的规则分到各分区合并"""
+        if self.files is None:
+            yield table
+            return
+        self.spill(table)
+        for f in self.files:
+            f.close()
+        for index in range(self.partitions):
+            merged = {}
+            with open(self.path(index), 'r', encoding='utf-8', newline='') as f:
+                for source, target, count, first, last in csv.reader(f):
+                    count, first, last = int(count), int(first), int(last)
+                    item = merged.get((source, target))
+                    if item is None:
+                        merged[(source, target)] = [count, first, last]
+                    else:
+                        item[0] += count
+                        item[1] = min(item[1], first)
+                        item[2] = max(item[2], last)
+            yield merged
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def export_csv(data_path: str, out_dir: str, buffer_pairs: int = BUFFER_PAIRS,
+               partitions: int = PARTITIONS, progress: int = 100000) -> Dict:
+    """
+    流式读取数据集，导出neo4j-admin导入用的CSV文件
+    :param data_path: 数据集路径（.json数组或.jsonl）
+    :param out_dir: 输出目录
+    :param buffer_pairs: 合作计数表在内存中最多保留的作者对数，超过后溢写到分区文件
+    :return: 导出统计 {"articles", "duplicates", "seconds", "nodes": {标签: 数量}, "relationships": {类型: 数量},
+             "bytes", "spills"}
+    """
+    start = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+    shared = {label: {} for label in SHARED_NODES}
+    counts = {'nodes': {label: 0 for label in NODE_FILES}, 'relationships': {rel: 0 for rel in RELATION_FILES}}
+    counts['relationships']['COLLABORATE'] = 0
+    collaborations = {}
+    spill = CollaborationSpill(os.path.join(out_dir, '.collaborate_parts'), partitions)
+
+    # 论文节点与以论文为中心的关系边读边写
+    handles = []
+    article_file, article_writer = open_csv(os.path.join(out_dir, NODE_FILES['Article'][0]))
+    article_writer.writerow(NODE_FILES['Article'][1])
+    handles.append(article_file)
+    rel_writers = {}
+    for rel, (filename, src_space, dst_space, _, _) in RELATION_FILES.items():
+        f, writer = open_csv(os.path.join(out_dir, filename))
+        writer.writerow([f':START_ID({src_space})', f':END_ID({dst_space})'])
+        handles.append(f)
+        rel_writers[rel] = writer
+
+    articles = 0
+    exported = set()
+    duplicates = 0
+    try:
+        for article in iter_articles(data_path):
+            # 重复的论文id：关系和合作次数也只按第一次出现的论文导出，不写出重复的关系行
+            if article['id'] in exported:
+                duplicates += 1
+                continue
+            exported.add(article['id'])
+            batch = ScholarGraph.new_batch()
+            ScholarGraph.collect_rows(article, batch, collaborations)
+            articles += 1
+            for row in batch['Article']:
+                article_writer.writerow([cell(row.get(prop)) for prop in NODE_FILES['Article'][2]])
+                counts['nodes']['Article'] += 1
+            for label, key in SHARED_NODES.items():
+                nodes = shared[label]
+                for row in batch[label]:
+                    node = nodes.get(row[key])
+                    if node is None:
+                        nodes[row[key]] = row
+                    else:
+                        node.update(row)
+            for rel, (_, _, _, src_field, dst_field) in RELATION_FILES.items():
+                # 同一篇论文中重复的作者、分类只写一条关系（与MERGE一致）
+                pairs = []
+                for row in batch[rel]:
+                    pair = (row[src_field], row[dst_field])
+                    if pair not in pairs:
+                        pairs.append(pair)
+                rel_writers[rel].writerows(pairs)
+                counts['relationships'][rel] += len(pairs)
+            if len(collaborations) >= buffer_pairs:
+                spill.spill(collaborations)
+            if progress and articles % progress == 0:
+                print(f"已导出{articles}篇论文")
+    finally:
+        for f in handles:
+            f.close()
+
+    # 去重后的共享节点
+    for label, nodes in shared.items():
+        filename, header, props = NODE_FILES[label]
+        f, writer = open_csv(os.path.join(out_dir, filename))
+        with f:
+            writer.writerow(header)
+            for node in nodes.values():
+                writer.writerow([cell(node.get(prop)) for prop in props])
+        counts['nodes'][label] = len(nodes)
+    shared.clear()
+    exported.clear()
+
+    # 合作关系：逐个分区汇总后写出
+    f, writer = open_csv(os.path.join(out_dir, COLLABORATE_FILE))
+    with f:
+        writer.writerow(COLLABORATE_HEADER)
+        for table in spill.merged_partitions(collaborations):
+            for (source, target), (count, first, last) in table.items():
+                writer.writerow([source, target, count, first, last])
+            counts['relationships']['COLLABORATE'] += len(table)
+
+    # 图谱版本号：与在线导入后write_graph_version写入的节点相同
+    f, writer = open_csv(os.path.join(out_dir, META_FILE))
+    with f:
+        writer.writerow(['name:ID(GraphMeta)', 'version', 'updated_at:datetime'])
+        writer.writerow(['graph', str(uuid.uuid4()), datetime.now(timezone.utc).isoformat()])
+
+    size = sum(os.path.getsize(os.path.join(out_dir, name)) for name in os.listdir(out_dir)
+               if name.endswith('.csv'))
+    return {'articles': articles, 'duplicates': duplicates, 'seconds': time.perf_counter() - start, 'bytes': size, 'spills': spill.spills,
+            **counts}
+
+
+def import_command(out_dir: str, database: str = 'neo4j') -> str:
+    """neo4j-admin database import full 命令（Neo4j 5），需在数据库停止时运行，会覆盖目标数据库"""
+    path = os.path.abspath(out_dir)
+    args = ['neo4j-admin database import full']
+    for label, (filename, _, _) in NODE_FILES.items():
+        args.append(f'--nodes={label}={os.path.join(path, filename)}')
+    args.append(f'--nodes=GraphMeta={os.path.join(path, META_FILE)}')
+    for rel, (filename, _, _, _, _) in RELATION_FILES.items():
+        args.append(f'--relationships={rel}={os.path.join(path, filename)}')
+    args.append(f'--relationships=COLLABORATE={os.path.join(path, COLLABORATE_FILE)}')
+    # 节点在导出时已去重（重复的论文id只导出第一条），不需要 --skip-duplicate-nodes
+    args += [f'--array-delimiter=U+{ord(ARRAY_DELIMITER):04X}', '--multiline-fields=true',
+             '--overwrite-destination=true', database]
+    return ' \\\n    '.join(args)
+
+
+def report(stats: Dict, data_path: str, out_dir: str):
+    """输出导出统计、导入命令，以及与该数据集最近一次在线导入耗时的对比"""
+    seconds = stats['seconds']
+    print(f"CSV导出完成：{stats['articles']}篇论文，耗时{seconds:.2f}秒"
+          f"（{stats['articles'] / seconds if seconds > 0 else 0:.0f}篇/秒），共{stats['bytes'] / 1e6:.1f}MB，"
+          f"合作计数表溢写{stats['spills']}次")
+    if stats['duplicates']:
+        print(f"  数据集中有{stats['duplicates']}篇论文的id与之前的论文重复，只导出了第一次出现的论文")
+    for kind in ('nodes', 'relationships'):
+        print("  " + "，".join(f"{name} {count}" for name, count in stats[kind].items()))
+
+    build = last_build(data_path)
+    if build is None:
+        print("没有该数据集的在线导入记录（运行一次build_graph.py后即可对比）")
+    else:
+        note = "" if build.get('size') == os.path.getsize(data_path) else "（数据集在那次导入后已变化）"
+        print(f"对比：最近一次在线导入（{build['mode']}模式）耗时{build['seconds']:.2f}秒{note}，"
+              f"CSV导出耗时为其{seconds / build['seconds']:.1%}；另需加上neo4j-admin导入的耗时")
+
+    command = import_command(out_dir)
+    with open(os.path.join(out_dir, 'import.sh'), 'w', encoding='utf-8') as f:
+        f.write(command + "\n")
+    print("停止数据库后运行以下命令导入（已保存为import.sh），启动后运行 python GraphSchema.py 创建约束和索引，"
+          "再运行 python AuthorSummary.py 计算学者汇总：")
+    print(command)
@@ -0,0 +1,196 @@
+from GraphSchema import FULLTEXT_INDEXES
+
+# Cypher查询模板注册表：(实体类型, 意图类别) -> 模板
+# 模板中实体名称一律通过参数传入，查询文本固定不变，Neo4j只需解析、规划一次即可复用执行计划
+# 参数说明：
+#   $name    实体名称原文（学者姓名精确匹配、论文标题CONTAINS匹配）
+#   $query   全文索引的Lucene短语查询
+#   $top_k   全文索引按相关度保留的实体节点数
+#   $pattern 正则模糊匹配表达式（全文索引不可用或无结果时的后备查询使用）
+#   $limit   返回行数上限，为模板行数上限加1，多取的一行用于判断结果是否被截断
+
+# 学者按中文名或英文名精确匹配
+AUTHOR_MATCH = "WHERE a.chinese_name = $name OR a.english_name = $name"
+# 论文标题正则模糊匹配
+TITLE_REGEX = "p.title =~ $pattern"
+
+
+# 列表类查询的返回子句：论文按发表年份从新到旧，学者按相关论文数从多到少，只返回前$limit行
+PAPERS = "RETURN p.title AS 论文标题, p.date AS 发表年份 ORDER BY p.date DESC LIMIT $limit"
+AUTHORS = ("RETURN a.chinese_name AS 中文名, a.english_name AS 英文名, count(DISTINCT p) AS 论文数 "
+           "ORDER BY 论文数 DESC LIMIT $limit")
+# 模板的行数上限：主题、学科等查询可能命中上千篇论文或学者，只取最相关的若干行送入回答
+DEFAULT_ROW_LIMIT = 50
+ROW_LIMITS = {
+    "author.paper": 100,
+    "author.collab": 100,
+    "article.time": 10,
+    "article.keyword": 10,
+    "journal.factor": 10,
+}
+
+
+def name_regex(alias: str) -> str:
+    """分类节点中英文名称的正则模糊匹配条件"""
+    return f"{alias}.chinese_name =~ $pattern OR {alias}.english_name =~ $pattern"
+
+
+def anchored(entity_type: str, alias: str, pattern: str, fallback_where: str, returns: str) -> dict:
+    """
+    以实体节点为起点的查询模板：先用全文索引按相关度取前$top_k个实体节点，再沿pattern展开
+    :param alias: pattern中实体节点的变量名
+    :param fallback_where: 后备查询的正则/CONTAINS过滤条件
+    :param returns: RETURN子句
+    """
+    index_name = FULLTEXT_INDEXES[entity_type][0]
+    return {
+        "cypher": f"""
+                  CALL db.index.fulltext.queryNodes("{index_name}", $query)
+                  YIELD node AS {alias}, score
+                  WITH {alias}, score ORDER BY score DESC LIMIT $top_k
+                  MATCH {pattern}
+                  {returns}
+                  """,
+        "fallback": f"""
+                  MATCH {pattern}
+                  WHERE {fallback_where}
+                  {returns}
+                  """,
+    }
+
+
+def summarized(summary_rel: str, target: str, rel: str, columns: str, order: str) -> dict:
+    """
+    学者按终点节点分组统计论文数的模板：读取学者汇总关系上的论文数；后备查询沿 学者-论文-终点节点 遍历统计
+    :param summary_rel: 学者汇总关系类型（如"AUTHOR_JOURNAL"）
+    :param target: 终点节点模式（如"(j:Journal)"）
+    :param rel: 论文到终点节点的关系类型
+    :param columns: 分组列（RETURN子句中论文数之前的部分）
+    :param order: ORDER BY子句
+    """
+    return {
+        "cypher": f"""
+                  MATCH (a:Author)-[r:{summary_rel}]->{target}
+                  {AUTHOR_MATCH}
+                  RETURN {columns}, sum(r.papers) AS 论文数
+                  ORDER BY {order} LIMIT $limit
+                  """,
+        "fallback": f"""
+                  MATCH (a:Author)-[:PUBLISH]->(p:Article)-[:{rel}]->{target}
+                  {AUTHOR_MATCH}
+                  RETURN {columns}, count(DISTINCT p) AS 论文数
+                  ORDER BY {order} LIMIT $limit
+                  """,
+    }
+
+
+TEMPLATES = {
+    # 学者（Author）相关
+    # 学者的年份分布、期刊、学科、方法、场景读取导入时预先计算的学者汇总（见AuthorSummary.py），不遍历学者的论文；
+    # 图谱中还没有汇总（如导入于汇总功能之前）或汇总为空时改用遍历论文的后备查询，结果相同
+    ("Author", "topic"): {"cypher": f"""
+                           MATCH (a:Author)
+                           {AUTHOR_MATCH}
+                           UNWIND range(0, size(coalesce(a.topic_years, [])) - 1) AS i
+                           RETURN a.topic_years[i] AS 年份, sum(a.topic_year_counts[i]) AS 发表数量
+                           ORDER BY 年份
+                           """,
+                          "fallback": f"""
+                           MATCH (a:Author)-[:PUBLISH]->(p:Article)-[:INVOLVE]->(d:Topic)
+                           {AUTHOR_MATCH}
+                           RETURN p.date AS 年份, count(p) AS 发表数量
+                           ORDER BY p.date
+                           """},
+    ("Author", "discipline"): summarized("AUTHOR_DISCIPLINE", "(d:Discipline)", "BELONG_TO",
+                                         "d.chinese_name AS 二级学科, d.english_name AS 英文领域", "论文数 DESC"),
+    ("Author", "journal"): summarized("AUTHOR_JOURNAL", "(j:Journal)", "BE_PUBLISHED_IN",
+                                      "j.name AS 期刊名称, j.impact_factor AS 影响因子", "论文数 DESC, 影响因子 DESC"),
+    ("Author", "method"): summarized("AUTHOR_METHOD", "(m:Method)", "USE", "m.chinese_name AS 方法技术", "论文数 DESC"),
+    ("Author", "scenario"): summarized("AUTHOR_SCENARIO", "(s:Scenario)", "APPLY_TO", "s.chinese_name AS 应用场景",
+                                       "论文数 DESC"),
+    ("Author", "paper"): {"cypher": f"""
+                           MATCH (a:Author)-[:PUBLISH]->(p:Article)
+                           {AUTHOR_MATCH}
+                           RETURN p.title AS 论文标题, p.date AS 发表年份, p.container_title AS 期刊名称
+                           ORDER BY p.date DESC LIMIT $limit
+                           """},
+    # 合作学者按合作关系上的合著次数排序，无需再遍历论文
+    ("Author", "collab"): {"cypher": f"""
+                           MATCH (a:Author)-[r:COLLABORATE]-(c:Author)
+                           {AUTHOR_MATCH}
+                           WITH c, sum(coalesce(r.count, 1)) AS weight, max(r.last_year) AS last_year
+                           RETURN c.chinese_name AS 中文名, c.english_name AS 英文名, weight AS 合作次数
+                           ORDER BY weight DESC, last_year DESC LIMIT $limit
+                           """},
+
+    # 论文（Article）相关
+    ("Article", "abstract"): anchored("Article", "p", "(p:Article)", TITLE_REGEX,
+                                      "RETURN p.title AS 论文标题, p.abstract AS 摘要 LIMIT 1"),
+    ("Article", "author"): anchored("Article", "p", "(p:Article)<-[:PUBLISH]-(a:Author)", TITLE_REGEX,
+                                    "RETURN a.chinese_name AS 中文名, a.english_name AS 英文名 LIMIT $limit"),
+    ("Article", "journal"): anchored("Article", "p", "(p:Article)-[:BE_PUBLISHED_IN]->(j:Journal)",
+                                     "p.title CONTAINS $name",
+                                     "RETURN j.name AS 期刊名称, j.impact_factor AS 影响因子, p.date AS 发表年份 LIMIT $limit"),
+    ("Article", "time"): anchored("Article", "p", "(p:Article)", TITLE_REGEX,
+                                  "RETURN p.date AS 发表年份 LIMIT $limit"),
+    ("Article", "keyword"): anchored("Article", "p", "(p:Article)", TITLE_REGEX,
+                                     "RETURN p.keywords AS 关键词 LIMIT $limit"),
+    ("Article", "discipline"): anchored("Article", "p", "(p:Article)-[:BELONG_TO]->(d:Discipline)", TITLE_REGEX,
+                                        "RETURN DISTINCT d.chinese_name AS 二级学科 LIMIT $limit"),
+    ("Article", "topic"): anchored("Article", "p", "(p:Article)-[:INVOLVE]->(t:Topic)", TITLE_REGEX,
+                                   "RETURN DISTINCT t.chinese_name AS 研究主题 LIMIT $limit"),
+    ("Article", "method"): anchored("Article", "p", "(p:Article)-[:USE]->(m:Method)", TITLE_REGEX,
+                                    "RETURN DISTINCT m.chinese_name AS 方法技术 LIMIT $limit"),
+    ("Article", "scenario"): anchored("Article", "p", "(p:Article)-[:APPLY_TO]->(s:Scenario)", TITLE_REGEX,
+                                      "RETURN DISTINCT s.chinese_name AS 应用场景 LIMIT $limit"),
+
+    # 研究主题（Topic）相关
+    ("Topic", "paper"): anchored("Topic", "t", "(t:Topic)<-[:INVOLVE]-(p:Article)", name_regex("t"),
+                                 PAPERS),
+    ("Topic", "author"): anchored("Topic", "t", "(t:Topic)<-[:INVOLVE]-(p:Article)<-[:PUBLISH]-(a:Author)", name_regex("t"),
+                                  AUTHORS),
+
+    # 期刊（Journal）相关
+    ("Journal", "paper"): anchored("Journal", "j", "(j:Journal)<-[:BE_PUBLISHED_IN]-(p:Article)", "j.name =~ $pattern",
+                                   PAPERS),
+    ("Journal", "factor"): anchored("Journal", "j", "(j:Journal)", "j.name =~ $pattern",
+                                    "RETURN j.impact_factor AS 影响因子 LIMIT $limit"),
+
+    # 二级学科（Discipline）相关
+    ("Discipline", "paper"): anchored("Discipline", "d", "(d:Discipline)<-[:BELONG_TO]-(p:Article)", name_regex("d"),
+                                      PAPERS),
+    ("Discipline", "author"): anchored("Discipline", "d", "(d:Discipline)<-[:BELONG_TO]-(p:Article)<-[:PUBLISH]-(a:Author)", name_regex("d"),
+                                       AUTHORS),
+
+    # 方法技术（Method）相关
+    ("Method", "author"): anchored("Method", "m", "(m:Method)<-[:USE]-(p:Article)<-[:PUBLISH]-(a:Author)", name_regex("m"),
+                                   AUTHORS),
+    ("Method", "paper"): anchored("Method", "m", "(m:Method)<-[:USE]-(p:Article)", name_regex("m"),
+                                  PAPERS),
+
+    # 应用场景（Scenario）相关
+    ("Scenario", "paper"): anchored("Scenario", "s", "(s:Scenario)<-[:APPLY_TO]-(p:Article)", name_regex("s"),
+                                    PAPERS),
+    ("Scenario", "author"): anchored("Scenario", "s", "(s:Scenario)<-[:APPLY_TO]-(p:Article)<-[:PUBLISH]-(a:Author)", name_regex("s"),
+                                     AUTHORS),
+}
+
+# 意图分派表：{实体类型: [意图类别, ...]}，按优先级排列
+# 意图文本同时命中多个类别的关键词时（如"研究方向"同时包含主题和学科关键词），取排在前面的类别
+DISPATCH_PRIORITY = {
+    "Author": ["topic", "discipline", "journal", "method", "scenario", "paper", "collab"],
+    "Article": ["abstract", "author", "journal", "time", "keyword", "discipline", "topic", "method", "scenario"],
+    "Topic": ["paper", "author"],
+    "Journal": ["paper", "factor"],
+    "Discipline": ["paper", "author"],
+    "Method": ["author", "paper"],
+    "Scenario": ["paper", "author"],
+}
+
+# 模板id形如"author.collab"，执行器按id取出查询文本；带$limit参数的模板记录行数上限
+TEMPLATES_BY_ID = {}
+for (_entity_type, _category), _template in TEMPLATES.items():
+    _template["id"] = f"{_entity_type.lower()}.{_category}"
+    if "$limit" in _template["cypher"]:
+        _template["limit"] = ROW_LIMITS.get(_template["id"], DEFAULT_ROW_LIMIT)
+    TEMPLATES_BY_ID[_template["id"]] = _template
@@ -0,0 +1,169 @@
+import re
+from typing import Dict, List, Optional
+from KeywordMatcher import AhoCorasick
+
+# 从图谱中读取实体名称构建地名录（gazetteer）：{实体类型: 查询}
+GAZETTEER_QUERIES = {
+    "Author": "MATCH (n:Author) RETURN DISTINCT n.chinese_name AS zh, n.english_name AS en",
+    "Journal": "MATCH (n:Journal) RETURN DISTINCT n.name AS zh, null AS en",
+    "Topic": "MATCH (n:Topic) RETURN DISTINCT n.chinese_name AS zh, n.english_name AS en",
+    "Discipline": "MATCH (n:Discipline) RETURN DISTINCT n.chinese_name AS zh, n.english_name AS en",
+    "Method": "MATCH (n:Method) RETURN DISTINCT n.chinese_name AS zh, n.english_name AS en",
+    "Scenario": "MATCH (n:Scenario) RETURN DISTINCT n.chinese_name AS zh, n.english_name AS en",
+}
+# 同名实体属于多个类型且都能生成查询时的优先顺序
+TYPE_PRIORITY = ["Author", "Journal", "Topic", "Discipline", "Method", "Scenario"]
+# 名称最短长度：过短的名称容易误匹配问句中的普通词语
+MIN_CJK_LENGTH = 2
+MIN_ASCII_LENGTH = 4
+# 同一实体有多个意图时，问句中需出现并列连接词才认为是多意图问题，否则交给大模型判断
+CONJUNCTIONS = ['和', '以及', '及', '、', '还有', '与', '并且', '，', ',']
+# 地名录中没有论文标题：问句中含有书名号/引号括起的名称（不是一个完整的实体名称），或去掉实体和关键词后
+# 剩余较长的连续文字时，很可能是在问某篇论文（标题中恰好含有方法、主题等名称），交给大模型判断
+TITLE_QUOTES = re.compile(r'《[^》]+》|“[^”]+”|"[^"]+"|「[^」]+」')
+UNMATCHED_CJK = re.compile(r'[\u4e00-\u9fff]+')
+UNMATCHED_ASCII = re.compile(r'[a-z0-9]+(?:[ \-:]+[a-z0-9]+)*')
+ASCII_WORD = re.compile(r'[a-z0-9]+')
+MAX_UNMATCHED_CJK = 8
+MAX_UNMATCHED_WORDS = 2
+
+
+# 本地意图快速识别：地名录多模式匹配实体 + CypherGenerator中的关键词判断意图，无需调用大模型
+class FastIntentMatcher:
+    def __init__(self, cypher_generator):
+        self.cypher_generator = cypher_generator
+        self.keywords = cypher_generator.keyword_lists()
+        # 关键词自动机：一次扫描找出问句中所有意图关键词的位置，模式为小写化的关键词，值为原始关键词
+        self.keyword_matcher = AhoCorasick()
+        for words in self.keywords.values():
+            for word in words:
+                self.keyword_matcher.add(word.lower(), word)
+        self.keyword_matcher.build()
+        self.all_keywords = {word.lower() for words in self.keywords.values() for word in words}
+        # 实体自动机：模式为小写化的实体名称，值为 (图谱中的原始名称, 实体类型)
+        self.entity_matcher = AhoCorasick()
+        self.size = 0
+
+    @classmethod
+    def from_graph(cls, graph, cypher_generator) -> 'FastIntentMatcher':
+        """从图谱中读取Author/Journal/Topic/Discipline/Method/Scenario的名称构建地名录"""
+        matcher = cls(cypher_generator)
+        for entity_type, cypher in GAZETTEER_QUERIES.items():
+            for record in graph.run(cypher).data():
+                for name in (record["zh"], record["en"]):
+                    matcher.add_entity(name, entity_type)
+        return matcher.finish()
+
+    @classmethod
+    def from_snapshot(cls, snapshot, cypher_generator) -> 'FastIntentMatcher':
+        """从只读图谱快照（GraphSnapshot.GraphSnapshot）中读取实体名称构建地名录，不连接Neo4j"""
+        matcher = cls(cypher_generator)
+        for entity_type in GAZETTEER_QUERIES:
+            # 与地名录查询的DISTINCT一致：同名节点只加入一次
+            for name in dict.fromkeys(name for names in snapshot.names(entity_type) for name in names):
+                matcher.add_entity(name, entity_type)
+        return matcher.finish()
+
+    def finish(self) -> 'FastIntentMatcher':
+        self.entity_matcher.build()
+        print(f"意图快速识别地名录已加载：{self.size}个实体名称")
+        return self
+
+    def add_entity(self, name: Optional[str], entity_type: str):
+        """加入一个实体名称，过短或与意图关键词相同的名称不加入"""
+        if not name or not name.strip():
+            return
+        name = name.strip()
+        if name.isascii():
+            if len(name) < MIN_ASCII_LENGTH:
+                return
+        elif len(name) < MIN_CJK_LENGTH:
+            return
+        if name.lower() in self.all_keywords:
+            return
+        self.entity_matcher.add(name.lower(), (name, entity_type))
+        self.size += 1
+
+    def match(self, question: str) -> Optional[Dict]:
+        """
+        尝试在本地识别实体和意图
+        :return: 与IntentAnalyzer.analyze相同格式的结果；不够确定时返回None，由调用方改用大模型
+        """
+        # 实体和关键词都在小写化的问句上匹配，位置只在text中比较（部分字符小写化后长度会变化，如'İ'，不能回到原问句中切片）
+        text = question.lower()
+        spans = self.entity_matcher.find_longest(text)
+        if not spans:
+            return None
+        keyword_hits = self.keyword_matcher.find_longest(text)
+        if not keyword_hits:
+            return None
+        if self.title_like(text, spans, keyword_hits):
+            return None
+
+        # 同一位置的同名实体合并为一个候选，记录其可能的类型
+        candidates = []
+        for start, end, (name, entity_type) in spans:
+            if candidates and candidates[-1]["start"] == start and candidates[-1]["end"] == end:
+                candidates[-1]["types"].append((name, entity_type))
+            else:
+                candidates.append({"start": start, "end": end, "types": [(name, entity_type)]})
+
+        # 关键词归属：问句中位于某实体之后的关键词归给它之前最近的实体（如"X的合作者"），
+        # 位于所有实体之前的关键词归给第一个实体（如"发表在期刊Y上的论文"）
+        for candidate in candidates:
+            candidate["words"] = []
+        for start, end, word in keyword_hits:
+            if any(c["start"] <= start < c["end"] for c in candidates):
+                continue  # 关键词是实体名称的一部分
+            owner = candidates[0]
+            for candidate in candidates:
+                if candidate["start"] <= start:
+                    owner = candidate
+            owner["words"].append(word)
+
+        entities = []
+        intents = []
+        for candidate in candidates:
+            resolved = self.resolve(candidate)
+            if not resolved:
+                return None
+            (name, entity_type), queries = resolved
+            if len(queries) > 1 and not any(conj in question for conj in CONJUNCTIONS):
+                return None
+            if all(e["name"] != name for e in entities):
+                entities.append({"name": name, "type": entity_type})
+            intents.extend({"entity": name, "intent": intent} for intent in queries.values())
+        return {"entities": entities, "intents": intents}
+
+    @staticmethod
+    def title_like(text: str, spans: List, keyword_hits: List) -> bool:
+        """问句（小写化）中是否含有像论文标题的内容：引号中不是一个完整的实体名称，或实体和关键词之外剩余较长的连续文字"""
+        exact = {(start, end) for start, end, _ in spans}
+        for quoted in TITLE_QUOTES.finditer(text):
+            if (quoted.start() + 1, quoted.end() - 1) not in exact:
+                return True
+        # 实体和关键词替换为分隔符后，检查剩余的连续中文字符数和英文单词数
+        chars = list(text)
+        for start, end, _ in list(spans) + list(keyword_hits):
+            chars[start:end] = '\n' * (end - start)
+        rest = ''.join(chars)
+        if any(len(run) > MAX_UNMATCHED_CJK for run in UNMATCHED_CJK.findall(rest)):
+            return True
+        return any(len(ASCII_WORD.findall(run)) > MAX_UNMATCHED_WORDS for run in UNMATCHED_ASCII.findall(rest))
+
+    def resolve(self, candidate: Dict):
+        """
+        为候选实体确定类型和意图：按类型优先级依次尝试，取第一个能由归属关键词生成查询模板的类型
+        :return: ((名称, 类型), {模板id: 意图文本})，无法生成任何查询时返回None
+        """
+        options = sorted(candidate["types"], key=lambda t: TYPE_PRIORITY.index(t[1]))
+        for name, entity_type in options:
+            queries = {}
+            for word in candidate["words"]:
+                intent = f"查询{word}"
+                query = self.cypher_generator.generate_for_intent({"name": name, "type": entity_type}, intent, "")
+                if query and query["template"] not in queries:
+                    queries[query["template"]] = intent
+            if queries:
+                return (name, entity_type), queries
+        return None
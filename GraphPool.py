@@ -0,0 +1,209 @@
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+from py2neo import Graph
+from py2neo.errors import ConnectionBroken, ConnectionUnavailable, ServiceUnavailable
+from QuestionAnalyzer import Config  # 导入配置类
+
+# 图数据库连接池（导入端build_graph.py与问答端KGQuery.py共用）：
+#   每个会话是一个只持有一条Bolt连接的py2neo Graph，同一时刻只由一个线程使用；
+#   取用时优先复用最近归还的空闲会话，池满时等待其他线程归还，超过获取超时时间抛出PoolTimeout；
+#   空闲超过keepalive秒的会话复用前先执行一次轻量查询检测连接是否仍然可用，不可用的会话丢弃重建
+CONNECTION_ERRORS = (ConnectionBroken, ConnectionUnavailable, ServiceUnavailable)
+
+
+class PoolTimeout(Exception):
+    """获取超时时间内连接池中没有空闲会话"""
+
+
+class GraphPool:
+    def __init__(self, uri: str = Config.NEO4J_URI, auth: Tuple[str, str] = (Config.NEO4J_USER, Config.NEO4J_PASSWORD),
+                 max_size: int = Config.NEO4J_POOL_SIZE, acquire_timeout: float = Config.NEO4J_ACQUIRE_TIMEOUT,
+                 keepalive: float = Config.NEO4J_KEEPALIVE, max_age: float = Config.NEO4J_MAX_AGE):
+        """
+        :param max_size: 同时打开的会话（连接）数上限
+        :param acquire_timeout: 池满时等待空闲会话的最长时间（秒）
+        :param keepalive: 会话空闲超过该时间（秒）后，复用前先检测连接是否可用
+        :param max_age: 单条连接的最长存活时间（秒），超过后由py2neo关闭重连
+        """
+        self.uri = uri
+        self.auth = auth
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.keepalive = keepalive
+        self.max_age = max_age
+        # 空闲会话栈 [(会话, 归还时间)]，后进先出：优先复用刚归还的连接，长期不用的连接留在栈底
+        self.idle: List[Tuple[Graph, float]] = []
+        # 使用中的会话：id(会话) -> 取出时间
+        self.in_use: Dict[int, float] = {}
+        # 已打开（含正在建立）的会话数
+        self.size = 0
+        self.cond = threading.Condition()
+        self.started_at = time.monotonic()
+        self.metrics = {"acquired": 0, "waited": 0, "wait_seconds": 0.0, "max_wait": 0.0, "timeouts": 0,
+                        "created": 0, "discarded": 0, "busy_seconds": 0.0, "peak_in_use": 0}
+
+    def connect(self) -> Graph:
+        """新建一个只持有一条连接的会话"""
+        return Graph(self.uri, auth=self.auth, max_size=1, max_age=self.max_age)
+
+    def acquire(self, timeout: Optional[float] = None) -> Graph:
+        """取出一个会话，用完后必须调用release归还（推荐使用session()）"""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        start = time.monotonic()
+        with self.cond:
+            waited = False
+            while not self.idle and self.size >= self.max_size:
+                remaining = start + timeout - time.monotonic()
+                if remaining <= 0:
+                    self.metrics["timeouts"] += 1
+                    raise PoolTimeout(f"{timeout}秒内没有空闲的图数据库连接（连接池上限{self.max_size}）")
+                waited = True
+                self.cond.wait(remaining)
+            if self.idle:
+                graph, released_at = self.idle.pop()
+            else:
+                # 先占住名额，在锁外建立连接
+                graph, released_at = None, None
+                self.size += 1
+            wait = time.monotonic() - start
+            self.metrics["acquired"] += 1
+            if waited:
+                self.metrics["waited"] += 1
+                self.metrics["wait_seconds"] += wait
+                self.metrics["max_wait"] = max(self.metrics["max_wait"], wait)
+
+        try:
+            if graph is None:
+                graph = self.open_session()
+            elif time.monotonic() - released_at > self.keepalive and not self.alive(graph):
+                self.close_session(graph)
+                with self.cond:
+                    self.metrics["discarded"] += 1
+                graph = self.open_session()
+        except BaseException:
+            with self.cond:
+                self.size -= 1
+                self.cond.notify()
+            raise
+
+        with self.cond:
+            self.in_use[id(graph)] = time.monotonic()
+            self.metrics["peak_in_use"] = max(self.metrics["peak_in_use"], len(self.in_use))
+        return graph
+
+    def open_session(self) -> Graph:
+        graph = self.connect()
+        with self.cond:
+            self.metrics["created"] += 1
+        return graph
+
+    def release(self, graph: Graph, discard: bool = False):
+        """归还会话；discard为True（连接已断开）时关闭该会话，空出的名额由下次取用时重建"""
+        with self.cond:
+            acquired_at = self.in_use.pop(id(graph), None)
+            if acquired_at is None:
+                return
+            now = time.monotonic()
+            self.metrics["busy_seconds"] += now - acquired_at
+            if discard:
+                self.size -= 1
+                self.metrics["discarded"] += 1
+            else:
+                self.idle.append((graph, now))
+            self.cond.notify()
+        if discard:
+            self.close_session(graph)
+
+    @contextmanager
+    def session(self, timeout: Optional[float] = None) -> Iterator[Graph]:
+        """with pool.session() as graph: 取出会话，退出时归还；执行中连接断开的会话不再放回池中"""
+        graph = self.acquire(timeout)
+        broken = False
+        try:
+            yield graph
+        except CONNECTION_ERRORS:
+            broken = True
+            raise
+        finally:
+            self.release(graph, discard=broken)
+
+    @staticmethod
+    def alive(graph: Graph) -> bool:
+        """空闲较久的会话复用前的连接检测"""
+        try:
+            graph.run("RETURN 1").data()
+            return True
+        except CONNECTION_ERRORS:
+            return False
+
+    @staticmethod
+    def close_session(graph: Graph):
+        try:
+            graph.service.connector.close()
+        except (AttributeError, OSError) + CONNECTION_ERRORS:
+            # 连接已断开时关闭也可能失败，会话直接丢弃即可
+            pass
+
+    def ensure_capacity(self, size: int):
+        """把连接池上限提高到至少size（如并行导入的工作线程数 + 主线程）"""
+        with self.cond:
+            if size > self.max_size:
+                self.max_size = size
+                self.cond.notify_all()
+
+    def stats(self) -> Dict:
+        """连接池的容量、使用率和等待时间统计"""
+        with self.cond:
+            now = time.monotonic()
+            metrics = dict(self.metrics)
+            in_use = len(self.in_use)
+            busy = metrics["busy_seconds"] + sum(now - t for t in self.in_use.values())
+            elapsed = now - self.started_at
+            return {
+                "max_size": self.max_size,
+                "size": self.size,
+                "in_use": in_use,
+                "idle": len(self.idle),
+                "peak_in_use": metrics["peak_in_use"],
+                # 当前使用率，以及从创建至今按时间加权的平均使用率（会话被占用的总时长 / (上限 × 经过时间)）
+                "utilization": in_use / self.max_size if self.max_size else 0.0,
+                "avg_utilization": busy / (self.max_size * elapsed) if self.max_size and elapsed > 0 else 0.0,
+                "acquired": metrics["acquired"],
+                "waited": metrics["waited"],
+                "avg_wait_ms": metrics["wait_seconds"] * 1000 / metrics["waited"] if metrics["waited"] else 0.0,
+                "max_wait_ms": metrics["max_wait"] * 1000,
+                "timeouts": metrics["timeouts"],
+                "created": metrics["created"],
+                "discarded": metrics["discarded"],
+            }
+
+    def summary(self) -> str:
+        """一行中文的连接池统计，供导入结束和问答退出时输出"""
+        stats = self.stats()
+        return (f"连接池：上限{stats['max_size']}，已建立{stats['created']}条连接（丢弃{stats['discarded']}条），"
+                f"峰值占用{stats['peak_in_use']}，平均使用率{stats['avg_utilization']:.0%}；"
+                f"取用{stats['acquired']}次，其中等待{stats['waited']}次（平均{stats['avg_wait_ms']:.1f}ms，"
+                f"最长{stats['max_wait_ms']:.1f}ms），超时{stats['timeouts']}次")
+
+    def close(self):
+        """关闭所有空闲会话（使用中的会话归还后由调用方自行关闭）"""
+        with self.cond:
+            idle, self.idle = self.idle, []
+            self.size -= len(idle)
+        for graph, _ in idle:
+            self.close_session(graph)
+
+
+_shared_pool = None
+_shared_lock = threading.Lock()
+
+
+def shared_pool() -> GraphPool:
+    """进程内共享的连接池：首次调用时按Config创建，之后导入和查询都从同一个池取用连接"""
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None:
+            _shared_pool = GraphPool()
+        return _shared_pool
@@ -0,0 +1,91 @@
+import uuid
+from typing import List, Optional
+from py2neo import DatabaseError
+from py2neo.errors import ClientError
+
+# 图谱的约束与索引定义：(名称, 创建语句)，均使用IF NOT EXISTS，重复执行不会报错
+# 唯一性约束覆盖build_graph中所有merge键，约束会同时创建对应的索引
+CONSTRAINTS = [
+    ('article_id', "CREATE CONSTRAINT article_id IF NOT EXISTS FOR (n:Article) REQUIRE n.id IS UNIQUE"),
+    ('journal_name', "CREATE CONSTRAINT journal_name IF NOT EXISTS FOR (n:Journal) REQUIRE n.name IS UNIQUE"),
+    ('author_unique_id', "CREATE CONSTRAINT author_unique_id IF NOT EXISTS FOR (n:Author) REQUIRE n.unique_id IS UNIQUE"),
+]
+# 查询时按名称查找的属性使用普通索引
+INDEXES = [
+    ('author_chinese_name', "CREATE INDEX author_chinese_name IF NOT EXISTS FOR (n:Author) ON (n.chinese_name)"),
+    ('author_english_name', "CREATE INDEX author_english_name IF NOT EXISTS FOR (n:Author) ON (n.english_name)"),
+]
+# 四类分类节点：english_name为merge键（唯一约束），chinese_name为查询键（索引）
+for _label in ['Discipline', 'Topic', 'Method', 'Scenario']:
+    _name = _label.lower()
+    CONSTRAINTS.append((f'{_name}_english_name',
+                        f"CREATE CONSTRAINT {_name}_english_name IF NOT EXISTS "
+                        f"FOR (n:{_label}) REQUIRE n.english_name IS UNIQUE"))
+    INDEXES.append((f'{_name}_chinese_name',
+                    f"CREATE INDEX {_name}_chinese_name IF NOT EXISTS FOR (n:{_label}) ON (n.chinese_name)"))
+
+# 全文索引：{节点标签: (索引名称, 建索引的属性)}，替代查询中无法走索引的 =~ "(?i).*名称.*" 正则扫描
+# 使用cjk分析器，中文按二元组切分、英文按单词切分并忽略大小写
+FULLTEXT_INDEXES = {
+    'Article': ('article_title_fulltext', ['title']),
+    'Journal': ('journal_name_fulltext', ['name']),
+}
+for _label in ['Discipline', 'Topic', 'Method', 'Scenario']:
+    FULLTEXT_INDEXES[_label] = (f'{_label.lower()}_name_fulltext', ['chinese_name', 'english_name'])
+for _label, (_index, _fields) in FULLTEXT_INDEXES.items():
+    _props = ', '.join(f'n.{field}' for field in _fields)
+    INDEXES.append((_index,
+                    f"CREATE FULLTEXT INDEX {_index} IF NOT EXISTS FOR (n:{_label}) ON EACH [{_props}] "
+                    f"OPTIONS {{indexConfig: {{`fulltext.analyzer`: 'cjk'}}}}"))
+
+
+def existing_schema(graph) -> set:
+    """查询数据库中已有的约束和索引名称"""
+    names = {record['name'] for record in graph.run("SHOW CONSTRAINTS YIELD name RETURN name").data()}
+    names.update(record['name'] for record in graph.run("SHOW INDEXES YIELD name RETURN name").data())
+    return names
+
+
+def ensure_schema(graph) -> List[str]:
+    """
+    创建缺失的约束和索引（幂等），在导入数据前调用
+    :param graph: py2neo的Graph连接
+    :return: 本次新增的约束/索引名称列表
+    """
+    before = existing_schema(graph)
+    added = []
+    for name, statement in CONSTRAINTS + INDEXES:
+        if name in before:
+            continue
+        try:
+            graph.run(statement)
+            added.append(name)
+        except (ClientError, DatabaseError) as e:
+            # 已有数据违反唯一性等情况下创建失败，不影响其余约束/索引
+            print(f"创建{name}失败：{str(e)}")
+    if added:
+        print(f"已新增约束/索引：{', '.join(added)}")
+    else:
+        print("约束/索引均已存在，无需新增")
+    return added
+
+
+def write_graph_version(graph) -> str:
+    """每次导入完成后写入新的图谱版本号，查询端据此使结果缓存失效"""
+    version = str(uuid.uuid4())
+    graph.run("MERGE (m:GraphMeta {name: 'graph'}) SET m.version = $version, m.updated_at = datetime()",
+              version=version)
+    return version
+
+
+def read_graph_version(graph) -> Optional[str]:
+    """读取当前图谱版本号，尚未写入过时返回None"""
+    records = graph.run("MATCH (m:GraphMeta {name: 'graph'}) RETURN m.version AS version").data()
+    return records[0]["version"] if records else None
+
+
+# 独立运行：只创建约束和索引，不导入数据
+if __name__ == '__main__':
+    from GraphPool import shared_pool
+    with shared_pool().session() as graph:
+        ensure_schema(graph)
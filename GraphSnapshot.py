@@ -0,0 +1,281 @@
+import os
+import json
+import math
+import mmap
+import time
+import struct
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# 只读图谱快照：导入结束后把问答模板用到的节点属性和关系导出为一个文件，查询时用内存映射直接读取
+# 文件格式：
+#   MAGIC | 头部长度(8字节) | 头部JSON | 各数据段（按8字节对齐的原始数组）
+#   头部记录图谱版本号、各标签节点数和各关系边数，以及每个数据段的 (偏移, 字节数, 类型码)
+# 数据段：
+#   strings.offsets / strings.blob      字符串表：所有属性值去重后的UTF-8拼接及各串的起始偏移，属性中只存字符串编号
+#   {标签}.{属性}                       字符串属性（编号，-1表示null）或数值属性（float64，NaN表示null）
+#   {标签}.{属性}.offsets / .values      列表属性（如关键词），CSR格式
+#   {关系}.out.offsets / .out.targets    出边CSR邻接数组：起点i的终点为 targets[offsets[i]:offsets[i+1]]
+#   {关系}.in.offsets / .in.targets      入边CSR邻接数组
+#   {关系}.out.{属性} / .in.{属性}       与targets对齐的关系属性（int32，-1表示null）
+MAGIC = b"SCHOLARSNAP1\n"
+
+# 快照包含的节点属性：{标签: {属性: 类型}}，类型为 str / float / strlist
+NODE_COLUMNS = {
+    "Author": {"chinese_name": "str", "english_name": "str"},
+    "Article": {"title": "str", "date": "str", "container_title": "str", "abstract": "str", "keywords": "strlist"},
+    "Journal": {"name": "str", "impact_factor": "float"},
+}
+for _label in ['Discipline', 'Topic', 'Method', 'Scenario']:
+    NODE_COLUMNS[_label] = {"chinese_name": "str", "english_name": "str"}
+
+# 快照包含的关系：{关系类型: (起点标签, 终点标签, [关系属性])}
+RELATIONS = {
+    "PUBLISH": ("Author", "Article", []),
+    "BE_PUBLISHED_IN": ("Article", "Journal", []),
+    "BELONG_TO": ("Article", "Discipline", []),
+    "INVOLVE": ("Article", "Topic", []),
+    "USE": ("Article", "Method", []),
+    "APPLY_TO": ("Article", "Scenario", []),
+    "COLLABORATE": ("Author", "Author", ["count", "last_year"]),
+}
+
+
+def csr(size: int, sources: array, targets: array, props: Dict[str, array]) -> Tuple[array, array, Dict[str, array]]:
+    """把边表 (起点, 终点, 属性) 转为CSR：offsets长度为size+1，同一起点的边保持原有顺序"""
+    offsets = array('i', [0]) * (size + 1)
+    for s in sources:
+        offsets[s + 1] += 1
+    for i in range(size):
+        offsets[i + 1] += offsets[i]
+    position = array('i', offsets[:-1])
+    ordered = array('i', [0]) * len(sources)
+    ordered_props = {name: array('i', [0]) * len(sources) for name in props}
+    for k, s in enumerate(sources):
+        i = position[s]
+        position[s] += 1
+        ordered[i] = targets[k]
+        for name, values in props.items():
+            ordered_props[name][i] = values[k]
+    return offsets, ordered, ordered_props
+
+
+class SnapshotWriter:
+    """收集字符串表和各数据段，最后一次写入文件"""
+
+    def __init__(self):
+        self.string_ids = {}
+        self.strings = []
+        self.sections = {}
+
+    def intern(self, value) -> int:
+        if value is None:
+            return -1
+        value = str(value)
+        sid = self.string_ids.get(value)
+        if sid is None:
+            sid = self.string_ids[value] = len(self.strings)
+            self.strings.append(value)
+        return sid
+
+    def add(self, name: str, values: array):
+        self.sections[name] = values
+
+    def write(self, path: str, header: Dict):
+        """先写临时文件再替换，已打开旧快照的进程不受影响"""
+        offsets = array('q', [0])
+        blob = bytearray()
+        for value in self.strings:
+            blob += value.encode('utf-8')
+            offsets.append(len(blob))
+        self.add("strings.offsets", offsets)
+        self.add("strings.blob", array('B', bytes(blob)))
+
+        # 数据段偏移相对于数据区起点（头部之后按8字节对齐的位置）
+        layout = {}
+        position = 0
+        for name, values in self.sections.items():
+            size = len(values) * values.itemsize
+            layout[name] = [position, size, values.typecode]
+            position += size + (-size % 8)
+        header_bytes = json.dumps(dict(header, sections=layout), ensure_ascii=False).encode('utf-8')
+
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack('<q', len(header_bytes)))
+            f.write(header_bytes)
+            f.write(b'\0' * (-(len(MAGIC) + 8 + len(header_bytes)) % 8))
+            for name, values in self.sections.items():
+                data = values.tobytes()
+                f.write(data)
+                f.write(b'\0' * (-len(data) % 8))
+        os.replace(tmp_path, path)
+
+
+def export_snapshot(graph, path: str, version: Optional[str] = None) -> Dict[str, int]:
+    """
+    从Neo4j导出快照（在导入结束、写入图谱版本号之后调用）
+    :param graph: py2neo的Graph连接
+    :param version: 图谱版本号，查询端据此判断快照是否与图谱一致
+    :return: 各标签节点数和各关系边数
+    """
+    start = time.time()
+    writer = SnapshotWriter()
+    node_index = {}  # 标签 -> {Neo4j内部id: 快照中的节点序号}
+    counts = {}
+    for label, columns in NODE_COLUMNS.items():
+        fields = ", ".join(f"n.{prop} AS {prop}" for prop in columns)
+        index = node_index[label] = {}
+        values = {prop: array('i') if kind != "float" else array('d') for prop, kind in columns.items()}
+        list_offsets = {prop: array('i', [0]) for prop, kind in columns.items() if kind == "strlist"}
+        for record in graph.run(f"MATCH (n:{label}) RETURN id(n) AS id, {fields}"):
+            index[record["id"]] = len(index)
+            for prop, kind in columns.items():
+                value = record[prop]
+                if kind == "str":
+                    values[prop].append(writer.intern(value))
+                elif kind == "float":
+                    values[prop].append(to_float(value))
+                else:
+                    values[prop].extend(writer.intern(v) for v in (value or []))
+                    list_offsets[prop].append(len(values[prop]))
+        for prop, kind in columns.items():
+            if kind == "strlist":
+                writer.add(f"{label}.{prop}.offsets", list_offsets[prop])
+                writer.add(f"{label}.{prop}.values", values[prop])
+            else:
+                writer.add(f"{label}.{prop}", values[prop])
+        counts[label] = len(index)
+
+    for rel, (src, dst, props) in RELATIONS.items():
+        fields = "".join(f", r.{prop} AS {prop}" for prop in props)
+        sources, targets = array('i'), array('i')
+        prop_values = {prop: array('i') for prop in props}
+        for record in graph.run(f"MATCH (a:{src})-[r:{rel}]->(b:{dst}) RETURN id(a) AS s, id(b) AS t{fields}"):
+            s, t = node_index[src].get(record["s"]), node_index[dst].get(record["t"])
+            if s is None or t is None:
+                continue
+            sources.append(s)
+            targets.append(t)
+            for prop in props:
+                value = record[prop]
+                prop_values[prop].append(-1 if value is None else int(value))
+        for direction, (a, b, size) in {"out": (sources, targets, counts[src]),
+                                        "in": (targets, sources, counts[dst])}.items():
+            offsets, ordered, ordered_props = csr(size, a, b, prop_values)
+            writer.add(f"{rel}.{direction}.offsets", offsets)
+            writer.add(f"{rel}.{direction}.targets", ordered)
+            for prop, values in ordered_props.items():
+                writer.add(f"{rel}.{direction}.{prop}", values)
+        counts[rel] = len(sources)
+
+    writer.write(path, {"version": version, "created_at": time.time(), "counts": counts})
+    size = os.path.getsize(path)
+    print(f"图谱快照已导出：{path}（{size / 1024 / 1024:.1f}MB，{len(writer.strings)}个字符串，耗时{time.time() - start:.1f}秒）")
+    return counts
+
+
+def to_float(value) -> float:
+    try:
+        return float(value) if value is not None else math.nan
+    except (TypeError, ValueError):
+        return math.nan
+
+
+# 只读快照：数据段通过内存映射按需读取，多个进程打开同一快照时共享操作系统的页缓存
+class GraphSnapshot:
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mm[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"不是图谱快照文件：{path}")
+        (length,) = struct.unpack_from('<q', self.mm, len(MAGIC))
+        start = len(MAGIC) + 8
+        self.header = json.loads(bytes(self.mm[start:start + length]).decode('utf-8'))
+        self.data_start = start + length + (-(start + length) % 8)
+        self.version = self.header.get("version")
+        self.counts = self.header["counts"]
+        self.buffer = memoryview(self.mm)
+        self.views = {}
+        self.string_offsets = self.array("strings.offsets")
+        self.blob = self.array("strings.blob")
+
+    def array(self, name: str) -> memoryview:
+        """按名称取数据段（只读memoryview，元素类型与写入时的array相同）"""
+        view = self.views.get(name)
+        if view is None:
+            offset, size, typecode = self.header["sections"][name]
+            offset += self.data_start
+            view = self.views[name] = self.buffer[offset:offset + size].cast(typecode)
+        return view
+
+    def string(self, sid: int) -> Optional[str]:
+        if sid < 0:
+            return None
+        return bytes(self.blob[self.string_offsets[sid]:self.string_offsets[sid + 1]]).decode('utf-8')
+
+    def size(self, label: str) -> int:
+        return self.counts[label]
+
+    def value(self, label: str, prop: str, node: int):
+        """节点属性值，类型与Neo4j中的一致（字符串、浮点数、字符串列表或None）"""
+        kind = NODE_COLUMNS[label][prop]
+        if kind == "str":
+            return self.string(self.array(f"{label}.{prop}")[node])
+        if kind == "float":
+            number = self.array(f"{label}.{prop}")[node]
+            return None if math.isnan(number) else number
+        offsets = self.array(f"{label}.{prop}.offsets")
+        values = self.array(f"{label}.{prop}.values")
+        return [self.string(sid) for sid in values[offsets[node]:offsets[node + 1]]]
+
+    def column(self, label: str, prop: str) -> Iterator[Optional[str]]:
+        """逐个节点产出字符串属性"""
+        ids = self.array(f"{label}.{prop}")
+        for sid in ids:
+            yield self.string(sid)
+
+    def neighbors(self, rel: str, node: int, direction: str = "out") -> memoryview:
+        """节点沿某关系的邻居（direction为out时取终点，为in时取起点）"""
+        offsets = self.array(f"{rel}.{direction}.offsets")
+        return self.array(f"{rel}.{direction}.targets")[offsets[node]:offsets[node + 1]]
+
+    def edges(self, rel: str, node: int, direction: str = "out") -> Iterator[Tuple[int, Dict]]:
+        """节点沿某关系的 (邻居, 关系属性)"""
+        offsets = self.array(f"{rel}.{direction}.offsets")
+        targets = self.array(f"{rel}.{direction}.targets")
+        props = {prop: self.array(f"{rel}.{direction}.{prop}") for prop in RELATIONS[rel][2]}
+        for i in range(offsets[node], offsets[node + 1]):
+            yield targets[i], {prop: (None if values[i] < 0 else values[i]) for prop, values in props.items()}
+
+    def names(self, label: str) -> List[Tuple[Optional[str], Optional[str]]]:
+        """某标签全部节点的 (中文名, 英文名)；期刊只有名称"""
+        if label == "Journal":
+            return [(name, None) for name in self.column(label, "name")]
+        return list(zip(self.column(label, "chinese_name"), self.column(label, "english_name")))
+
+    def close(self):
+        for view in self.views.values():
+            view.release()
+        self.views = {}
+        if getattr(self, "buffer", None) is not None:
+            self.buffer.release()
+            self.buffer = None
+        self.mm.close()
+        self.file.close()
+
+
+# 独立运行：从当前图谱导出快照，不重新导入数据
+if __name__ == '__main__':
+    import argparse
+    from GraphPool import shared_pool
+    from GraphSchema import read_graph_version
+    parser = argparse.ArgumentParser(description='从Neo4j导出只读图谱快照')
+    parser.add_argument('path', nargs='?', default='data/graph.snapshot', help='快照文件路径')
+    args = parser.parse_args()
+    with shared_pool().session() as graph:
+        export_snapshot(graph, os.path.join(os.path.dirname(os.path.abspath(__file__)), args.path),
+                        read_graph_version(graph))
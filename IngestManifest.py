@@ -0,0 +1,77 @@
+import os
+import json
+import sqlite3
+import hashlib
+from typing import Dict, Iterable, List
+
+
+def article_hash(article: Dict) -> str:
+    """论文内容哈希：字段排序后序列化，字段顺序不同但内容相同的论文哈希一致"""
+    text = json.dumps(article, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+# 增量导入清单：记录每篇论文已写入图谱的内容哈希，以及未完成导入的断点位置
+class IngestManifest:
+    # SQLite单条语句中参数个数有上限，批量查询时分段进行
+    LOOKUP_CHUNK = 500
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS articles (id TEXT PRIMARY KEY, hash TEXT NOT NULL)")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS checkpoint (
+                data_path TEXT PRIMARY KEY,
+                size INTEGER, mtime REAL, position INTEGER
+            )
+        """)
+        self.conn.commit()
+
+    def lookup(self, ids: Iterable[str]) -> Dict[str, str]:
+        """批量查询论文已记录的哈希，返回 {id: hash}（未记录的id不在结果中）"""
+        ids = list(ids)
+        found = {}
+        for i in range(0, len(ids), self.LOOKUP_CHUNK):
+            chunk = ids[i:i + self.LOOKUP_CHUNK]
+            marks = ','.join('?' * len(chunk))
+            found.update(self.conn.execute(f"SELECT id, hash FROM articles WHERE id IN ({marks})", chunk))
+        return found
+
+    def resume_position(self, data_path: str) -> int:
+        """上次中断时已提交的论文数；数据文件大小或修改时间变化时断点失效，从头开始"""
+        row = self.conn.execute("SELECT size, mtime, position FROM checkpoint WHERE data_path = ?",
+                                (os.path.abspath(data_path),)).fetchone()
+        if not row:
+            return 0
+        st = os.stat(data_path)
+        if row[0] != st.st_size or row[1] != st.st_mtime:
+            return 0
+        return row[2]
+
+    def commit(self, data_path: str, hashes: List[tuple], position: int):
+        """图谱事务提交后调用：在同一个SQLite事务中记录本批论文哈希和断点位置"""
+        st = os.stat(data_path)
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO articles (id, hash) VALUES (?, ?)", hashes)
+            self.conn.execute("INSERT OR REPLACE INTO checkpoint (data_path, size, mtime, position) VALUES (?, ?, ?, ?)",
+                              (os.path.abspath(data_path), st.st_size, st.st_mtime, position))
+
+    def record(self, hashes: List[tuple]):
+        """记录一批论文的哈希（不涉及断点），用于全量导入后写入全部论文"""
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO articles (id, hash) VALUES (?, ?)", hashes)
+
+    def finish(self, data_path: str):
+        """导入完整结束后清除断点"""
+        with self.conn:
+            self.conn.execute("DELETE FROM checkpoint WHERE data_path = ?", (os.path.abspath(data_path),))
+
+    def reset(self):
+        """图谱被清空重建时同步清空清单"""
+        with self.conn:
+            self.conn.execute("DELETE FROM articles")
+            self.conn.execute("DELETE FROM checkpoint")
+
+    def close(self):
+        self.conn.close()
@@ -1,305 +1,433 @@
-import re
-from py2neo import Graph, DatabaseError
-from typing import List, Dict, Optional
-from QuestionAnalyzer import Config  # 导入配置类
-
-# Cypher 查询生成类
-class CypherGenerator:
-    def __init__(self):
-        # 定义学术领域的问句疑问词
-        self.collab_qwds = ['合作', '协作', '共同研究', '联合发表', '合著', '合作者', '合作伙伴']
-        self.citation_qwds = ['引用', '被引', '参考文献', '参考', '引文', '引用量']
-        self.impact_qwds = ['影响', '作用', '贡献', '重要性', '意义', '价值', '影响力']
-        self.compare_qwds = ['比较', '对比', '相比', '差异', '区别', '不同点', '异同']
-        self.paper_qwds = ['论文', '文章', '发表', '成果', '出版物', '文献', '著作']
-        self.author_qwds = ['作者', '学者', '研究者', '教授', '专家', '科学家', '撰稿人']
-        self.journal_qwds = ['期刊', '杂志', '学报', '会议', '出版物', '刊载', '发表刊物']
-        self.discipline_qwds = ['学科', '领域', '专业', '方向', '分支', '二级学科', '研究领域']
-        self.method_qwds = ['方法', '技术', '算法', '模型', '框架', '方法论', '分析技术', '计算方法']
-        self.scenario_qwds = ['应用', '场景', '实践', '实施', '使用', '应用领域', '使用场景']
-        self.topic_qwds = ['主题', '研究方向', '研究主题', '研究重点', '研究内容', '研究课题']
-        self.keyword_qwds = ['关键词', '术语', '标签', '核心词汇', '关键术语']
-        self.time_qwds = ['时间', '年份', '年代', '何时', '发表时间', '出版时间', '日期']
-        self.factor_qwds = ['影响因子', 'IF', 'JIF', '期刊影响因子', 'citation impact', '期刊评价']
-        self.abstract_qwds = ['摘要', '概要', '内容摘要', '主要内容', 'abstract', '简介', '概述', '总结', '内容简述']
-
-    def check_words(self, wds, sent):
-        """检查特征词是否在意图中出现"""
-        for wd in wds:
-            if wd in sent:
-                return True
-        return False
-
-    def generate_for_intent(self, entity: Dict, intent: str, question: str) -> Optional[str]:
-        """为单个意图生成Cypher查询"""
-        SUPPORTED_ENTITY_TYPES = [
-            "Author", "Article", "Topic", "Journal",
-            "Discipline", "Method", "Scenario"
-        ]
-
-        if entity["type"] not in SUPPORTED_ENTITY_TYPES:
-            return None
-
-        entity_name = entity["name"]
-        entity_type = entity["type"]
-
-        # 使用问句分类机制增强意图识别
-        if entity_type == "Author":
-            # 研究主题分析
-            if self.check_words(self.topic_qwds, intent):
-                return f"""
-                           MATCH (a:Author)-[:PUBLISH]->(p:Article)-[:INVOLVE]->(d:Topic)
-                           WHERE a.chinese_name = "{entity_name}" OR a.english_name = "{entity_name}"
-                           RETURN p.date AS 年份, count(p) AS 发表数量
-                           ORDER BY p.date
-                           """
-            # 研究领域查询（二级学科）
-            elif self.check_words(self.discipline_qwds, intent):
-                return f"""
-                           MATCH (a:Author)-[:PUBLISH]->(p:Article)-[:BELONG_TO]->(d:Discipline)
-                           WHERE a.chinese_name = "{entity_name}" OR a.english_name = "{entity_name}"
-                           RETURN DISTINCT d.chinese_name AS 二级学科, d.english_name AS 英文领域
-                           """
-            # 发表期刊查询
-            elif self.check_words(self.journal_qwds, intent):
-                return f"""
-                           MATCH (a:Author)-[:PUBLISH]->(p:Article)-[:BE_PUBLISHED_IN]->(j:Journal)
-                           WHERE a.chinese_name = "{entity_name}" OR a.english_name = "{entity_name}"
-                           RETURN DISTINCT j.name AS 期刊名称, j.impact_factor AS 影响因子
-                           ORDER BY j.impact_factor DESC
-                           """
-            # 研究方法查询
-            elif self.check_words(self.method_qwds, intent):
-                return f"""
-                           MATCH (a:Author)-[:PUBLISH]->(p:Article)-[:USE]->(m:Method)
-                           WHERE a.chinese_name = "{entity_name}" OR a.english_name = "{entity_name}"
-                           RETURN DISTINCT m.chinese_name AS 方法技术
-                           """
-            # 应用场景查询
-            elif self.check_words(self.scenario_qwds, intent):
-                return f"""
-                           MATCH (a:Author)-[:PUBLISH]->(p:Article)-[:APPLY_TO]->(s:Scenario)
-                           WHERE a.chinese_name = "{entity_name}" OR a.english_name = "{entity_name}"
-                           RETURN DISTINCT s.chinese_name AS 应用场景
-                           """
-            # 论文列表查询
-            elif self.check_words(self.paper_qwds, intent):
-                return f"""
-                           MATCH (a:Author)-[:PUBLISH]->(p:Article)
-                           WHERE a.chinese_name = "{entity_name}" OR a.english_name = "{entity_name}"
-                           RETURN p.title AS 论文标题, p.date AS 发表年份, p.container_title AS 期刊名称
-                           ORDER BY p.date DESC
-                           """
-            # 合作学者查询
-            elif self.check_words(self.collab_qwds, intent):
-                return f"""
-                           MATCH (a:Author)-[:COLLABORATE]-(c:Author)
-                           WHERE a.chinese_name = "{entity_name}" OR a.english_name = "{entity_name}"
-                           RETURN c.chinese_name AS 中文名, c.english_name AS 英文名
-                           """
-
-        elif entity_type == "Article":
-            # 摘要查询（根据论文属性）
-            if self.check_words(self.abstract_qwds, intent):  # 正则表达式(?i)忽略大小写，.*匹配任意数量的任意字符
-                return f"""
-                           MATCH (p:Article)
-                           WHERE p.title =~ "(?i).*{re.escape(entity_name)}.*" 
-                           RETURN p.title AS 论文标题, p.abstract AS 摘要
-                           LIMIT 1
-                           """
-            # 作者查询
-            elif self.check_words(self.author_qwds, intent):
-                return f"""
-                           MATCH (p:Article)<-[:PUBLISH]-(a:Author)
-                           WHERE p.title =~ "(?i).*{re.escape(entity_name)}.*"
-                           RETURN a.chinese_name AS 中文名, a.english_name AS 英文名
-                           """
-            # 发表期刊查询
-            elif self.check_words(self.journal_qwds, intent):
-                return f"""
-                           MATCH (p:Article)-[:BE_PUBLISHED_IN]->(j:Journal)
-                           WHERE p.title CONTAINS "{entity_name}"
-                           RETURN j.name AS 期刊名称, j.impact_factor AS 影响因子, p.date AS 发表年份
-                           """
-            # 发表时间查询
-            elif self.check_words(self.time_qwds, intent):
-                return f"""
-                           MATCH (p:Article)
-                           WHERE p.title =~ "(?i).*{re.escape(entity_name)}.*"
-                           RETURN p.date AS 发表年份
-                           """
-            # 关键词查询（根据论文属性）
-            elif self.check_words(self.keyword_qwds, intent):
-                return f"""
-                           MATCH (p:Article)
-                           WHERE p.title =~ "(?i).*{re.escape(entity_name)}.*"
-                           RETURN p.keywords AS 关键词
-                           """
-            # 研究领域查询（二级学科）
-            elif self.check_words(self.discipline_qwds, intent):
-                return f"""
-                           MATCH (p:Article)-[:BELONG_TO]->(d:Discipline)
-                           WHERE p.title =~ "(?i).*{re.escape(entity_name)}.*"
-                           RETURN d.chinese_name AS 二级学科
-                           """
-            # 研究主题查询（根据关系定义）
-            elif self.check_words(self.topic_qwds, intent):
-                return f"""
-                           MATCH (p:Article)-[:INVOLVE]->(t:Topic)
-                           WHERE p.title =~ "(?i).*{re.escape(entity_name)}.*"
-                           RETURN t.chinese_name AS 研究主题
-                           """
-            # 方法技术查询（根据关系定义）
-            elif self.check_words(self.method_qwds, intent):
-                return f"""
-                           MATCH (p:Article)-[:USE]->(m:Method)
-                           WHERE p.title =~ "(?i).*{re.escape(entity_name)}.*"
-                           RETURN m.chinese_name AS 方法技术
-                           """
-            # 应用场景查询（根据关系定义）
-            elif self.check_words(self.scenario_qwds, intent):
-                return f"""
-                           MATCH (p:Article)-[:APPLY_TO]->(s:Scenario)
-                           WHERE p.title =~ "(?i).*{re.escape(entity_name)}.*"
-                           RETURN s.chinese_name AS 应用场景
-                           """
-
-        elif entity_type == "Topic":
-            # 相关论文查询
-            if self.check_words(self.paper_qwds, intent):
-                return f"""
-                           MATCH (t:Topic)<-[:INVOLVE]-(p:Article)
-                           WHERE t.chinese_name =~ "(?i).*{re.escape(entity_name)}.*" OR t.english_name =~ "(?i).*{re.escape(entity_name)}.*"
-                           RETURN p.title AS 论文标题, p.date AS 发表年份
-                           ORDER BY p.date DESC
-                           """
-            # 相关学者查询
-            elif self.check_words(self.author_qwds, intent):
-                return f"""
-                           MATCH (t:Topic)<-[:INVOLVE]-(p:Article)<-[:PUBLISH]-(a:Author)
-                           WHERE t.chinese_name =~ "(?i).*{re.escape(entity_name)}.*" OR t.english_name =~ "(?i).*{re.escape(entity_name)}.*"
-                           RETURN DISTINCT a.chinese_name AS 中文名, a.english_name AS 英文名
-                           """
-
-        elif entity_type == "Journal":
-            # 发表论文查询
-            if self.check_words(self.paper_qwds, intent):
-                return f"""
-                           MATCH (j:Journal)<-[:BE_PUBLISHED_IN]-(p:Article)
-                           WHERE j.name =~ "(?i).*{re.escape(entity_name)}.*"
-                           RETURN p.title AS 论文标题, p.date AS 发表年份
-                           ORDER BY p.date DESC
-                           """
-            # 影响因子查询（根据期刊属性）
-            elif self.check_words(self.factor_qwds, intent):
-                return f"""
-                           MATCH (j:Journal)
-                           WHERE j.name =~ "(?i).*{re.escape(entity_name)}.*"
-                           RETURN j.impact_factor AS 影响因子
-                           """
-
-        elif entity_type == "Discipline":
-            # 相关论文查询
-            if self.check_words(self.paper_qwds, intent):
-                return f"""
-                           MATCH (d:Discipline)<-[:BELONG_TO]-(p:Article)
-                           WHERE d.chinese_name =~ "(?i).*{re.escape(entity_name)}.*" OR d.english_name =~ "(?i).*{re.escape(entity_name)}.*"
-                           RETURN p.title AS 论文标题, p.date AS 发表年份
-                           ORDER BY p.date DESC
-                           """
-            # 相关学者查询
-            elif self.check_words(self.author_qwds, intent):
-                return f"""
-                           MATCH (d:Discipline)<-[:BELONG_TO]-(p:Article)<-[:PUBLISH]-(a:Author)
-                           WHERE d.chinese_name =~ "(?i).*{re.escape(entity_name)}.*" OR d.english_name =~ "(?i).*{re.escape(entity_name)}.*"
-                           RETURN DISTINCT a.chinese_name AS 中文名, a.english_name AS 英文名
-                           """
-
-        elif entity_type == "Method":
-            # 应用学者查询
-            if self.check_words(self.author_qwds, intent):
-                return f"""
-                           MATCH (m:Method)<-[:USE]-(p:Article)<-[:PUBLISH]-(a:Author)
-                           WHERE m.chinese_name =~ "(?i).*{re.escape(entity_name)}.*" OR m.english_name =~ "(?i).*{re.escape(entity_name)}.*"
-                           RETURN DISTINCT a.chinese_name AS 中文名, a.english_name AS 英文名
-                           """
-            # 相关论文查询
-            elif self.check_words(self.paper_qwds, intent):
-                return f"""
-                           MATCH (m:Method)<-[:USE]-(p:Article)
-                           WHERE m.chinese_name =~ "(?i).*{re.escape(entity_name)}.*" OR m.english_name =~ "(?i).*{re.escape(entity_name)}.*"
-                           RETURN p.title AS 论文标题, p.date AS 发表年份
-                           ORDER BY p.date DESC
-                           """
-
-        elif entity_type == "Scenario":
-            # 相关论文查询
-            if self.check_words(self.paper_qwds, intent):
-                return f"""
-                           MATCH (s:Scenario)<-[:APPLY_TO]-(p:Article)
-                           WHERE s.chinese_name =~ "(?i).*{re.escape(entity_name)}.*" OR s.english_name =~ "(?i).*{re.escape(entity_name)}.*"
-                           RETURN p.title AS 论文标题, p.date AS 发表年份
-                           ORDER BY p.date DESC
-                           """
-            # 应用学者查询
-            elif self.check_words(self.author_qwds, intent):
-                return f"""
-                           MATCH (s:Scenario)<-[:APPLY_TO]-(p:Article)<-[:PUBLISH]-(a:Author)
-                           WHERE s.chinese_name =~ "(?i).*{re.escape(entity_name)}.*" OR s.english_name =~ "(?i).*{re.escape(entity_name)}.*"
-                           RETURN DISTINCT a.chinese_name AS 中文名, a.english_name AS 英文名
-                           """
-
-        return None
-
-    def generate(self, entities: List[Dict], intents: List[Dict], question: str) -> List[Dict]:
-        """为多个意图生成多个Cypher查询"""
-        results = []
-        entity_map = {e["name"]: e for e in entities}
-
-        for intent_info in intents:
-            entity_name = intent_info.get("entity")
-            intent_text = intent_info.get("intent")
-
-            if not entity_name or not intent_text:
-                continue
-
-            entity = entity_map.get(entity_name)
-            if not entity:
-                continue
-
-            cypher = self.generate_for_intent(entity, intent_text, question)
-            if cypher:
-                results.append({
-                    "entity": entity,
-                    "intent": intent_text,
-                    "cypher": cypher
-                })
-
-        return results
-
-
-# 知识图谱查询执行器
-class KGQueryExecutor:
-    def __init__(self):
-        self.graph = Graph(
-            Config.NEO4J_URI,
-            auth=(Config.NEO4J_USER, Config.NEO4J_PASSWORD)
-        )
-
-    def execute(self, cyphers: List[Dict]) -> List[Dict]:
-        """执行多个Cypher查询并返回结果"""
-        results = []
-
-        for query_info in cyphers:
-            try:
-                cypher = query_info["cypher"]
-                result = self.graph.run(cypher).data()
-                results.append({
-                    "entity": query_info["entity"],
-                    "intent": query_info["intent"],
-                    "results": result
-                })
-            except DatabaseError as e:
-                print(f"Cypher执行错误：{str(e)}，查询：{query_info['cypher']}")
-
-        return results
+import os
+import re
+import json
+import time
+import asyncio
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from py2neo.errors import ClientError
+from typing import List, Dict, Iterator, Optional
+from QuestionAnalyzer import Config  # 导入配置类
+from CypherTemplates import TEMPLATES, TEMPLATES_BY_ID, DISPATCH_PRIORITY
+from KeywordMatcher import AhoCorasick
+from GraphSchema import read_graph_version
+from QueryCache import QueryCache
+from SnapshotQuery import SnapshotQueryEngine
+from GraphPool import GraphPool, shared_pool
+from Tracing import tracer
+
+
+class QueryTimeout(Exception):
+    """查询超过截止时间：工作线程停止读取结果并归还连接"""
+
+
+def lucene_phrase(text: str) -> str:
+    """把实体名称转换为全文索引的短语查询，转义Lucene短语中的特殊字符"""
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+def row_cap(template: Dict) -> int:
+    """单个查询最多读取的行数：带LIMIT的模板为行数上限加1（用于判断是否截断），其余模板为统一上限"""
+    if "limit" in template:
+        return template["limit"] + 1
+    return Config.QUERY_MAX_ROWS
+
+
+# Cypher 查询生成类
+class CypherGenerator:
+    # 意图文本 -> 命中类别 的缓存条目上限
+    CATEGORY_CACHE_SIZE = 4096
+
+    def __init__(self):
+        # 定义学术领域的问句疑问词
+        self.collab_qwds = ['合作', '协作', '共同研究', '联合发表', '合著', '合作者', '合作伙伴']
+        self.citation_qwds = ['引用', '被引', '参考文献', '参考', '引文', '引用量']
+        self.impact_qwds = ['影响', '作用', '贡献', '重要性', '意义', '价值', '影响力']
+        self.compare_qwds = ['比较', '对比', '相比', '差异', '区别', '不同点', '异同']
+        self.paper_qwds = ['论文', '文章', '发表', '成果', '出版物', '文献', '著作']
+        self.author_qwds = ['作者', '学者', '研究者', '教授', '专家', '科学家', '撰稿人']
+        self.journal_qwds = ['期刊', '杂志', '学报', '会议', '出版物', '刊载', '发表刊物']
+        self.discipline_qwds = ['学科', '领域', '专业', '方向', '分支', '二级学科', '研究领域']
+        self.method_qwds = ['方法', '技术', '算法', '模型', '框架', '方法论', '分析技术', '计算方法']
+        self.scenario_qwds = ['应用', '场景', '实践', '实施', '使用', '应用领域', '使用场景']
+        self.topic_qwds = ['主题', '研究方向', '研究主题', '研究重点', '研究内容', '研究课题']
+        self.keyword_qwds = ['关键词', '术语', '标签', '核心词汇', '关键术语']
+        self.time_qwds = ['时间', '年份', '年代', '何时', '发表时间', '出版时间', '日期']
+        self.factor_qwds = ['影响因子', 'IF', 'JIF', '期刊影响因子', 'citation impact', '期刊评价']
+        self.abstract_qwds = ['摘要', '概要', '内容摘要', '主要内容', 'abstract', '简介', '概述', '总结', '内容简述']
+        # 全文索引按相关度返回的实体节点数上限：论文和期刊通常指向唯一对象，分类名称可能对应多个相近节点
+        self.fulltext_top_k = {'Article': 1, 'Journal': 1, 'Topic': 3, 'Discipline': 3, 'Method': 3, 'Scenario': 3}
+
+        # 把全部关键词列表编译成一个多模式匹配自动机，一次扫描即可得到意图文本命中的所有类别
+        self.keyword_matcher = AhoCorasick()
+        for category, words in self.keyword_lists().items():
+            for word in words:
+                self.keyword_matcher.add(word, category)
+        self.keyword_matcher.build()
+        self.category_cache = {}
+        # 预先计算 实体类型 -> [(意图类别, 查询模板), ...]，按优先级排列
+        self.dispatch = {
+            entity_type: [(category, TEMPLATES[(entity_type, category)]) for category in categories]
+            for entity_type, categories in DISPATCH_PRIORITY.items()
+        }
+
+    def keyword_lists(self) -> Dict[str, List[str]]:
+        """全部问句疑问词列表：{类别: 关键词列表}，类别名取自属性名（如collab_qwds -> collab）"""
+        return {name[:-len('_qwds')]: words for name, words in vars(self).items() if name.endswith('_qwds')}
+
+    def check_words(self, wds, sent):
+        """检查特征词是否在意图中出现"""
+        for wd in wds:
+            if wd in sent:
+                return True
+        return False
+
+    def match_categories(self, intent: str) -> frozenset:
+        """一次扫描意图文本，返回命中的全部关键词类别；大模型返回的意图文本高度重复，结果按文本缓存"""
+        categories = self.category_cache.get(intent)
+        if categories is None:
+            categories = frozenset(self.keyword_matcher.find_values(intent))
+            if len(self.category_cache) >= self.CATEGORY_CACHE_SIZE:
+                self.category_cache.clear()
+            self.category_cache[intent] = categories
+        return categories
+
+    def build_query(self, template: Dict, entity_type: str, entity_name: str) -> Dict:
+        """
+        根据查询模板生成查询参数
+        :return: {"template": 模板id, "params": 查询参数}
+        """
+        params = {"name": entity_name}
+        if "$query" in template["cypher"]:
+            # 以全文索引为入口的模板需要Lucene短语、相关度截断数量和后备正则
+            params.update({
+                "query": lucene_phrase(entity_name),
+                "top_k": self.fulltext_top_k[entity_type],
+                "pattern": f"(?i).*{re.escape(entity_name)}.*",
+            })
+        if "limit" in template:
+            # 多取一行，执行器据此判断结果是否被截断
+            params["limit"] = template["limit"] + 1
+        return {"template": template["id"], "params": params}
+
+    def generate_for_intent(self, entity: Dict, intent: str, question: str) -> Optional[Dict]:
+        """为单个意图选择查询模板：按实体类型的分派表依优先级取第一个命中的意图类别，返回 {"template": 模板id, "params": 查询参数}"""
+        candidates = self.dispatch.get(entity["type"])
+        if not candidates:
+            return None
+
+        categories = self.match_categories(intent)
+        for category, template in candidates:
+            if category in categories:
+                return self.build_query(template, entity["type"], entity["name"])
+        return None
+
+    def generate(self, entities: List[Dict], intents: List[Dict], question: str) -> List[Dict]:
+        """为多个意图生成多个Cypher查询"""
+        results = []
+        entity_map = {e["name"]: e for e in entities}
+
+        for intent_info in intents:
+            entity_name = intent_info.get("entity")
+            intent_text = intent_info.get("intent")
+
+            if not entity_name or not intent_text:
+                continue
+
+            entity = entity_map.get(entity_name)
+            if not entity:
+                continue
+
+            query = self.generate_for_intent(entity, intent_text, question)
+            if query:
+                results.append({
+                    "entity": entity,
+                    "intent": intent_text,
+                    **query
+                })
+
+        return results
+
+
+# 知识图谱查询执行器
+class KGQueryExecutor:
+    def __init__(self, cache_size: int = Config.QUERY_CACHE_SIZE, cache_ttl: Optional[float] = Config.QUERY_CACHE_TTL,
+                 parallelism: int = Config.QUERY_PARALLELISM, timeout: float = Config.QUERY_TIMEOUT,
+                 backend: str = Config.QUERY_BACKEND, graph_pool: Optional[GraphPool] = None):
+        """
+        :param parallelism: 多意图查询的最大并发数（1表示逐个执行）
+        :param timeout: 单个查询从开始执行起的超时时间（秒）
+        :param backend: "neo4j"为查询Neo4j；"snapshot"为查询导入时导出的只读图谱快照（不连接Neo4j）
+        :param graph_pool: Neo4j连接池，默认为进程内共享的连接池
+        """
+        self.snapshot = None
+        self.graph_pool = None
+        if backend == "snapshot":
+            self.snapshot = SnapshotQueryEngine.open(self.snapshot_path())
+        else:
+            self.graph_pool = graph_pool or shared_pool()
+        # 查询结果缓存，图谱重新导入（版本号变化）后自动失效
+        self.cache = QueryCache(cache_size, cache_ttl) if cache_size > 0 else None
+        self.graph_version = None
+        self.version_checked_at = None
+        # 读取版本号（及切换快照）只由一个线程进行；取用和切换快照查询引擎时加锁，维护各引擎正在执行的查询数
+        self.version_lock = threading.Lock()
+        self.snapshot_lock = threading.Lock()
+        # 并发执行：工作线程数即并发上限，每个查询从连接池中取用独立的连接
+        self.parallelism = parallelism
+        self.timeout = timeout
+        self.pool = ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix='kg-query') if parallelism > 1 else None
+        # 结果行统计：从游标读取的行数、保留的行数、保留结果的JSON字节数
+        self.stats_lock = threading.Lock()
+        self.totals = {"queries": 0, "fetched": 0, "kept": 0, "bytes": 0}
+
+    @staticmethod
+    def snapshot_path() -> str:
+        cur_dir = os.path.dirname(os.path.abspath(__file__))
+        return os.path.join(cur_dir, Config.SNAPSHOT_PATH)
+
+    def execute(self, cyphers: List[Dict]) -> List[Dict]:
+        """执行多个Cypher查询并返回结果：多个查询并发执行，结果保持原有意图顺序，失败或超时的查询结果为空"""
+        # 读取版本号失败时不影响查询（沿用上次的版本号）
+        if self.cache is not None:
+            self.check_version()
+        if self.pool is None or len(cyphers) <= 1:
+            return [self.execute_one(query_info) for query_info in cyphers]
+
+        # 超时后不再等待该查询：尚未开始执行的查询直接取消；已在执行的查询无法从客户端中断（future.cancel()对其无效），
+        # 由工作线程在截止时间后停止读取结果、归还连接，服务端仍在执行的部分受Neo4j的事务超时配置约束
+        started = [None] * len(cyphers)
+        futures = [self.pool.submit(self.execute_one, query_info, started, i) for i, query_info in enumerate(cyphers)]
+        results = []
+        for i, (query_info, future) in enumerate(zip(cyphers, futures)):
+            try:
+                results.append(self.wait_result(future, started, i))
+            except FuturesTimeout:
+                future.cancel()
+                print(f"Cypher执行超时（{self.timeout}秒），模板：{query_info['template']}，参数：{query_info['params']}")
+                results.append(self.slot(query_info, [], "查询超时"))
+            except Exception as e:
+                print(f"Cypher执行错误：{str(e)}，模板：{query_info['template']}，参数：{query_info['params']}")
+                results.append(self.slot(query_info, [], str(e)))
+        return results
+
+    async def execute_async(self, cyphers: List[Dict]) -> List[Dict]:
+        """execute的异步版本：py2neo只提供阻塞接口，查询放到工作线程执行，不阻塞事件循环"""
+        return await asyncio.to_thread(self.execute, cyphers)
+
+    def wait_result(self, future, started: List, index: int) -> Dict:
+        """等待一个查询完成：从该查询开始执行时计时；排队超过超时时间仍未开始执行的同样视为超时"""
+        limit = time.monotonic() + self.timeout
+        while True:
+            try:
+                return future.result(timeout=max(limit - time.monotonic(), 0))
+            except FuturesTimeout:
+                start = started[index]
+                if start is not None and start + self.timeout > time.monotonic():
+                    limit = start + self.timeout
+                    continue
+                raise
+
+    def execute_one(self, query_info: Dict, started: Optional[List] = None, index: int = 0) -> Dict:
+        """
+        执行单个查询（在工作线程中运行），任何错误（查询错误、连接中断、获取连接超时等）都只影响本查询的结果；
+        并发执行时从开始执行起计算截止时间，超过后停止读取结果并归还连接
+        """
+        deadline = None
+        if started is not None:
+            started[index] = time.monotonic()
+            deadline = started[index] + self.timeout
+        start = time.perf_counter()
+        try:
+            stats = {"fetched": 0}
+            item = self.truncate(self.slot(query_info, self.run_query(query_info, stats, deadline)))
+            self.record_stats(item, stats["fetched"])
+            tracer.observe("query_seconds", time.perf_counter() - start, template=query_info["template"])
+            return item
+        except QueryTimeout:
+            return self.slot(query_info, [], "查询超时")
+        except Exception as e:
+            print(f"Cypher执行错误：{str(e)}，模板：{query_info['template']}，参数：{query_info['params']}")
+            return self.slot(query_info, [], str(e))
+
+    @staticmethod
+    def slot(query_info: Dict, result: List[Dict], error: Optional[str] = None) -> Dict:
+        """单个意图的查询结果"""
+        item = {
+            "entity": query_info["entity"],
+            "intent": query_info["intent"],
+            "template": query_info["template"],
+            "results": result
+        }
+        if error:
+            item["error"] = error
+        return item
+
+    @staticmethod
+    def truncate(item: Dict) -> Dict:
+        """结果超过模板行数上限时只保留前若干行，并标记truncated"""
+        limit = TEMPLATES_BY_ID[item["template"]].get("limit")
+        if limit is not None and len(item["results"]) > limit:
+            item["results"] = item["results"][:limit]
+            item["truncated"] = True
+        return item
+
+    def record_stats(self, item: Dict, fetched: int):
+        """记录单个查询的结果行统计（缓存命中时读取行数为0），并累加到执行器的总计"""
+        item["stats"] = {
+            "fetched": fetched,
+            "kept": len(item["results"]),
+            "bytes": sum(len(json.dumps(row, ensure_ascii=False, default=str).encode('utf-8'))
+                         for row in item["results"]),
+        }
+        tracer.observe("query_rows", item["stats"]["kept"], template=item["template"])
+        with self.stats_lock:
+            self.totals["queries"] += 1
+            for key, value in item["stats"].items():
+                self.totals[key] += value
+
+    def row_stats(self) -> Dict:
+        """累计的查询数、读取行数、保留行数和字节数"""
+        with self.stats_lock:
+            return dict(self.totals)
+
+    def iter_rows(self, query_info: Dict) -> Iterator[Dict]:
+        """
+        逐行产出单个查询的结果（不经过结果缓存），供可以边读边处理的调用方使用；
+        最多产出模板行数上限（或Config.QUERY_MAX_ROWS）行，读取完毕或调用方提前停止时归还连接
+        """
+        template = TEMPLATES_BY_ID[query_info["template"]]
+        cap = template.get("limit", Config.QUERY_MAX_ROWS)
+        if self.snapshot is not None:
+            with self.snapshot_session() as engine:
+                rows = engine.run(template["id"], query_info["params"])[:cap]
+            yield from rows
+            return
+        with self.graph_pool.session() as graph:
+            fetched = 0
+            for record in graph.run(template["cypher"], query_info["params"]):
+                if fetched >= cap:
+                    break
+                fetched += 1
+                yield dict(record)
+
+    def run_query(self, query_info: Dict, stats: Optional[Dict] = None, deadline: Optional[float] = None) -> List[Dict]:
+        """先查结果缓存，未命中时执行查询并写入缓存（命中缓存时不占用连接；超时的查询不写入缓存）"""
+        if self.cache is None:
+            return self.run_uncached(query_info, stats, deadline)
+        template = TEMPLATES_BY_ID[query_info["template"]]
+        key = QueryCache.make_key(template["cypher"], query_info["params"])
+        hit, result = self.cache.get(key)
+        tracer.count("query_cache_total", outcome="hit" if hit else "miss")
+        if not hit:
+            result = self.run_uncached(query_info, stats, deadline)
+            self.cache.put(key, result)
+        return result
+
+    def version_due(self) -> bool:
+        """距上次成功读取版本号已超过检查间隔（或尚未读取过）"""
+        return (self.version_checked_at is None
+                or time.monotonic() - self.version_checked_at >= Config.GRAPH_VERSION_CHECK_INTERVAL)
+
+    def check_version(self, raise_errors: bool = False) -> Optional[str]:
+        """
+        按间隔读取图谱版本号，避免每次查询都多一次往返；返回当前版本号
+        读取失败（连接中断、获取连接超时等）时沿用上次的版本号，不更新检查时间，下次调用时重试
+        :param raise_errors: 读取失败时重新抛出异常（调用方据此跳过依赖版本号的缓存），默认只记录错误
+        """
+        if not self.version_due():
+            return self.graph_version
+        with self.version_lock:
+            # 等待期间其他线程已完成检查
+            if not self.version_due():
+                return self.graph_version
+            try:
+                if self.snapshot is not None:
+                    self.refresh_snapshot()
+                    version = self.snapshot.version
+                else:
+                    with self.graph_pool.session() as graph:
+                        version = read_graph_version(graph)
+            except Exception as e:
+                print(f"读取图谱版本号失败，沿用上次的版本号：{str(e)}")
+                if raise_errors:
+                    raise
+                return self.graph_version
+            self.graph_version = version
+            self.version_checked_at = time.monotonic()
+            if self.cache is not None:
+                self.cache.set_version(version)
+            return version
+
+    def refresh_snapshot(self):
+        """快照被重新导出后切换到新快照；正在执行的查询仍使用原快照，原快照在其上的查询全部结束后关闭"""
+        if not self.snapshot.stale():
+            return
+        engine = SnapshotQueryEngine.open(self.snapshot.snapshot.path)
+        with self.snapshot_lock:
+            old, self.snapshot = self.snapshot, engine
+            idle = old.users == 0
+        if idle:
+            old.close()
+
+    @contextmanager
+    def snapshot_session(self) -> Iterator[SnapshotQueryEngine]:
+        """取用当前的快照查询引擎，期间切换快照不会关闭该引擎"""
+        with self.snapshot_lock:
+            engine = self.snapshot
+            engine.users += 1
+        try:
+            yield engine
+        finally:
+            with self.snapshot_lock:
+                engine.users -= 1
+                retired = engine is not self.snapshot and engine.users == 0
+            if retired:
+                engine.close()
+
+    def cache_stats(self) -> Dict:
+        """结果缓存的命中/未命中/淘汰计数"""
+        return self.cache.stats() if self.cache else {}
+
+    def run_uncached(self, query_info: Dict, stats: Optional[Dict] = None, deadline: Optional[float] = None) -> List[Dict]:
+        """
+        按模板id执行参数化查询（查询文本固定，服务端执行计划缓存可以命中）；
+        查询报错（如全文索引未创建）或无结果时改用模板的后备查询（全文索引模板为正则匹配，学者汇总模板为遍历论文）；
+        使用快照后端时由快照查询引擎执行
+        :param deadline: 截止时间（time.monotonic()），超过后抛出QueryTimeout，退出时归还连接
+        """
+        template = TEMPLATES_BY_ID[query_info["template"]]
+        params = query_info["params"]
+        fallback = template.get("fallback")
+        cap = row_cap(template)
+        if self.snapshot is not None:
+            with self.snapshot_session() as engine:
+                rows = engine.run(template["id"], params)
+            return self.consume(rows, cap, stats, deadline)
+        with self.graph_pool.session() as graph:
+            try:
+                result = self.consume(graph.run(template["cypher"], params), cap, stats, deadline)
+            except ClientError as e:
+                if not fallback:
+                    raise
+                print(f"查询失败，改用后备查询：{str(e)}")
+                result = []
+            if not result and fallback:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise QueryTimeout()
+                result = self.consume(graph.run(fallback, params), cap, stats, deadline)
+        return result
+
+    @staticmethod
+    def consume(cursor, cap: int, stats: Optional[Dict] = None, deadline: Optional[float] = None) -> List[Dict]:
+        """逐条读取游标中的记录，达到行数上限后停止读取，不把整个结果集先转换成字典列表；超过截止时间时抛出QueryTimeout"""
+        rows = []
+        for record in cursor:
+            if len(rows) >= cap:
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                raise QueryTimeout()
+            rows.append(dict(record))
+        if stats is not None:
+            stats["fetched"] += len(rows)
+        return rows
@@ -0,0 +1,94 @@
+from collections import deque
+from typing import Hashable, List, Tuple
+
+
+# Aho-Corasick多模式匹配自动机：一次扫描文本即可找出所有模式串的全部出现位置
+class AhoCorasick:
+    def __init__(self):
+        self.goto = [{}]     # 状态转移：goto[状态][字符] -> 下一状态
+        self.fail = [0]      # 失配指针
+        self.own = [[]]      # 以该状态结尾的模式：[(模式长度, 值), ...]
+        self.output = [[]]   # 到达该状态时匹配到的全部模式（含失配链上的模式），build时生成
+        self.values = [frozenset()]  # 到达该状态时匹配到的全部值，build时生成
+        self.built = False
+
+    def add(self, pattern: str, value: Hashable):
+        """加入一个模式串及其对应的值（同一模式可对应多个值）"""
+        if not pattern:
+            return
+        state = 0
+        for ch in pattern:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.own.append([])
+                self.goto[state][ch] = nxt
+            state = nxt
+        if (len(pattern), value) not in self.own[state]:
+            self.own[state].append((len(pattern), value))
+        self.built = False
+
+    def build(self):
+        """按广度优先顺序计算失配指针，并把失配状态的输出合并进来"""
+        self.output = [list(own) for own in self.own]
+        queue = deque(self.goto[0].values())
+        for state in queue:
+            self.fail[state] = 0
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+        self.values = [frozenset(value for _, value in out) for out in self.output]
+        self.built = True
+        return self
+
+    def find_all(self, text: str) -> List[Tuple[int, int, Hashable]]:
+        """返回所有匹配 [(起始位置, 结束位置(不含), 值), ...]，按结束位置排序"""
+        if not self.built:
+            self.build()
+        matches = []
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(ch, 0)
+            for length, value in self.output[state]:
+                matches.append((i + 1 - length, i + 1, value))
+        return matches
+
+    def find_values(self, text: str) -> set:
+        """只返回文本中命中的值的集合（不需要位置时使用，省去逐个构造匹配结果）"""
+        if not self.built:
+            self.build()
+        goto, fail, values = self.goto, self.fail, self.values
+        found = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if values[state]:
+                found |= values[state]
+        return found
+
+    def find_longest(self, text: str) -> List[Tuple[int, int, Hashable]]:
+        """返回互不重叠的匹配：优先保留更长的匹配，长度相同时保留靠前的，结果按起始位置排序"""
+        chosen = []
+        taken = [False] * len(text)
+        for start, end, value in sorted(self.find_all(text), key=lambda m: (m[0] - m[1], m[0])):
+            if any(taken[start:end]):
+                # 同一位置同一长度的其他值（如同名的不同类型实体）一并保留
+                if chosen and chosen[-1][0] == start and chosen[-1][1] == end:
+                    chosen.append((start, end, value))
+                continue
+            for i in range(start, end):
+                taken[i] = True
+            chosen.append((start, end, value))
+        return sorted(chosen, key=lambda m: (m[0], m[1]))
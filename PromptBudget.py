@@ -0,0 +1,70 @@
+import json
+from typing import Dict, List
+
+# 回答提示词中查询结果的压缩与截断：
+# 1. 列式序列化：每个意图只写一次列名，各行只写取值，去掉缩进和多余空白
+# 2. 按token预算截断：各意图轮流加入下一行，预算用完后停止，并告诉大模型有多少行未列出
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估计token数：汉字约0.6个token，其余字符约0.3个token（不依赖具体模型的分词器）"""
+    cjk = sum(1 for ch in text if '\u4e00' <= ch <= '\u9fff')
+    return int(cjk * 0.6 + (len(text) - cjk) * 0.3) + 1
+
+
+def dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def columnar(result: Dict) -> Dict:
+    """单个意图的结果转为列式：{"entity", "intent", "columns": [列名], "rows": [[取值], ...]}"""
+    columns = []
+    for row in result["results"]:
+        for key in row:
+            if key not in columns:
+                columns.append(key)
+    return {
+        "entity": result["entity"],
+        "intent": result["intent"],
+        "columns": columns,
+        "rows": [[row.get(key) for key in columns] for row in result["results"]],
+    }
+
+
+def omitted_note(omitted: int, truncated: bool) -> str:
+    if truncated:
+        return f"结果较多，以下只列出部分，另有{omitted}条以上未列出" if omitted else "结果较多，以下只列出部分"
+    return f"另有{omitted}条结果未列出" if omitted else ""
+
+
+def compact_results(formatted_results: List[Dict], budget: int) -> str:
+    """
+    将多个意图的查询结果压缩到token预算以内
+    :param formatted_results: AnswerGenerator.format_results 的输出
+    :param budget: 查询结果部分的token预算
+    :return: 每行一个意图的JSON文本；有行被省略的意图带note字段说明省略数量
+    """
+    blocks = [columnar(result) for result in formatted_results]
+    row_costs = [[estimate_tokens(dumps(row)) for row in block["rows"]] for block in blocks]
+    # 各意图的固定开销（实体、意图、列名）必须保留
+    remaining = budget - sum(estimate_tokens(dumps({**block, "rows": []})) for block in blocks)
+    kept = [0] * len(blocks)
+    # 轮流给每个意图加一行，避免第一个意图的长列表占满预算
+    progress = True
+    while progress:
+        progress = False
+        for i, costs in enumerate(row_costs):
+            if kept[i] < len(costs) and costs[kept[i]] <= remaining:
+                remaining -= costs[kept[i]]
+                kept[i] += 1
+                progress = True
+
+    lines = []
+    for block, result, count in zip(blocks, formatted_results, kept):
+        omitted = len(block["rows"]) - count
+        block["rows"] = block["rows"][:count]
+        note = omitted_note(omitted, result.get("truncated", False))
+        if note:
+            block["note"] = note
+        lines.append(dumps(block))
+    return "\n".join(lines)
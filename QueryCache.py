@@ -0,0 +1,79 @@
+import re
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+
+# 查询结果缓存：容量有限的LRU缓存，可选TTL过期，图谱版本变化时整体失效
+class QueryCache:
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+        """
+        :param max_size: 最多缓存的查询结果数，超出时淘汰最久未使用的条目
+        :param ttl: 条目有效期（秒），None表示只在图谱版本变化时失效
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> (写入时间, 结果行的元组)
+        self.version = None
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(cypher: str, params: Dict) -> str:
+        """缓存键：压缩空白后的查询文本 + 按键排序的参数"""
+        text = re.sub(r'\s+', ' ', cypher).strip()
+        return text + '\n' + json.dumps(params, ensure_ascii=False, sort_keys=True, default=str)
+
+    def get(self, key: str) -> Tuple[bool, Optional[List]]:
+        """查找缓存，返回 (是否命中, 结果)；结果为新的列表，调用方修改（截断、压缩等）不影响缓存"""
+        with self.lock:
+            item = self.entries.get(key)
+            if item is not None and self.ttl is not None and time.monotonic() - item[0] > self.ttl:
+                del self.entries[key]
+                self.expirations += 1
+                item = None
+            if item is None:
+                self.misses += 1
+                return False, None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True, list(item[1])
+
+    def put(self, key: str, value: List):
+        """写入结果：保存为元组，调用方之后修改传入的列表不影响缓存"""
+        with self.lock:
+            self.entries[key] = (time.monotonic(), tuple(value))
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def set_version(self, version):
+        """记录当前图谱版本，版本变化（重新导入过数据）时清空全部缓存"""
+        with self.lock:
+            if version != self.version:
+                if self.entries:
+                    self.invalidations += 1
+                self.entries.clear()
+                self.version = version
+
+    def stats(self) -> Dict:
+        """命中/未命中/淘汰等计数"""
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "version": self.version,
+            }
@@ -1,112 +1,248 @@
-import json
-import re
-import openai
-from typing import List, Dict
-
-# 配置类
-class Config:
-    NEO4J_URI = "http://localhost:7474"
-    NEO4J_USER = "neo4j"
-    NEO4J_PASSWORD = "密码"
-
-    DEEPSEEK_API_KEY = "API密钥"
-    DEEPSEEK_MODEL = "deepseek-chat"
-    API_TIMEOUT = 60
-    API_BASE_URL = "https://api.deepseek.com"
-
-# 初始化 openai 客户端
-client = openai.OpenAI(
-    api_key=Config.DEEPSEEK_API_KEY,
-    base_url=Config.API_BASE_URL,
-    timeout=Config.API_TIMEOUT
-)
-
-# 问题预处理类
-class QuestionPreprocessor:
-    @staticmethod
-    def process(question: str) -> str:
-        question = re.sub(r'\s+', ' ', question).strip() #\s+：将问句中任意长度的空白字符转换为单个空白字符；.strip()去除文本的开头和结尾空格
-        return question
-
-# 意图分析类
-class IntentAnalyzer:
-    def __init__(self):
-        self.client = client
-        self.system_prompt = """
-        你是一个专业的学术问题解析器，请严格依据以下实体、属性和关系定义，分析用户问题，提取关键实体及其类型和多个查询意图。
-
-        实体类型及属性说明
-        Author（学者）：属性包含英文名（family+given）、中文名（chinese_name） 
-        Article（论文）：属性有标题（title）、ID（id）、发表年份（date_parts）、关键词（keywords）、摘要（abstract）、语言（language） 
-        Journal（期刊）：属性为名称（container_title）、ISSN/ISBN、影响因子（impact_factor） 
-        Discipline（二级学科）：属性是英文名称（class_en.Secondary disciplines）、中文名称（class_zh.二级学科） 
-        Topic（研究主题）：属性为英文名称（class_en.Research direction clusters）、中文名称（class_zh.研究主题） 
-        Method（方法技术）：属性是英文名称（class_en.Methods and technologies）、中文名称（class_zh.方法技术） 
-        Scenario（应用场景）：属性为英文名称（class_en.Application scenarios）、中文名称（class_zh.应用场景） 
-
-        关系类型及连接实体说明
-        PUBLISH（发表）：连接实体为 Author → Article ，表示学者发表论文的关系 
-        COLLABORATE（合作）：连接实体为 Author → Author ，代表学者之间合作发表论文的关系 
-        BE_PUBLISHED_IN（刊载于）：连接实体为 Article → Journal ，即论文刊载于某期刊的关系 
-        BELONG_TO（属于）：连接实体为 Article → Discipline ，说明论文所属二级学科的关系 
-        INVOLVE（涉及）：连接实体为 Article → Topic ，表示论文涉及某研究主题的关系 
-        USE（使用）：连接实体为 Article → Method ，代表论文使用某方法技术的关系 
-        APPLY_TO（应用于）：连接实体为 Article → Scenario ，说明论文应用于某应用场景的关系 
-
-        意图可选方向
-        学者（Author）相关：论文列表（查询论文信息，基于 PUBLISH 关系 ）、合作学者（查询有合作关系的其他学者，基于 COLLABORATE 关系 ）、研究领域（查询二级学科（研究领域），可通过 PUBLISH → BELONG_TO 关系推导 ）、发表期刊（查询发表的期刊，通过 PUBLISH → BE_PUBLISHED_IN 关系推导 ） 
-        论文（Article）相关：作者列表（查询论文的作者，基于 PUBLISH 关系反向推导 ）、发表时间（提取论文的发表时间）、关键词（提取论文的关键词）、所属领域（查询论文所属二级学科）、涉及主题（查询论文涉及的研究主题，基于 INVOLVE 关系 ）、使用方法（查询论文使用的方法技术，基于 USE 关系 ）、应用场景（查询论文应用的场景，基于 APPLY_TO 关系 ） 
-        期刊（Journal）相关：发表论文（查询期刊上刊载的论文，基于 BE_PUBLISHED_IN 关系反向推导 ）、影响因子（提取期刊的影响因子） 
-        二级学科（Discipline）相关：相关论文（查询属于该二级学科的论文，基于 BELONG_TO 关系反向推导 ）、研究学者（查询发表过该二级学科相关论文的学者，通过 BELONG_TO → PUBLISH 关系推导 ） 
-        研究主题（Topic）相关：相关论文（查询涉及该研究主题的论文，基于 INVOLVE 关系反向推导 ）、研究学者（查询发表过该研究主题相关论文的学者，通过 INVOLVE → PUBLISH 关系推导 ） 
-        方法技术（Method）相关：相关论文（查询使用该方法技术的论文，基于 USE 关系反向推导 ）、应用学者（查询发表过使用该方法技术论文的学者，通过 USE → PUBLISH 关系推导 ） 
-        应用场景（Scenario）相关：相关论文（查询应用于该场景的论文，基于 APPLY_TO 关系反向推导 ）、应用学者（查询发表过应用于该场景论文的学者，通过 APPLY_TO → PUBLISH 关系推导 ） 
-
-        特别要求：
-        1. 实体名称必须严格保留原始格式，包括括号、标点等
-        2. 一个问题可能包含多个意图，请识别出所有可能的意图
-        3. 返回JSON格式，包含entities数组和intents数组（注意是intents复数形式）
-        4. 每个意图需明确对应实体，格式示例: {"entities": [{"name": "陈钢", "type": "Author"}, {"name": "人工智能", "type": "Topic"}], "intents": [{"entity": "陈钢", "intent": "查询学者的论文列表"}, {"entity": "人工智能", "intent": "查询相关论文"}]}
-        """
-
-    def analyze(self, question: str) -> Dict:
-        try:
-            response = self.client.chat.completions.create(
-                model=Config.DEEPSEEK_MODEL,
-                messages=[
-                    {"role": "system", "content": self.system_prompt},
-                    {"role": "user", "content": question}
-                ],
-                timeout=Config.API_TIMEOUT
-            )
-            result_text = response.choices[0].message.content.strip()
-
-            # 清理可能的Markdown格式
-            if result_text.startswith("```json") and result_text.endswith("```"):
-                result_text = result_text[len("```json"):-len("```")].strip()
-
-            try:
-                result = json.loads(result_text)
-                # 确保返回格式正确
-                return {
-                    "entities": result.get("entities", []),
-                    "intents": result.get("intents", [])
-                }
-            except json.JSONDecodeError as e:
-                print(f"JSON解析失败: {result_text}")
-                print(f"错误详情: {str(e)}")
-                # 降级处理
-                entities = []
-                intents = []
-                author_match = re.search(r'([\u4e00-\u9fa5]+)学者', question)
-                if author_match:
-                    author_name = author_match.group(1)
-                    entities = [{"name": author_name, "type": "Author"}]
-                    intents = [{"entity": author_name, "intent": "查询学者的论文列表"}]
-                return {"entities": entities, "intents": intents}
-            except Exception as e:
-                print(f"解析结果失败: {str(e)}")
-                return {"entities": [], "intents": []}
-        except Exception as e:
-            print(f"意图识别失败：{str(e)}")
-            return {"entities": [], "intents": []}
+import json
+import re
+import time
+import asyncio
+import openai
+from typing import List, Dict, Optional
+from Tracing import tracer
+
+# 配置类
+class Config:
+    # Neo4j使用Bolt协议连接（二进制传输、连接可复用），导入端和问答端共用GraphPool.py中的连接池
+    NEO4J_URI = "bolt://localhost:7687"
+    NEO4J_USER = "neo4j"
+    NEO4J_PASSWORD = "密码"
+    # 连接池：连接数上限、池满时获取连接的超时时间（秒）、空闲超过该时间（秒）的连接复用前先检测可用性、连接最长存活时间（秒）
+    NEO4J_POOL_SIZE = 8
+    NEO4J_ACQUIRE_TIMEOUT = 30
+    NEO4J_KEEPALIVE = 60
+    NEO4J_MAX_AGE = 3600
+
+    # 知识图谱查询结果缓存：容量（0表示不缓存）、有效期（秒，None表示不过期）、图谱版本检查间隔（秒）
+    QUERY_CACHE_SIZE = 1024
+    QUERY_CACHE_TTL = None
+    GRAPH_VERSION_CHECK_INTERVAL = 5
+    # 多意图查询的最大并发数、单个查询的超时时间（秒）
+    QUERY_PARALLELISM = 4
+    QUERY_TIMEOUT = 10
+    # 查询后端："neo4j"为查询Neo4j；"snapshot"为查询导入时导出的只读图谱快照（build_graph.py --snapshot）
+    QUERY_BACKEND = "neo4j"
+    SNAPSHOT_PATH = "data/graph.snapshot"
+    # 没有行数上限（LIMIT）的查询模板最多读取的结果行数
+    QUERY_MAX_ROWS = 1000
+    # 问答结果持久化缓存：SQLite文件路径（None表示不缓存）、最多缓存的回答数
+    ANSWER_CACHE_PATH = "data/answer_cache.db"
+    ANSWER_CACHE_SIZE = 10000
+    # 是否启用本地意图快速识别（命中时不调用大模型）
+    FAST_INTENT_ENABLED = True
+    # 列表类意图（合作学者、论文列表等）的回答是否按固定格式本地渲染（不调用大模型）
+    TEMPLATE_RENDER_ENABLED = True
+    # 回答提示词中查询结果部分的token预算，超出时按行截断并注明未列出的行数
+    ANSWER_RESULT_TOKEN_BUDGET = 3000
+    # 问答流程分阶段耗时与指标（Tracing.py）：是否启用（关闭时几乎没有开销）、每个问题一行的JSON跟踪日志路径、
+    # 退出问答时写出的Prometheus文本格式指标文件路径（None表示不写）
+    METRICS_ENABLED = False
+    TRACE_LOG_PATH = "data/trace.jsonl"
+    METRICS_EXPORT_PATH = "data/metrics.prom"
+
+    DEEPSEEK_API_KEY = "API密钥"
+    DEEPSEEK_MODEL = "deepseek-chat"
+    API_TIMEOUT = 60
+    API_BASE_URL = "https://api.deepseek.com"
+    # 异步问答时同时进行的大模型请求数上限
+    LLM_CONCURRENCY = 8
+
+# 初始化 openai 客户端
+client = openai.OpenAI(
+    api_key=Config.DEEPSEEK_API_KEY,
+    base_url=Config.API_BASE_URL,
+    timeout=Config.API_TIMEOUT
+)
+# 异步客户端：ScholarQASystem.answer_async 使用
+async_client = openai.AsyncOpenAI(
+    api_key=Config.DEEPSEEK_API_KEY,
+    base_url=Config.API_BASE_URL,
+    timeout=Config.API_TIMEOUT
+)
+
+# 问题预处理类
+class QuestionPreprocessor:
+    @staticmethod
+    def process(question: str) -> str:
+        question = re.sub(r'\s+', ' ', question).strip() #\s+：将问句中任意长度的空白字符转换为单个空白字符；.strip()去除文本的开头和结尾空格
+        return question
+
+# 意图分析类
+class IntentAnalyzer:
+    def __init__(self, fast_path=None, llm_client=None, llm_async_client=None, llm_limit: Optional[asyncio.Semaphore] = None):
+        """
+        :param fast_path: 本地意图快速识别器（FastIntent.FastIntentMatcher），为None时每个问题都调用大模型
+        :param llm_client: 同步大模型客户端，默认使用模块级client（可替换为指向本地模拟服务的客户端）
+        :param llm_async_client: 异步大模型客户端，默认使用模块级async_client
+        :param llm_limit: 限制异步大模型请求并发数的信号量，可与AnswerGenerator共用
+        """
+        self.client = llm_client or client
+        self.async_client = llm_async_client or async_client
+        self.llm_limit = llm_limit or asyncio.Semaphore(Config.LLM_CONCURRENCY)
+        self.fast_path = fast_path
+        # 快速识别命中率与节省时间的统计
+        self.fast_hits = 0
+        self.fast_seconds = 0.0
+        self.llm_calls = 0
+        self.llm_seconds = 0.0
+        self.system_prompt = """
+        你是一个专业的学术问题解析器，请严格依据以下实体、属性和关系定义，分析用户问题，提取关键实体及其类型和多个查询意图。
+
+        实体类型及属性说明
+        Author（学者）：属性包含英文名（family+given）、中文名（chinese_name） 
+        Article（论文）：属性有标题（title）、ID（id）、发表年份（date_parts）、关键词（keywords）、摘要（abstract）、语言（language） 
+        Journal（期刊）：属性为名称（container_title）、ISSN/ISBN、影响因子（impact_factor） 
+        Discipline（二级学科）：属性是英文名称（class_en.Secondary disciplines）、中文名称（class_zh.二级学科） 
+        Topic（研究主题）：属性为英文名称（class_en.Research direction clusters）、中文名称（class_zh.研究主题） 
+        Method（方法技术）：属性是英文名称（class_en.Methods and technologies）、中文名称（class_zh.方法技术） 
+        Scenario（应用场景）：属性为英文名称（class_en.Application scenarios）、中文名称（class_zh.应用场景） 
+
+        关系类型及连接实体说明
+        PUBLISH（发表）：连接实体为 Author → Article ，表示学者发表论文的关系 
+        COLLABORATE（合作）：连接实体为 Author → Author ，代表学者之间合作发表论文的关系 
+        BE_PUBLISHED_IN（刊载于）：连接实体为 Article → Journal ，即论文刊载于某期刊的关系 
+        BELONG_TO（属于）：连接实体为 Article → Discipline ，说明论文所属二级学科的关系 
+        INVOLVE（涉及）：连接实体为 Article → Topic ，表示论文涉及某研究主题的关系 
+        USE（使用）：连接实体为 Article → Method ，代表论文使用某方法技术的关系 
+        APPLY_TO（应用于）：连接实体为 Article → Scenario ，说明论文应用于某应用场景的关系 
+
+        意图可选方向
+        学者（Author）相关：论文列表（查询论文信息，基于 PUBLISH 关系 ）、合作学者（查询有合作关系的其他学者，基于 COLLABORATE 关系 ）、研究领域（查询二级学科（研究领域），可通过 PUBLISH → BELONG_TO 关系推导 ）、发表期刊（查询发表的期刊，通过 PUBLISH → BE_PUBLISHED_IN 关系推导 ） 
+        论文（Article）相关：作者列表（查询论文的作者，基于 PUBLISH 关系反向推导 ）、发表时间（提取论文的发表时间）、关键词（提取论文的关键词）、所属领域（查询论文所属二级学科）、涉及主题（查询论文涉及的研究主题，基于 INVOLVE 关系 ）、使用方法（查询论文使用的方法技术，基于 USE 关系 ）、应用场景（查询论文应用的场景，基于 APPLY_TO 关系 ） 
+        期刊（Journal）相关：发表论文（查询期刊上刊载的论文，基于 BE_PUBLISHED_IN 关系反向推导 ）、影响因子（提取期刊的影响因子） 
+        二级学科（Discipline）相关：相关论文（查询属于该二级学科的论文，基于 BELONG_TO 关系反向推导 ）、研究学者（查询发表过该二级学科相关论文的学者，通过 BELONG_TO → PUBLISH 关系推导 ） 
+        研究主题（Topic）相关：相关论文（查询涉及该研究主题的论文，基于 INVOLVE 关系反向推导 ）、研究学者（查询发表过该研究主题相关论文的学者，通过 INVOLVE → PUBLISH 关系推导 ） 
+        方法技术（Method）相关：相关论文（查询使用该方法技术的论文，基于 USE 关系反向推导 ）、应用学者（查询发表过使用该方法技术论文的学者，通过 USE → PUBLISH 关系推导 ） 
+        应用场景（Scenario）相关：相关论文（查询应用于该场景的论文，基于 APPLY_TO 关系反向推导 ）、应用学者（查询发表过应用于该场景论文的学者，通过 APPLY_TO → PUBLISH 关系推导 ） 
+
+        特别要求：
+        1. 实体名称必须严格保留原始格式，包括括号、标点等
+        2. 一个问题可能包含多个意图，请识别出所有可能的意图
+        3. 返回JSON格式，包含entities数组和intents数组（注意是intents复数形式）
+        4. 每个意图需明确对应实体，格式示例: {"entities": [{"name": "陈钢", "type": "Author"}, {"name": "人工智能", "type": "Topic"}], "intents": [{"entity": "陈钢", "intent": "查询学者的论文列表"}, {"entity": "人工智能", "intent": "查询相关论文"}]}
+        """
+
+    def analyze(self, question: str) -> Dict:
+        """先尝试本地快速识别，不够确定时再调用大模型"""
+        result = self.match_fast(question)
+        if result:
+            return result
+
+        tracer.count("intent_path_total", path="llm")
+        start = time.perf_counter()
+        try:
+            return self.analyze_llm(question)
+        finally:
+            self.llm_calls += 1
+            self.llm_seconds += time.perf_counter() - start
+
+    async def analyze_async(self, question: str) -> Dict:
+        """analyze的异步版本：等待大模型响应期间不阻塞事件循环"""
+        result = self.match_fast(question)
+        if result:
+            return result
+
+        tracer.count("intent_path_total", path="llm")
+        start = time.perf_counter()
+        try:
+            return await self.analyze_llm_async(question)
+        finally:
+            self.llm_calls += 1
+            self.llm_seconds += time.perf_counter() - start
+
+    def match_fast(self, question: str) -> Optional[Dict]:
+        """本地快速识别，未启用或不够确定时返回None"""
+        if self.fast_path is None:
+            return None
+        start = time.perf_counter()
+        result = self.fast_path.match(question)
+        self.fast_seconds += time.perf_counter() - start
+        if result:
+            self.fast_hits += 1
+            tracer.count("intent_path_total", path="fast")
+        return result
+
+    def fast_path_report(self) -> Dict:
+        """快速识别命中率，以及按大模型调用平均耗时估算的节省时间"""
+        total = self.fast_hits + self.llm_calls
+        avg_llm = self.llm_seconds / self.llm_calls if self.llm_calls else 0.0
+        return {
+            "questions": total,
+            "fast_hits": self.fast_hits,
+            "hit_rate": self.fast_hits / total if total else 0.0,
+            "avg_llm_seconds": avg_llm,
+            "fast_path_seconds": self.fast_seconds,
+            "saved_seconds": max(self.fast_hits * avg_llm - self.fast_seconds, 0.0),
+        }
+
+    def messages(self, question: str) -> List[Dict]:
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": question}
+        ]
+
+    def analyze_llm(self, question: str) -> Dict:
+        """调用大模型识别实体和意图"""
+        try:
+            response = self.client.chat.completions.create(
+                model=Config.DEEPSEEK_MODEL,
+                messages=self.messages(question),
+                timeout=Config.API_TIMEOUT
+            )
+            tracer.record_usage("intent", response.usage)
+            return self.parse_response(response.choices[0].message.content, question)
+        except Exception as e:
+            print(f"意图识别失败：{str(e)}")
+            return {"entities": [], "intents": []}
+
+    async def analyze_llm_async(self, question: str) -> Dict:
+        """analyze_llm的异步版本，并发请求数受llm_limit限制"""
+        try:
+            async with self.llm_limit:
+                response = await self.async_client.chat.completions.create(
+                    model=Config.DEEPSEEK_MODEL,
+                    messages=self.messages(question),
+                    timeout=Config.API_TIMEOUT
+                )
+            tracer.record_usage("intent", response.usage)
+            return self.parse_response(response.choices[0].message.content, question)
+        except Exception as e:
+            print(f"意图识别失败：{str(e)}")
+            return {"entities": [], "intents": []}
+
+    @staticmethod
+    def parse_response(result_text: str, question: str) -> Dict:
+        """解析大模型返回的JSON文本"""
+        result_text = result_text.strip()
+
+        # 清理可能的Markdown格式
+        if result_text.startswith("```json") and result_text.endswith("```"):
+            result_text = result_text[len("```json"):-len("```")].strip()
+
+        try:
+            result = json.loads(result_text)
+            # 确保返回格式正确
+            return {
+                "entities": result.get("entities", []),
+                "intents": result.get("intents", [])
+            }
+        except json.JSONDecodeError as e:
+            print(f"JSON解析失败: {result_text}")
+            print(f"错误详情: {str(e)}")
+            # 降级处理
+            entities = []
+            intents = []
+            author_match = re.search(r'([\u4e00-\u9fa5]+)学者', question)
+            if author_match:
+                author_name = author_match.group(1)
+                entities = [{"name": author_name, "type": "Author"}]
+                intents = [{"entity": author_name, "intent": "查询学者的论文列表"}]
+            return {"entities": entities, "intents": intents}
+        except Exception as e:
+            print(f"解析结果失败: {str(e)}")
+            return {"entities": [], "intents": []}
\ No newline at end of file
@@ -0,0 +1,291 @@
+import os
+import json
+import argparse
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+from GraphSnapshot import GraphSnapshot
+
+# 基于只读快照的模板查询引擎：对CypherTemplates中的每个模板给出与Cypher语义一致的实现，
+# 返回的行与KGQueryExecutor从Neo4j取回的行格式相同（列名、取值类型、排序和LIMIT）
+# 以全文索引为入口的模板在快照中按名称包含匹配（忽略大小写）查找实体，完全相同的名称优先，其次名称较短的优先，
+# 与后备正则查询的匹配范围一致；全文索引分词与包含匹配不同的个别名称，结果可能与Neo4j不同，可用本模块的一致性检查查看
+# （tests/test_snapshot_parity.py 离线检查全部模板的结果，并断言了这一差异）
+
+# 以全文索引为入口的模板按这些属性匹配实体名称
+SEARCH_FIELDS = {
+    "Article": ["title"],
+    "Journal": ["name"],
+    "Discipline": ["chinese_name", "english_name"],
+    "Topic": ["chinese_name", "english_name"],
+    "Method": ["chinese_name", "english_name"],
+    "Scenario": ["chinese_name", "english_name"],
+}
+# 分类节点与论文之间的关系
+CATEGORY_RELATIONS = {"Discipline": "BELONG_TO", "Topic": "INVOLVE", "Method": "USE", "Scenario": "APPLY_TO"}
+
+
+def null_last(value):
+    """Cypher的排序规则：null大于任何值（升序排在最后，降序排在最前）"""
+    return (value is None, 0 if value is None else value)
+
+
+def order_by(rows: List[Dict], *keys) -> List[Dict]:
+    """按多个 (列名, 是否降序) 排序，与ORDER BY相同"""
+    for column, descending in reversed(keys):
+        rows.sort(key=lambda row: null_last(row[column]), reverse=descending)
+    return rows
+
+
+def limit(rows: List[Dict], params: Dict) -> List[Dict]:
+    return rows[:params["limit"]] if "limit" in params else rows
+
+
+class SnapshotQueryEngine:
+    def __init__(self, snapshot: GraphSnapshot):
+        self.snapshot = snapshot
+        self.mtime = os.stat(snapshot.path).st_mtime
+        self.author_index = None   # 学者姓名 -> [节点]，首次查询时建立
+        self.search_index = {}     # 标签 -> [(小写名称, ...), ...]，首次查询时建立
+        self.users = 0             # 正在执行的查询数，由KGQueryExecutor在取用和切换快照时维护
+        s = self.snapshot
+        self.queries: Dict[str, Callable[[Dict], List[Dict]]] = {
+            "author.topic": self.author_topic,
+            "author.discipline": lambda params: self.author_group(
+                params, "BELONG_TO", "Discipline", {"二级学科": "chinese_name", "英文领域": "english_name"}),
+            "author.journal": lambda params: self.author_group(
+                params, "BE_PUBLISHED_IN", "Journal", {"期刊名称": "name", "影响因子": "impact_factor"}, "影响因子"),
+            "author.method": lambda params: self.author_group(params, "USE", "Method", {"方法技术": "chinese_name"}),
+            "author.scenario": lambda params: self.author_group(params, "APPLY_TO", "Scenario", {"应用场景": "chinese_name"}),
+            "author.paper": self.author_paper,
+            "author.collab": self.author_collab,
+            "article.abstract": lambda params: [
+                {"论文标题": s.value("Article", "title", p), "摘要": s.value("Article", "abstract", p)}
+                for p in self.search("Article", params)][:1],
+            "article.author": lambda params: limit([
+                {"中文名": s.value("Author", "chinese_name", a), "英文名": s.value("Author", "english_name", a)}
+                for p in self.search("Article", params) for a in s.neighbors("PUBLISH", p, "in")], params),
+            "article.journal": lambda params: limit([
+                {"期刊名称": s.value("Journal", "name", j), "影响因子": s.value("Journal", "impact_factor", j),
+                 "发表年份": s.value("Article", "date", p)}
+                for p in self.search("Article", params) for j in s.neighbors("BE_PUBLISHED_IN", p)], params),
+            "article.time": lambda params: limit([
+                {"发表年份": s.value("Article", "date", p)} for p in self.search("Article", params)], params),
+            "article.keyword": lambda params: limit([
+                {"关键词": s.value("Article", "keywords", p)} for p in self.search("Article", params)], params),
+            "article.discipline": lambda params: self.article_distinct(params, "BELONG_TO", "Discipline", "二级学科"),
+            "article.topic": lambda params: self.article_distinct(params, "INVOLVE", "Topic", "研究主题"),
+            "article.method": lambda params: self.article_distinct(params, "USE", "Method", "方法技术"),
+            "article.scenario": lambda params: self.article_distinct(params, "APPLY_TO", "Scenario", "应用场景"),
+            "journal.paper": lambda params: self.related_papers(params, "Journal", "BE_PUBLISHED_IN"),
+            "journal.factor": lambda params: limit([
+                {"影响因子": s.value("Journal", "impact_factor", j)} for j in self.search("Journal", params)], params),
+        }
+        for label, rel in CATEGORY_RELATIONS.items():
+            self.queries[f"{label.lower()}.paper"] = (
+                lambda params, label=label, rel=rel: self.related_papers(params, label, rel))
+            self.queries[f"{label.lower()}.author"] = (
+                lambda params, label=label, rel=rel: self.related_authors(params, label, rel))
+
+    @classmethod
+    def open(cls, path: str) -> 'SnapshotQueryEngine':
+        return cls(GraphSnapshot(path))
+
+    @property
+    def version(self) -> Optional[str]:
+        return self.snapshot.version
+
+    def stale(self) -> bool:
+        """快照文件已被重新导出（修改时间变化）"""
+        try:
+            return os.stat(self.snapshot.path).st_mtime != self.mtime
+        except FileNotFoundError:
+            return False
+
+    def close(self):
+        self.snapshot.close()
+
+    def run(self, template_id: str, params: Dict) -> List[Dict]:
+        """执行模板查询，参数与Cypher模板相同"""
+        query = self.queries.get(template_id)
+        if query is None:
+            raise ValueError(f"快照查询引擎不支持模板：{template_id}")
+        return query(params)
+
+    # ---- 实体查找 ----
+    def authors(self, name: str) -> List[int]:
+        """学者按中文名或英文名精确匹配（与AUTHOR_MATCH一致）"""
+        if self.author_index is None:
+            index = defaultdict(list)
+            for node, (zh, en) in enumerate(self.snapshot.names("Author")):
+                for value in {zh, en}:
+                    if value is not None:
+                        index[value].append(node)
+            self.author_index = index
+        return self.author_index.get(name, [])
+
+    def search(self, label: str, params: Dict) -> List[int]:
+        """名称包含$name（忽略大小写）的实体，按匹配程度取前$top_k个"""
+        names = self.search_index.get(label)
+        if names is None:
+            columns = [list(self.snapshot.column(label, prop)) for prop in SEARCH_FIELDS[label]]
+            names = self.search_index[label] = [
+                tuple(v.lower() for v in values if v is not None) for values in zip(*columns)]
+        needle = params["name"].lower()
+        hits = []
+        for node, values in enumerate(names):
+            ranks = [(value != needle, len(value)) for value in values if needle in value]
+            if ranks:
+                hits.append((min(ranks), node))
+        hits.sort()
+        return [node for _, node in hits[:params.get("top_k", len(hits))]]
+
+    # ---- 学者相关 ----
+    def author_papers(self, params: Dict):
+        """(学者, 论文) 对，对应 MATCH (a:Author)-[:PUBLISH]->(p:Article) WHERE 姓名匹配"""
+        for a in self.authors(params["name"]):
+            for p in self.snapshot.neighbors("PUBLISH", a):
+                yield a, p
+
+    def author_topic(self, params: Dict) -> List[Dict]:
+        counts = defaultdict(int)
+        for _, p in self.author_papers(params):
+            date = self.snapshot.value("Article", "date", p)
+            counts[date] += len(self.snapshot.neighbors("INVOLVE", p))
+        rows = [{"年份": date, "发表数量": count} for date, count in counts.items() if count]
+        return order_by(rows, ("年份", False))
+
+    def author_group(self, params: Dict, rel: str, label: str, columns: Dict[str, str],
+                     second_key: Optional[str] = None) -> List[Dict]:
+        """按终点节点的属性值分组统计不同论文数，按论文数（及second_key）降序取前$limit行"""
+        groups = defaultdict(set)
+        for _, p in self.author_papers(params):
+            for node in self.snapshot.neighbors(rel, p):
+                key = tuple(self.snapshot.value(label, prop, node) for prop in columns.values())
+                groups[key].add(p)
+        rows = [dict(zip(columns, key), 论文数=len(papers)) for key, papers in groups.items()]
+        keys = [("论文数", True)] + ([(second_key, True)] if second_key else [])
+        return limit(order_by(rows, *keys), params)
+
+    def author_paper(self, params: Dict) -> List[Dict]:
+        s = self.snapshot
+        rows = [{"论文标题": s.value("Article", "title", p), "发表年份": s.value("Article", "date", p),
+                 "期刊名称": s.value("Article", "container_title", p)} for _, p in self.author_papers(params)]
+        return limit(order_by(rows, ("发表年份", True)), params)
+
+    def author_collab(self, params: Dict) -> List[Dict]:
+        """无向匹配合作关系：出边和入边都计入，按合作者汇总合著次数和最近合作年份"""
+        weight = defaultdict(int)
+        last_year = {}
+        for a in self.authors(params["name"]):
+            for direction in ("out", "in"):
+                for c, props in self.snapshot.edges("COLLABORATE", a, direction):
+                    weight[c] += props["count"] if props["count"] is not None else 1
+                    year = props["last_year"]
+                    if year is not None and (last_year.get(c) is None or year > last_year[c]):
+                        last_year[c] = year
+        rows = [{"中文名": self.snapshot.value("Author", "chinese_name", c),
+                 "英文名": self.snapshot.value("Author", "english_name", c),
+                 "合作次数": w, "_last_year": last_year.get(c)} for c, w in weight.items()]
+        rows = limit(order_by(rows, ("合作次数", True), ("_last_year", True)), params)
+        for row in rows:
+            del row["_last_year"]
+        return rows
+
+    # ---- 论文相关 ----
+    def article_distinct(self, params: Dict, rel: str, label: str, column: str) -> List[Dict]:
+        """RETURN DISTINCT 分类节点中文名 LIMIT $limit"""
+        seen, rows = set(), []
+        for p in self.search("Article", params):
+            for node in self.snapshot.neighbors(rel, p):
+                value = self.snapshot.value(label, "chinese_name", node)
+                if value not in seen:
+                    seen.add(value)
+                    rows.append({column: value})
+        return limit(rows, params)
+
+    # ---- 期刊、分类节点相关 ----
+    def related_papers(self, params: Dict, label: str, rel: str) -> List[Dict]:
+        """实体的相关论文，按发表年份从新到旧"""
+        s = self.snapshot
+        rows = [{"论文标题": s.value("Article", "title", p), "发表年份": s.value("Article", "date", p)}
+                for node in self.search(label, params) for p in s.neighbors(rel, node, "in")]
+        return limit(order_by(rows, ("发表年份", True)), params)
+
+    def related_authors(self, params: Dict, label: str, rel: str) -> List[Dict]:
+        """发表过实体相关论文的学者，按相关论文数从多到少"""
+        s = self.snapshot
+        groups = defaultdict(set)
+        for node in self.search(label, params):
+            for p in s.neighbors(rel, node, "in"):
+                for a in s.neighbors("PUBLISH", p, "in"):
+                    groups[(s.value("Author", "chinese_name", a), s.value("Author", "english_name", a))].add(p)
+        rows = [{"中文名": zh, "英文名": en, "论文数": len(papers)} for (zh, en), papers in groups.items()]
+        return limit(order_by(rows, ("论文数", True)), params)
+
+
+# 各实体类型抽样时按这个关系的度数选取关联最多的实体
+SAMPLE_RELATIONS = {"Author": ("PUBLISH", "out"), "Article": ("PUBLISH", "in"), "Journal": ("BE_PUBLISHED_IN", "in")}
+SAMPLE_RELATIONS.update({label: (rel, "in") for label, rel in CATEGORY_RELATIONS.items()})
+
+
+def sample_names(snapshot: GraphSnapshot, entity_type: str, count: int) -> List[str]:
+    """取关联最多的若干实体的名称作为一致性检查的样本"""
+    rel, direction = SAMPLE_RELATIONS[entity_type]
+    offsets = snapshot.array(f"{rel}.{direction}.offsets")
+    nodes = sorted(range(snapshot.size(entity_type)), key=lambda n: offsets[n] - offsets[n + 1])
+    fields = SEARCH_FIELDS.get(entity_type, ["chinese_name", "english_name"])
+    names = []
+    for node in nodes:
+        name = next((v for v in (snapshot.value(entity_type, field, node) for field in fields) if v), None)
+        if name and name not in names:
+            names.append(name)
+        if len(names) >= count:
+            break
+    return names
+
+
+def canonical(rows: List[Dict]) -> List[str]:
+    return sorted(json.dumps(row, ensure_ascii=False, sort_keys=True, default=str) for row in rows)
+
+
+def check_parity(engine: SnapshotQueryEngine, executor, samples: int) -> bool:
+    """
+    对每个模板抽样若干实体，分别在Neo4j和快照上执行并比较结果
+    结果只有同序值（如论文数相同）的行顺序不同时记为"顺序不同"，不算不一致
+    """
+    from CypherTemplates import TEMPLATES
+    from KGQuery import CypherGenerator
+    generator = CypherGenerator()
+    failed = 0
+    for (entity_type, _), template in TEMPLATES.items():
+        counts = defaultdict(int)
+        for name in sample_names(engine.snapshot, entity_type, samples):
+            query_info = generator.build_query(template, entity_type, name)
+            expected = executor.run_uncached(query_info)
+            actual = engine.run(template["id"], query_info["params"])
+            if expected == actual:
+                counts["一致"] += 1
+            elif canonical(expected) == canonical(actual):
+                counts["顺序不同"] += 1
+            else:
+                counts["不一致"] += 1
+                if counts["不一致"] == 1:
+                    print(f"  {template['id']}（{name}）\n    Neo4j：{expected[:5]}\n    快照：{actual[:5]}")
+        failed += counts["不一致"]
+        print(f"{template['id']}：" + "，".join(f"{k}{v}个" for k, v in counts.items()))
+    print("全部模板结果一致" if not failed else f"共{failed}个查询结果不一致")
+    return not failed
+
+
+# 独立运行：用Neo4j的查询结果检查快照查询引擎的一致性
+if __name__ == '__main__':
+    from QuestionAnalyzer import Config
+    from KGQuery import KGQueryExecutor
+    parser = argparse.ArgumentParser(description='比较快照查询引擎与Neo4j的查询结果')
+    parser.add_argument('--snapshot', default=None, help='快照文件路径，默认为Config.SNAPSHOT_PATH')
+    parser.add_argument('--samples', type=int, default=5, help='每个模板抽样的实体数')
+    args = parser.parse_args()
+    cur_dir = os.path.dirname(os.path.abspath(__file__))
+    snapshot_engine = SnapshotQueryEngine.open(os.path.join(cur_dir, args.snapshot or Config.SNAPSHOT_PATH))
+    neo4j_executor = KGQueryExecutor(cache_size=0, parallelism=1, backend="neo4j")
+    raise SystemExit(0 if check_parity(snapshot_engine, neo4j_executor, args.samples) else 1)
@@ -0,0 +1,344 @@
+import os
+import json
+import time
+import math
+import random
+import bisect
+from array import array
+from typing import Dict, Iterator, List, Tuple
+
+# 合成论文数据集：字段与data.json一致（build_graph读取的id、title、date_parts、author、container_title、ISSN_ISBN、
+# impact_factor、class_en/class_zh四类分类等），用于在任意规模上测试导入和问答，不依赖非公开的真实数据
+# 分布按真实学术数据的偏斜程度生成（均为Zipf分布，指数可调）：
+#   学者发文量：每个学科一个学者池，按Zipf抽取作者，少数高产学者贡献大部分论文
+#   每篇论文的作者数：1..MAX_AUTHORS上的Zipf分布
+#   学科、研究主题、方法、应用场景、期刊的热门程度
+# 逐篇生成并写入文件，内存中只保留各实体池的累积权重（学者池每人8字节），数据集可远大于内存
+# 相同的参数和随机种子生成完全相同的文件
+
+# 二级学科（作者唯一标识取第一个学科英文名首个单词的前3个字母）
+DISCIPLINES = [
+    ("Vibration Engineering", "振动工程"), ("Mechanical Engineering", "机械工程"),
+    ("Computer Science", "计算机科学"), ("Control Engineering", "控制工程"),
+    ("Materials Science", "材料科学"), ("Civil Engineering", "土木工程"),
+    ("Electrical Engineering", "电气工程"), ("Aerospace Engineering", "航空航天工程"),
+    ("Transportation Engineering", "交通运输工程"), ("Power Engineering", "动力工程"),
+    ("Acoustics", "声学"), ("Applied Mathematics", "应用数学"),
+    ("Ocean Engineering", "船舶与海洋工程"), ("Instrument Science", "仪器科学"),
+    ("Environmental Engineering", "环境工程"), ("Biomedical Engineering", "生物医学工程"),
+]
+# 研究主题、方法、应用场景的名称由修饰词和中心词组合而成，中英文一一对应
+TOPIC_WORDS = (
+    [("Nonlinear", "非线性"), ("Random", "随机"), ("Active", "主动"), ("Structural", "结构"), ("Multiscale", "多尺度"),
+     ("Dynamic", "动态"), ("Adaptive", "自适应"), ("Distributed", "分布式"), ("Thermal", "热"), ("Intelligent", "智能"),
+     ("Robust", "鲁棒"), ("Coupled", "耦合"), ("Fractional", "分数阶"), ("Composite", "复合"), ("Micro", "微")],
+    [("Vibration", "振动"), ("Damping", "阻尼"), ("Modal analysis", "模态分析"), ("Fault diagnosis", "故障诊断"),
+     ("Noise control", "噪声控制"), ("Stability", "稳定性"), ("Fatigue", "疲劳"), ("Wave propagation", "波传播"),
+     ("Health monitoring", "健康监测"), ("Isolation", "隔振"), ("Identification", "识别"), ("Optimization", "优化"),
+     ("Energy harvesting", "能量采集"), ("Rotor dynamics", "转子动力学"), ("Impact", "冲击"), ("Contact", "接触"),
+     ("Friction", "摩擦"), ("Control", "控制"), ("Metamaterials", "超材料"), ("Reliability", "可靠性")],
+)
+METHOD_WORDS = (
+    [("Improved", "改进"), ("Adaptive", "自适应"), ("Parallel", "并行"), ("Multi-fidelity", "多保真度"),
+     ("Physics-informed", "物理信息"), ("Sparse", "稀疏"), ("Hybrid", "混合"), ("Data-driven", "数据驱动")],
+    [("Finite element method", "有限元法"), ("Deep learning", "深度学习"), ("Bayesian inference", "贝叶斯推断"),
+     ("Wavelet transform", "小波变换"), ("Monte Carlo simulation", "蒙特卡洛模拟"), ("Reduced-order modeling", "降阶建模"),
+     ("Kalman filtering", "卡尔曼滤波"), ("Modal testing", "模态试验"), ("Empirical mode decomposition", "经验模态分解"),
+     ("Boundary element method", "边界元法")],
+)
+SCENARIO_WORDS = (
+    [("High-speed", "高速"), ("Offshore", "海上"), ("Urban", "城市"), ("Large-span", "大跨度"), ("Aircraft", "飞机"),
+     ("Automotive", "汽车"), ("Wind", "风力"), ("Nuclear", "核电"), ("Underground", "地下"), ("Precision", "精密")],
+    [("railway", "铁路"), ("bridges", "桥梁"), ("buildings", "建筑"), ("turbines", "涡轮机"), ("pipelines", "管道"),
+     ("engines", "发动机"), ("gearboxes", "齿轮箱"), ("machine tools", "机床"), ("platforms", "平台"), ("vehicles", "车辆")],
+)
+JOURNAL_WORDS = (
+    ["Journal of", "International Journal of", "Advances in", "Transactions on", "Mechanical Systems and"],
+    ["Sound and Vibration", "Applied Mechanics", "Structural Dynamics", "Engineering Structures", "Signal Processing",
+     "Nonlinear Dynamics", "Vibration and Control", "Machine Learning", "Composite Materials", "Acoustics"],
+)
+# 学者姓名：常见姓氏与名字音节（拼音及对应汉字），外籍学者没有中文名
+SURNAMES = [
+    ("Wang", "王"), ("Li", "李"), ("Zhang", "张"), ("Liu", "刘"), ("Chen", "陈"), ("Yang", "杨"), ("Huang", "黄"),
+    ("Zhao", "赵"), ("Wu", "吴"), ("Zhou", "周"), ("Xu", "徐"), ("Sun", "孙"), ("Ma", "马"), ("Zhu", "朱"),
+    ("Hu", "胡"), ("Guo", "郭"), ("He", "何"), ("Lin", "林"), ("Gao", "高"), ("Luo", "罗"), ("Zheng", "郑"),
+    ("Liang", "梁"), ("Xie", "谢"), ("Song", "宋"), ("Tang", "唐"), ("Han", "韩"), ("Feng", "冯"), ("Deng", "邓"),
+    ("Cao", "曹"), ("Peng", "彭"), ("Zeng", "曾"), ("Xiao", "肖"), ("Tian", "田"), ("Dong", "董"), ("Pan", "潘"),
+    ("Yuan", "袁"), ("Cai", "蔡"), ("Jiang", "蒋"), ("Yu", "余"), ("Du", "杜"),
+]
+GIVEN_SYLLABLES = [
+    ("wei", "伟"), ("fang", "芳"), ("min", "敏"), ("jing", "静"), ("li", "丽"), ("qiang", "强"), ("lei", "磊"),
+    ("jun", "军"), ("yang", "洋"), ("yong", "勇"), ("yan", "艳"), ("jie", "杰"), ("tao", "涛"), ("ming", "明"),
+    ("chao", "超"), ("hua", "华"), ("ping", "平"), ("gang", "刚"), ("hui", "辉"), ("dan", "丹"), ("xin", "鑫"),
+    ("bo", "波"), ("peng", "鹏"), ("hao", "浩"), ("kai", "凯"), ("lin", "林"), ("long", "龙"), ("feng", "峰"),
+    ("yu", "宇"), ("zhen", "震"), ("xiang", "翔"), ("rui", "瑞"), ("chen", "晨"), ("yi", "毅"), ("qing", "青"),
+    ("hong", "红"), ("bin", "斌"), ("ning", "宁"), ("jian", "健"), ("song", "松"),
+]
+FOREIGN_FAMILY = ["Smith", "Müller", "Tanaka", "Kim", "Rossi", "García", "Dubois", "Novak", "Ivanov", "Singh",
+                  "Johnson", "Nakamura", "Silva", "Andersen", "Kowalski", "Brown", "Schmidt", "Park", "Costa", "Lee"]
+FOREIGN_GIVEN = ["John", "Anna", "Hiroshi", "Marco", "Elena", "David", "Sophie", "Pavel", "Maria", "Thomas",
+                 "Yuki", "Lukas", "Sara", "Michael", "Ji-ho", "Laura", "Raj", "Olga", "Peter", "Emma"]
+TITLE_PATTERNS = ["{topic} of {scenario} based on {method}", "{method}-based approach to {topic} in {scenario}",
+                  "On the {topic} of {scenario}", "{topic} analysis using {method}",
+                  "Experimental study on {topic} for {scenario}"]
+
+# 默认分布参数
+AUTHOR_ZIPF = 0.6       # 学者发文量（按发文量排名的Zipf指数，对应Lotka定律中指数约为2.7的幂律）
+AUTHORS_ZIPF = 1.0      # 每篇论文的作者数（平均约3.9人，单作者约占1/3）
+TOPIC_ZIPF = 1.0        # 学科、主题、方法、场景、期刊的热门程度
+MAX_AUTHORS = 12
+FOREIGN_RATIO = 0.15    # 没有中文名的学者比例
+YEARS = (2000, 2024)
+# 学者姓名的编码空间：姓氏 × 1~2个名字音节，学者池超出时再用3个音节；
+# 步长与两段编码空间的大小都互素，编号乘以步长取模即为段内的一个置换
+NAME_TIERS = (len(SURNAMES) * (len(GIVEN_SYLLABLES) + len(GIVEN_SYLLABLES) ** 2), len(SURNAMES) * len(GIVEN_SYLLABLES) ** 3)
+NAME_STRIDE = 104729
+
+
+class Zipf:
+    """在 0..n-1 上按 P(k) ∝ 1/(k+1)^s 抽样：累积权重存为float64数组，每次抽样二分查找"""
+    def __init__(self, n: int, s: float):
+        self.cumulative = array('d')
+        total = 0.0
+        for k in range(n):
+            total += 1.0 / (k + 1) ** s
+            self.cumulative.append(total)
+
+    def __len__(self):
+        return len(self.cumulative)
+
+    def sample(self, rng: random.Random) -> int:
+        return min(bisect.bisect(self.cumulative, rng.random() * self.cumulative[-1]), len(self.cumulative) - 1)
+
+    def sample_distinct(self, rng: random.Random, k: int) -> List[int]:
+        """抽取最多k个不同的编号（热门的排在前面的概率更大），池中不足k个时全部返回"""
+        k = min(k, len(self))
+        picked = []
+        attempts = 0
+        while len(picked) < k and attempts < k * 10:
+            index = self.sample(rng)
+            if index not in picked:
+                picked.append(index)
+            attempts += 1
+        return picked
+
+
+def compose(words: Tuple[List, List], index: int) -> Tuple[str, str]:
+    """按编号组合修饰词和中心词：编号0..len(中心词)-1为单独的中心词，之后为 修饰词 + 中心词"""
+    modifiers, heads = words
+    head_en, head_zh = heads[index % len(heads)]
+    if index < len(heads):
+        return head_en, head_zh
+    mod_en, mod_zh = modifiers[(index // len(heads) - 1) % len(modifiers)]
+    return f"{mod_en} {head_en.lower()}", f"{mod_zh}{head_zh}"
+
+
+def vocabulary(words: Tuple[List, List]) -> List[Tuple[str, str]]:
+    """全部组合的中英文名称列表，热门程度按列表顺序"""
+    modifiers, heads = words
+    return [compose(words, i) for i in range(len(heads) * (len(modifiers) + 1))]
+
+
+class SyntheticDataset:
+    def __init__(self, articles: int, authors: int = None, journals: int = None, seed: int = 42,
+                 author_zipf: float = AUTHOR_ZIPF, authors_zipf: float = AUTHORS_ZIPF, topic_zipf: float = TOPIC_ZIPF,
+                 max_authors: int = MAX_AUTHORS, foreign_ratio: float = FOREIGN_RATIO, years: Tuple[int, int] = YEARS):
+        """
+        :param articles: 论文数
+        :param authors: 学者总数，默认为论文数的一半（按学科热门程度分到各学科的学者池）
+        :param journals: 期刊数，默认随论文数增长（至少50种）
+        :param seed: 随机种子，相同参数和种子生成相同的数据集
+        """
+        self.articles = articles
+        self.authors = authors or max(articles // 2, 10)
+        self.seed = seed
+        self.max_authors = max_authors
+        self.foreign_ratio = foreign_ratio
+        self.years = years
+
+        self.topics = vocabulary(TOPIC_WORDS)
+        self.methods = vocabulary(METHOD_WORDS)
+        self.scenarios = vocabulary(SCENARIO_WORDS)
+        self.discipline_dist = Zipf(len(DISCIPLINES), topic_zipf)
+        self.topic_dist = Zipf(len(self.topics), topic_zipf)
+        self.method_dist = Zipf(len(self.methods), topic_zipf)
+        self.scenario_dist = Zipf(len(self.scenarios), topic_zipf)
+        self.count_dist = Zipf(max_authors, authors_zipf)
+
+        journal_count = journals or max(50, int(math.sqrt(articles) * 2))
+        self.journal_dist = Zipf(journal_count, topic_zipf)
+        self.journals = [self.make_journal(i) for i in range(journal_count)]
+
+        # 各学科的学者池：大小按学科热门程度分配，池内编号越小发文越多；offsets为各学科在全局学者编号中的起点
+        weights = [self.discipline_dist.cumulative[0]] + [
+            b - a for a, b in zip(self.discipline_dist.cumulative, self.discipline_dist.cumulative[1:])]
+        total = self.discipline_dist.cumulative[-1]
+        sizes = [max(1, int(self.authors * w / total)) for w in weights]
+        self.pools = [Zipf(size, author_zipf) for size in sizes]
+        self.offsets = [0]
+        for size in sizes:
+            self.offsets.append(self.offsets[-1] + size)
+        # 各学者的论文数（全局编号），用于生成结束后统计偏斜程度
+        self.papers = array('I', bytes(4 * self.offsets[-1]))
+
+        # 年份：越近的年份论文越多（权重随年份线性增长）
+        self.year_list = list(range(years[0], years[1] + 1))
+        self.year_weights = list(range(1, len(self.year_list) + 1))
+
+    def make_journal(self, index: int) -> Dict:
+        """期刊名称、ISSN和影响因子只由编号和种子决定，热门期刊的影响因子偏高"""
+        rng = random.Random(f"{self.seed}-journal-{index}")
+        prefix = JOURNAL_WORDS[0][index % len(JOURNAL_WORDS[0])]
+        subject = JOURNAL_WORDS[1][(index // len(JOURNAL_WORDS[0])) % len(JOURNAL_WORDS[1])]
+        series = index // (len(JOURNAL_WORDS[0]) * len(JOURNAL_WORDS[1]))
+        name = f"{prefix} {subject}" + (f" {chr(ord('A') + series % 26)}{series // 26 or ''}" if series else "")
+        return {
+            "name": name,
+            "issn": f"{rng.randrange(10000):04d}-{rng.randrange(1000):03d}{rng.choice('0123456789X')}",
+            "impact_factor": round(rng.lognormvariate(1.0, 0.6) / (1 + index / 200), 3),
+        }
+
+    def author(self, discipline: int, index: int) -> Dict:
+        """
+        学科学者池中第index位学者的姓名：由编号确定，同一学者在各篇论文中姓名相同（即作者唯一标识相同）
+        编号先经过一个置换打散（相邻编号的姓名没有规律），再按姓氏、名字音节逐位解码，
+        池内不超过sum(NAME_TIERS)位学者时姓名互不相同
+        """
+        offset = discipline * 7919 + self.seed
+        if index < NAME_TIERS[0]:
+            code = (index * NAME_STRIDE + offset) % NAME_TIERS[0]
+        else:
+            code = NAME_TIERS[0] + ((index - NAME_TIERS[0]) * NAME_STRIDE + offset) % NAME_TIERS[1]
+        if (index * 2654435761 + offset) % 1000 < self.foreign_ratio * 1000:
+            family, code = FOREIGN_FAMILY[code % len(FOREIGN_FAMILY)], code // len(FOREIGN_FAMILY)
+            given, code = FOREIGN_GIVEN[code % len(FOREIGN_GIVEN)], code // len(FOREIGN_GIVEN)
+            initials = []
+            while code:
+                initials.append(chr(ord('A') + code % 26) + ".")
+                code //= 26
+            return {"family": family, "given": " ".join([given] + initials)}
+        surname, code = SURNAMES[code % len(SURNAMES)], code // len(SURNAMES)
+        # 名字音节数随解码后的编号增长：1个音节、2个音节、3个音节依次排列
+        syllables = []
+        count, base = 1, len(GIVEN_SYLLABLES)
+        while code >= base and count < 3:
+            code -= base
+            count += 1
+            base *= len(GIVEN_SYLLABLES)
+        for _ in range(count):
+            syllables.append(GIVEN_SYLLABLES[code % len(GIVEN_SYLLABLES)])
+            code //= len(GIVEN_SYLLABLES)
+        return {
+            "family": surname[0],
+            "given": "".join(s[0] for s in syllables).capitalize(),
+            "chinese_name": surname[1] + "".join(s[1] for s in syllables),
+        }
+
+    def article(self, rng: random.Random, number: int) -> Dict:
+        disciplines = self.discipline_dist.sample_distinct(rng, rng.choice((1, 1, 1, 2)))
+        home = disciplines[0]
+        pool = self.pools[home]
+        members = pool.sample_distinct(rng, self.count_dist.sample(rng) + 1)
+        authors = []
+        for member in members:
+            self.papers[self.offsets[home] + member] += 1
+            authors.append(self.author(home, member))
+
+        topics = [self.topics[i] for i in self.topic_dist.sample_distinct(rng, rng.randint(1, 3))]
+        methods = [self.methods[i] for i in self.method_dist.sample_distinct(rng, rng.randint(1, 2))]
+        scenarios = [self.scenarios[i] for i in self.scenario_dist.sample_distinct(rng, rng.randint(0, 2))]
+        journal = self.journals[self.journal_dist.sample(rng)]
+        year = rng.choices(self.year_list, self.year_weights)[0]
+        title = rng.choice(TITLE_PATTERNS).format(
+            topic=topics[0][0].lower(), method=methods[0][0].lower(),
+            scenario=(scenarios[0][0] if scenarios else "engineering structures").lower())
+        return {
+            "id": f"syn-{self.seed}-{number}",
+            "title": title[0].upper() + title[1:],
+            "date_parts": [[year]],
+            "keywords": [t[0].lower() for t in topics] + [m[0].lower() for m in methods],
+            "abstract": f"This paper studies {topics[0][0].lower()} with {methods[0][0].lower()}.",
+            "language": "zh" if rng.random() < 0.3 else "en",
+            "container_title": journal["name"],
+            "ISSN_ISBN": journal["issn"],
+            "impact_factor": journal["impact_factor"],
+            "author": authors,
+            "class_en": {
+                "Secondary disciplines": [DISCIPLINES[i][0] for i in disciplines],
+                "Research direction clusters": [t[0] for t in topics],
+                "Methods and technologies": [m[0] for m in methods],
+                "Application scenarios": [s[0] for s in scenarios],
+            },
+            "class_zh": {
+                "二级学科": [DISCIPLINES[i][1] for i in disciplines],
+                "研究主题": [t[1] for t in topics],
+                "方法技术": [m[1] for m in methods],
+                "应用场景": [s[1] for s in scenarios],
+            },
+        }
+
+    def __iter__(self) -> Iterator[Dict]:
+        rng = random.Random(self.seed)
+        for number in range(self.articles):
+            yield self.article(rng, number)
+
+    def write(self, path: str, progress: int = 100000) -> Dict:
+        """
+        逐篇写入文件：.jsonl/.ndjson 每行一篇，其余写成顶层JSON数组（与data.json格式相同）
+        :return: 生成统计（论文数、学者数、发文最多的1%学者的论文占比等）
+        """
+        start = time.perf_counter()
+        lines = path.endswith(('.jsonl', '.ndjson'))
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            if not lines:
+                f.write("[\n")
+            for number, article in enumerate(self):
+                if number and not lines:
+                    f.write(",\n")
+                f.write(json.dumps(article, ensure_ascii=False))
+                if lines:
+                    f.write("\n")
+                if progress and (number + 1) % progress == 0:
+                    print(f"已生成{number + 1}篇论文")
+            if not lines:
+                f.write("\n]\n")
+        return self.summary(time.perf_counter() - start, os.path.getsize(path))
+
+    def summary(self, seconds: float, size: int) -> Dict:
+        counts = sorted((c for c in self.papers if c), reverse=True)
+        slots = sum(counts)
+        top = counts[:max(1, len(counts) // 100)]
+        return {
+            "articles": self.articles,
+            "authors": len(counts),
+            "author_slots": slots,
+            "top1pct_share": sum(top) / slots if slots else 0.0,
+            "max_papers": counts[0] if counts else 0,
+            "seconds": seconds,
+            "bytes": size,
+        }
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='生成与data.json格式相同的合成论文数据集（学者发文量、作者数、主题热度为Zipf分布）')
+    parser.add_argument('--articles', type=int, default=100000, help='论文数')
+    parser.add_argument('--authors', type=int, default=None, help='学者总数，默认为论文数的一半')
+    parser.add_argument('--journals', type=int, default=None, help='期刊数，默认随论文数增长')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser.add_argument('--author-zipf', type=float, default=AUTHOR_ZIPF, help='学者发文量的Zipf指数')
+    parser.add_argument('--authors-zipf', type=float, default=AUTHORS_ZIPF, help='每篇论文作者数的Zipf指数')
+    parser.add_argument('--topic-zipf', type=float, default=TOPIC_ZIPF, help='学科/主题/方法/场景/期刊热门程度的Zipf指数')
+    parser.add_argument('--output', default='data/synthetic.jsonl', help='输出文件（.jsonl每行一篇，.json为JSON数组）')
+    args = parser.parse_args()
+
+    dataset = SyntheticDataset(args.articles, args.authors, args.journals, args.seed,
+                               args.author_zipf, args.authors_zipf, args.topic_zipf)
+    output = os.path.join(os.path.dirname(os.path.abspath(__file__)), args.output)
+    stats = dataset.write(output)
+    print(f"已生成{stats['articles']}篇论文，{stats['authors']}位学者（署名{stats['author_slots']}次），"
+          f"发文最多的1%学者占署名的{stats['top1pct_share']:.1%}（最多{stats['max_papers']}篇），"
+          f"文件{stats['bytes'] / 1e6:.1f}MB，耗时{stats['seconds']:.1f}秒")
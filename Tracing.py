@@ -0,0 +1,253 @@
+import json
+import time
+import bisect
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# 问答流程的分阶段耗时跟踪与指标统计：
+#   每个问题一个Trace，各阶段（预处理、问答缓存、意图识别、生成查询、图谱查询、生成回答）各一个Span，
+#   结束时把阶段耗时计入直方图，并可把整个问题的跟踪记录写成一行JSON；
+#   计数器（大模型token数、缓存命中/未命中等）与直方图（阶段耗时、每个查询返回的行数）可导出为Prometheus文本格式或JSON
+# 未启用时span()/trace()返回同一个空操作对象，count()/observe()在第一行返回，几乎没有额外开销
+
+# 耗时直方图的桶上界（秒）
+LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# 行数直方图的桶上界
+ROW_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000)
+QUANTILES = (0.5, 0.95, 0.99)
+METRIC_PREFIX = "scholarqa_"
+
+
+class Histogram:
+    """固定分桶的直方图：内存占用与观测次数无关，分位数在所在桶内线性插值估计（与Prometheus的histogram_quantile相同）"""
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 最后一个桶为 +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            if count and cumulative + count >= rank:
+                lower = self.buckets[i - 1] if i > 0 else min(self.min, 0)
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                value = lower + (upper - lower) * (rank - cumulative) / count
+                # 插值结果不超出实际观测到的范围
+                return min(max(value, self.min), self.max)
+            cumulative += count
+        return self.max
+
+
+def label_text(labels: Tuple[Tuple[str, str], ...], extra: str = "") -> str:
+    parts = [f'{key}="{value}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class NullSpan:
+    """未启用时使用的空操作对象，同时充当Trace和Span"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def span(self, name: str, **attrs) -> 'NullSpan':
+        return self
+
+    def set(self, **attrs):
+        pass
+
+    def finish(self):
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    def __init__(self, trace: 'Trace', name: str, attrs: Dict):
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.trace.add(self.name, seconds, self.attrs)
+        return False
+
+    def set(self, **attrs):
+        """补充本阶段的属性（如返回行数、缓存是否命中），写入JSON跟踪记录"""
+        self.attrs.update(attrs)
+
+
+class Trace:
+    """一个问题的完整跟踪记录"""
+    def __init__(self, tracer: 'Tracer', name: str, attrs: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.spans: List[Dict] = []
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+
+    def span(self, name: str, **attrs) -> Span:
+        return Span(self, name, attrs)
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def add(self, name: str, seconds: float, attrs: Dict):
+        self.spans.append({"name": name, "ms": round(seconds * 1000, 3), **attrs})
+        self.tracer.observe("stage_seconds", seconds, stage=name)
+
+    def finish(self):
+        """结束跟踪：记录总耗时，写入JSON跟踪日志"""
+        seconds = time.perf_counter() - self.start
+        self.tracer.observe("stage_seconds", seconds, stage=self.name)
+        self.tracer.log({"trace": self.name, "time": self.started_at, "ms": round(seconds * 1000, 3),
+                         **self.attrs, "spans": self.spans})
+
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        # 指标名 -> {标签元组: 计数 / Histogram}
+        self.counters: Dict[str, Dict[Tuple, float]] = {}
+        self.histograms: Dict[str, Dict[Tuple, Histogram]] = {}
+        self.log_file = None
+
+    def enable(self, log_path: Optional[str] = None):
+        """启用跟踪；log_path不为None时每个问题的跟踪记录追加一行JSON到该文件"""
+        self.enabled = True
+        if log_path and self.log_file is None:
+            self.log_file = open(log_path, 'a', encoding='utf-8')
+
+    def trace(self, name: str, **attrs):
+        if not self.enabled:
+            return NULL_SPAN
+        return Trace(self, name, attrs)
+
+    def count(self, name: str, value: float = 1, **labels):
+        """计数器加value（如token数、缓存命中次数）"""
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """直方图记录一次观测值；名称以_seconds结尾的按耗时分桶，其余按行数分桶"""
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(LATENCY_BUCKETS if name.endswith("_seconds") else ROW_BUCKETS)
+            histogram.observe(value)
+
+    def record_usage(self, stage: str, usage):
+        """记录一次大模型调用的token用量（响应中的usage字段，流式响应只在最后一段中带有）"""
+        if not self.enabled or usage is None:
+            return
+        self.count("llm_tokens_total", getattr(usage, "prompt_tokens", 0) or 0, stage=stage, kind="prompt")
+        self.count("llm_tokens_total", getattr(usage, "completion_tokens", 0) or 0, stage=stage, kind="completion")
+        self.count("llm_calls_total", stage=stage)
+
+    def log(self, record: Dict):
+        if self.log_file is None:
+            return
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self.lock:
+            self.log_file.write(line + "\n")
+            self.log_file.flush()
+
+    def snapshot(self) -> Dict:
+        """JSON格式的全部指标：计数器取值，直方图的次数、总和与p50/p95/p99"""
+        with self.lock:
+            counters = {name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                        for name, series in self.counters.items()}
+            histograms = {}
+            for name, series in self.histograms.items():
+                histograms[name] = [{
+                    "labels": dict(key),
+                    "count": h.count,
+                    "sum": h.sum,
+                    **{f"p{int(q * 100)}": h.quantile(q) for q in QUANTILES},
+                } for key, h in series.items()]
+        return {"counters": counters, "histograms": histograms}
+
+    def export_prometheus(self) -> str:
+        """Prometheus文本格式（可由node_exporter的textfile收集器读取）"""
+        lines = []
+        with self.lock:
+            for name, series in sorted(self.counters.items()):
+                metric = METRIC_PREFIX + name
+                lines.append(f"# TYPE {metric} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{metric}{label_text(key)} {value:g}")
+            for name, series in sorted(self.histograms.items()):
+                metric = METRIC_PREFIX + name
+                lines.append(f"# TYPE {metric} histogram")
+                for key, h in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(h.buckets + (float("inf"),), h.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                        lines.append(f"{metric}_bucket{label_text(key, 'le=' + json.dumps(le))} {cumulative}")
+                    lines.append(f"{metric}_sum{label_text(key)} {h.sum:g}")
+                    lines.append(f"{metric}_count{label_text(key)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.export_prometheus())
+
+    def report(self) -> str:
+        """各阶段耗时分位数表，供退出时输出"""
+        lines = [f"{'阶段':<14}{'次数':>6}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}"]
+        with self.lock:
+            series = self.histograms.get("stage_seconds", {})
+            for key, h in sorted(series.items(), key=lambda item: -item[1].sum):
+                stage = dict(key).get("stage", "")
+                p50, p95, p99 = (h.quantile(q) * 1000 for q in QUANTILES)
+                lines.append(f"{stage:<14}{h.count:>6}{p50:>10.1f}{p95:>10.1f}{p99:>10.1f}")
+            tokens = self.counters.get("llm_tokens_total", {})
+        if tokens:
+            lines.append("大模型token：" + "，".join(
+                f"{dict(key)['stage']}/{dict(key)['kind']} {value:g}" for key, value in sorted(tokens.items())))
+        return "\n".join(lines)
+
+    def close(self):
+        if self.log_file is not None:
+            self.log_file.close()
+            self.log_file = None
+
+
+# 进程内共享的跟踪器，默认不启用（由ScholarQASystem按Config.METRICS_ENABLED启用）
+tracer = Tracer()
@@ -0,0 +1,113 @@
+"""
+意图分派的微基准：对比逐个关键词列表线性查找的if/elif链与编译后的多模式自动机 + 分派表
+用法：python -m benchmarks.dispatch --repeat 200
+"""
+import time
+import argparse
+from KGQuery import CypherGenerator
+from CypherTemplates import DISPATCH_PRIORITY
+
+# 意图文本语料：大模型常返回的意图描述 + 各关键词的简单问法
+LLM_INTENTS = [
+    "查询学者的论文列表", "查询合作学者", "查询研究领域", "查询发表期刊", "查询作者列表", "查询发表时间",
+    "查询关键词", "查询所属领域", "查询涉及主题", "查询使用方法", "查询应用场景", "查询发表论文",
+    "查询影响因子", "查询相关论文", "查询研究学者", "查询应用学者", "查询论文摘要", "查询研究主题的发表数量",
+    "查询期刊的影响因子和发表论文", "未识别的意图",
+]
+
+
+def chain_dispatch(gen: CypherGenerator, entity_type: str, intent: str):
+    """改造前generate_for_intent中的if/elif判断链（只返回意图类别），作为对照"""
+    if entity_type == "Author":
+        if gen.check_words(gen.topic_qwds, intent): return "topic"
+        elif gen.check_words(gen.discipline_qwds, intent): return "discipline"
+        elif gen.check_words(gen.journal_qwds, intent): return "journal"
+        elif gen.check_words(gen.method_qwds, intent): return "method"
+        elif gen.check_words(gen.scenario_qwds, intent): return "scenario"
+        elif gen.check_words(gen.paper_qwds, intent): return "paper"
+        elif gen.check_words(gen.collab_qwds, intent): return "collab"
+    elif entity_type == "Article":
+        if gen.check_words(gen.abstract_qwds, intent): return "abstract"
+        elif gen.check_words(gen.author_qwds, intent): return "author"
+        elif gen.check_words(gen.journal_qwds, intent): return "journal"
+        elif gen.check_words(gen.time_qwds, intent): return "time"
+        elif gen.check_words(gen.keyword_qwds, intent): return "keyword"
+        elif gen.check_words(gen.discipline_qwds, intent): return "discipline"
+        elif gen.check_words(gen.topic_qwds, intent): return "topic"
+        elif gen.check_words(gen.method_qwds, intent): return "method"
+        elif gen.check_words(gen.scenario_qwds, intent): return "scenario"
+    elif entity_type == "Topic":
+        if gen.check_words(gen.paper_qwds, intent): return "paper"
+        elif gen.check_words(gen.author_qwds, intent): return "author"
+    elif entity_type == "Journal":
+        if gen.check_words(gen.paper_qwds, intent): return "paper"
+        elif gen.check_words(gen.factor_qwds, intent): return "factor"
+    elif entity_type == "Discipline":
+        if gen.check_words(gen.paper_qwds, intent): return "paper"
+        elif gen.check_words(gen.author_qwds, intent): return "author"
+    elif entity_type == "Method":
+        if gen.check_words(gen.author_qwds, intent): return "author"
+        elif gen.check_words(gen.paper_qwds, intent): return "paper"
+    elif entity_type == "Scenario":
+        if gen.check_words(gen.paper_qwds, intent): return "paper"
+        elif gen.check_words(gen.author_qwds, intent): return "author"
+    return None
+
+
+def table_dispatch(gen: CypherGenerator, entity_type: str, intent: str):
+    """自动机 + 分派表（与CypherGenerator.generate_for_intent相同的判断逻辑，只返回意图类别）"""
+    categories = gen.match_categories(intent)
+    for category, _ in gen.dispatch.get(entity_type, []):
+        if category in categories:
+            return category
+    return None
+
+
+def table_dispatch_cold(gen: CypherGenerator, entity_type: str, intent: str):
+    """同table_dispatch，但每次都重新扫描意图文本（不使用意图文本缓存）"""
+    categories = gen.keyword_matcher.find_values(intent)
+    for category, _ in gen.dispatch.get(entity_type, []):
+        if category in categories:
+            return category
+    return None
+
+
+def build_corpus(gen: CypherGenerator):
+    intents = list(LLM_INTENTS)
+    for words in gen.keyword_lists().values():
+        intents.extend(f"查询{word}" for word in words)
+    return [(entity_type, intent) for entity_type in DISPATCH_PRIORITY for intent in intents]
+
+
+def bench(fn, gen, corpus, repeat: int) -> float:
+    """返回每次分派的平均耗时（微秒）"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for entity_type, intent in corpus:
+            fn(gen, entity_type, intent)
+    return (time.perf_counter() - start) * 1e6 / (repeat * len(corpus))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='意图分派方式的性能对比')
+    parser.add_argument('--repeat', type=int, default=200, help='语料重复次数')
+    args = parser.parse_args()
+
+    gen = CypherGenerator()
+    corpus = build_corpus(gen)
+    mismatches = [(t, i) for t, i in corpus if chain_dispatch(gen, t, i) != table_dispatch(gen, t, i)]
+    print(f"语料：{len(corpus)}条（实体类型, 意图）组合，分派结果不一致：{len(mismatches)}条")
+    for entity_type, intent in mismatches[:10]:
+        print(f"  {entity_type} {intent}: 判断链={chain_dispatch(gen, entity_type, intent)} "
+              f"分派表={table_dispatch(gen, entity_type, intent)}")
+
+    chain = bench(chain_dispatch, gen, corpus, args.repeat)
+    cold = bench(table_dispatch_cold, gen, corpus, args.repeat)
+    warm = bench(table_dispatch, gen, corpus, args.repeat)
+    print(f"if/elif判断链：{chain:.2f}微秒/次")
+    print(f"自动机+分派表（每次扫描）：{cold:.2f}微秒/次（判断链的{chain / cold:.2f}倍速度）")
+    print(f"自动机+分派表（意图文本缓存）：{warm:.2f}微秒/次（判断链的{chain / warm:.2f}倍速度）")
+
+
+if __name__ == '__main__':
+    main()
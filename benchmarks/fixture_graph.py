@@ -0,0 +1,186 @@
+"""
+图谱替身：在内存中执行ScholarGraph批量导入写出的UNWIND语句（按merge键合并节点和关系）
+及增量导入清理旧数据的语句（学者汇总除外），并响应图谱版本号和快照导出（GraphSnapshot.export_snapshot）的读取语句，使导入和问答流程都能在没有Neo4j的情况下运行
+- 导入：FixturePool可直接传给ScholarGraph，测得的是客户端（读取、拆分、组装批次）的导入速度，不含Neo4j写入耗时
+- 查询：导入后用export_snapshot导出快照，KGQueryExecutor以快照后端查询
+替身按语句文本识别BULK_QUERIES中的语句，用Python重新实现其效果，并不执行Cypher；AUTHOR_SUMMARY不做任何处理。
+用替身运行的测试只检查导入流程（批次划分、清单、旧数据清理的调用顺序），Cypher本身的正确性由
+tests/test_neo4j_ingest.py 在真实的Neo4j上检查（需设置NEO4J_TEST_URI，否则跳过）
+"""
+import re
+import threading
+from typing import Dict, List, Optional
+from build_graph import BULK_QUERIES, CLASSIFICATIONS, EXISTING_ARTICLES_QUERY
+from GraphPool import GraphPool
+
+# 各标签的merge键
+NODE_KEYS = {'Article': 'id', 'Journal': 'name', 'Author': 'unique_id'}
+NODE_KEYS.update({label: 'english_name' for _, _, label, _ in CLASSIFICATIONS})
+# 关系语句：关系类型 -> (起点标签, 起点键字段, 终点标签, 终点键字段)
+REL_ROWS = {
+    'BE_PUBLISHED_IN': ('Article', 'article_id', 'Journal', 'journal'),
+    'PUBLISH': ('Author', 'author_id', 'Article', 'article_id'),
+    'COLLABORATE': ('Author', 'source', 'Author', 'target'),
+}
+REL_ROWS.update({rel: ('Article', 'article_id', label, 'english_name') for _, _, label, rel in CLASSIFICATIONS})
+
+QUERY_KEYS = {" ".join(cypher.split()): key for key, cypher in BULK_QUERIES.items()}
+EXISTING_ARTICLES = " ".join(EXISTING_ARTICLES_QUERY.split())
+NODE_EXPORT = re.compile(r"MATCH \(n:(\w+)\) RETURN id\(n\) AS id, (.*)")
+REL_EXPORT = re.compile(r"MATCH \(a:(\w+)\)-\[r:(\w+)\]->\(b:(\w+)\) RETURN id\(a\) AS s, id\(b\) AS t(.*)")
+FIELD = re.compile(r"\w+\.(\w+) AS (\w+)")
+
+
+class FixtureCursor(list):
+    """与py2neo的Cursor用法一致：可逐条迭代记录，也可用data()取出全部"""
+    def data(self) -> List[Dict]:
+        return list(self)
+
+
+class FixtureGraph:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.delete_all()
+
+    def delete_all(self):
+        # 节点：标签 -> {merge键取值: 属性}；节点id为 (标签, merge键取值) 在ids中的编号
+        self.nodes: Dict[str, Dict] = {label: {} for label in NODE_KEYS}
+        self.ids: Dict[tuple, int] = {}
+        # 关系：关系类型 -> {(起点id, 终点id): 属性}
+        self.rels: Dict[str, Dict] = {rel: {} for rel in REL_ROWS}
+        self.version = None
+
+    def node_id(self, label: str, key) -> int:
+        return self.ids.setdefault((label, key), len(self.ids))
+
+    # 事务接口：语句立即生效，commit/rollback不做任何事（导入基准不涉及回滚）
+    def begin(self) -> 'FixtureGraph':
+        return self
+
+    def commit(self, tx):
+        pass
+
+    def rollback(self, tx):
+        pass
+
+    def run(self, cypher: str, parameters: Optional[Dict] = None, **kwparameters) -> FixtureCursor:
+        params = dict(parameters or {}, **kwparameters)
+        text = " ".join(cypher.split())
+        with self.lock:
+            key = QUERY_KEYS.get(text)
+            if key in NODE_KEYS:
+                self.merge_nodes(key, params["rows"])
+            elif key in REL_ROWS:
+                self.merge_rels(key, params["rows"])
+            elif key == 'STALE_COLLABORATE':
+                self.recount_collaborations({row['article_id'] for row in params["rows"]})
+            elif key == 'STALE_RELATIONS':
+                self.delete_article_rels({row['article_id'] for row in params["rows"]})
+            elif text == EXISTING_ARTICLES:
+                return FixtureCursor({"id": i} for i in params["ids"] if i in self.nodes['Article'])
+            elif text.startswith("MERGE (m:GraphMeta"):
+                self.version = params["version"]
+            elif text.startswith("MATCH (m:GraphMeta"):
+                return FixtureCursor([{"version": self.version}] if self.version else [])
+            else:
+                match = NODE_EXPORT.fullmatch(text)
+                if match:
+                    return self.export_nodes(match.group(1), FIELD.findall(match.group(2)))
+                match = REL_EXPORT.fullmatch(text)
+                if match:
+                    return self.export_rels(match.group(2), FIELD.findall(match.group(4)))
+        # 其余语句（创建约束/索引、连接检测等）不需要模拟
+        return FixtureCursor()
+
+    def merge_nodes(self, label: str, rows: List[Dict]):
+        """MERGE (n:Label {键: row.键}) SET n += row（论文节点为SET n = row，整体替换属性）"""
+        nodes = self.nodes[label]
+        merge_key = NODE_KEYS[label]
+        for row in rows:
+            node = nodes.get(row[merge_key])
+            if node is None or label == 'Article':
+                nodes[row[merge_key]] = dict(row)
+                self.node_id(label, row[merge_key])
+            else:
+                node.update(row)
+
+    def merge_rels(self, rel: str, rows: List[Dict]):
+        """MATCH两端节点后MERGE关系；合作关系与BULK_QUERIES相同地累加次数、更新首次/最近年份"""
+        src, src_field, dst, dst_field = REL_ROWS[rel]
+        rels = self.rels[rel]
+        for row in rows:
+            if row[src_field] not in self.nodes[src] or row[dst_field] not in self.nodes[dst]:
+                continue
+            pair = (self.node_id(src, row[src_field]), self.node_id(dst, row[dst_field]))
+            props = rels.setdefault(pair, {})
+            if rel == 'COLLABORATE':
+                if not props:
+                    props.update(count=row['count'], first_year=row['first_year'], last_year=row['last_year'])
+                else:
+                    props['count'] += row['count']
+                    props['first_year'] = min(props['first_year'], row['first_year'])
+                    props['last_year'] = max(props['last_year'], row['last_year'])
+
+    def recount_collaborations(self, article_keys: set):
+        """STALE_COLLABORATE：这些论文作者之间的合作关系按其余合著论文重新统计，没有其余合著论文的删除"""
+        articles = {self.ids[('Article', key)] for key in article_keys if ('Article', key) in self.ids}
+        years = {self.ids[('Article', key)]: props.get('date') for key, props in self.nodes['Article'].items()}
+        papers = {}
+        for author, article in self.rels['PUBLISH']:
+            papers.setdefault(author, set()).add(article)
+        collaborate = self.rels['COLLABORATE']
+        for pair in list(collaborate):
+            shared = papers.get(pair[0], set()) & papers.get(pair[1], set())
+            if not shared & articles:
+                continue
+            rest = [int(years[q]) for q in shared - articles]
+            if rest:
+                collaborate[pair] = {'count': len(rest), 'first_year': min(rest), 'last_year': max(rest)}
+            else:
+                del collaborate[pair]
+
+    def delete_article_rels(self, article_keys: set):
+        """STALE_RELATIONS：删除这些论文的全部发表、期刊和分类关系"""
+        articles = {self.ids[('Article', key)] for key in article_keys if ('Article', key) in self.ids}
+        for rel, (src, _, _, _) in REL_ROWS.items():
+            if rel == 'COLLABORATE':
+                continue
+            side = 1 if src == 'Author' else 0
+            for pair in [pair for pair in self.rels[rel] if pair[side] in articles]:
+                del self.rels[rel][pair]
+
+    def export_nodes(self, label: str, fields: List[tuple]) -> FixtureCursor:
+        return FixtureCursor(
+            {"id": self.ids[(label, key)], **{alias: props.get(prop) for prop, alias in fields}}
+            for key, props in self.nodes.get(label, {}).items()
+        )
+
+    def export_rels(self, rel: str, fields: List[tuple]) -> FixtureCursor:
+        return FixtureCursor(
+            {"s": s, "t": t, **{alias: props.get(prop) for prop, alias in fields}}
+            for (s, t), props in self.rels.get(rel, {}).items()
+        )
+
+    def counts(self) -> Dict[str, int]:
+        counts = {label: len(nodes) for label, nodes in self.nodes.items()}
+        counts.update({rel: len(rels) for rel, rels in self.rels.items()})
+        return counts
+
+
+class FixtureSession:
+    """连接池中的一个会话：各会话是不同的对象（连接池按对象区分使用中的会话），操作都转给同一个FixtureGraph"""
+    def __init__(self, graph: FixtureGraph):
+        self.graph = graph
+
+    def __getattr__(self, name):
+        return getattr(self.graph, name)
+
+
+class FixturePool(GraphPool):
+    """会话都指向同一个FixtureGraph的连接池，可传给ScholarGraph和KGQueryExecutor"""
+    def __init__(self, graph: FixtureGraph, max_size: int = 8):
+        super().__init__(uri="fixture://", auth=("", ""), max_size=max_size)
+        self.graph = graph
+
+    def connect(self) -> FixtureSession:
+        return FixtureSession(self.graph)
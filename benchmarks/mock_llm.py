@@ -0,0 +1,137 @@
+"""
+本地模拟的OpenAI兼容大模型服务（POST /chat/completions），供基准测试在不消耗API额度、不依赖网络的情况下运行完整问答流程
+- 意图识别请求：按预先登记的 问题 -> 意图识别结果 返回JSON，未登记的问题返回空结果
+- 回答生成请求：返回固定长度的回答文本，支持流式（SSE）输出
+- 延迟可配置：首个token前的等待时间、之后每个token的间隔
+用法：
+    server = MockLLMServer(latency=0.3, token_delay=0.01).start()
+    analyzer = IntentAnalyzer(llm_client=server.client(), llm_async_client=server.async_client())
+"""
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+import openai
+
+ANSWER_TOKEN = "模拟回答。"
+
+
+class MockLLMServer:
+    def __init__(self, latency: float = 0.3, token_delay: float = 0.0, answer_tokens: int = 40,
+                 host: str = "127.0.0.1", port: int = 0):
+        """
+        :param latency: 收到请求到返回第一个token的时间（秒）
+        :param token_delay: 之后每个token的间隔（秒），非流式请求按 latency + token数 × token_delay 一次性返回
+        :param answer_tokens: 回答生成请求返回的token数
+        :param port: 监听端口，0表示自动选择空闲端口
+        """
+        self.latency = latency
+        self.token_delay = token_delay
+        self.answer_tokens = answer_tokens
+        # 问题 -> 意图识别结果 {"entities": [...], "intents": [...]}
+        self.analyses: Dict[str, Dict] = {}
+        self.lock = threading.Lock()
+        self.requests = {"intent": 0, "answer": 0}
+        self.httpd = ThreadingHTTPServer((host, port), self.handler_class())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'MockLLMServer':
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='mock-llm', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def client(self) -> openai.OpenAI:
+        return openai.OpenAI(api_key="mock", base_url=self.base_url, timeout=60)
+
+    def async_client(self) -> openai.AsyncOpenAI:
+        return openai.AsyncOpenAI(api_key="mock", base_url=self.base_url, timeout=60)
+
+    def register(self, question: str, analysis: Dict):
+        """登记一个问题的意图识别结果（问题为预处理后、发送给大模型的文本）"""
+        self.analyses[question] = analysis
+
+    def respond(self, request: Dict) -> Tuple[str, List[str], Dict]:
+        """根据请求内容生成回答：返回 (请求类型, 输出的token列表, token用量)"""
+        messages = request.get("messages", [])
+        content = messages[-1]["content"] if messages else ""
+        prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 2
+        if content.startswith("查询结果："):
+            kind, tokens = "answer", [ANSWER_TOKEN] * self.answer_tokens
+        else:
+            analysis = self.analyses.get(content, {"entities": [], "intents": []})
+            kind, tokens = "intent", [json.dumps(analysis, ensure_ascii=False)]
+        with self.lock:
+            self.requests[kind] += 1
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens),
+                 "total_tokens": prompt_tokens + len(tokens)}
+        return kind, tokens, usage
+
+    def handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self.send_error(404)
+                    return
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                kind, tokens, usage = server.respond(request)
+                model = request.get("model", "mock")
+                time.sleep(server.latency)
+                if request.get("stream"):
+                    self.stream(model, tokens, usage, request.get("stream_options") or {})
+                else:
+                    time.sleep(server.token_delay * len(tokens))
+                    self.send_json({
+                        "id": "mock", "object": "chat.completion", "created": int(time.time()), "model": model,
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": "".join(tokens)}}],
+                        "usage": usage,
+                    })
+
+            def send_json(self, body: Dict):
+                data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def stream(self, model: str, tokens: List[str], usage: Dict, options: Dict):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                base = {"id": "mock", "object": "chat.completion.chunk", "created": int(time.time()), "model": model}
+                for i, token in enumerate(tokens):
+                    if i:
+                        time.sleep(server.token_delay)
+                    self.event({**base, "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]})
+                self.event({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+                if options.get("include_usage"):
+                    self.event({**base, "choices": [], "usage": usage})
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+            def event(self, body: Dict):
+                self.wfile.write(b"data: " + json.dumps(body, ensure_ascii=False).encode("utf-8") + b"\n\n")
+                self.wfile.flush()
+
+        return Handler
@@ -0,0 +1,85 @@
+"""
+参数化查询模板与字符串拼接查询的耗时对比
+拼接方式下每个不同的实体名称都会产生一条新的查询文本，Neo4j需要重新解析和规划；
+参数化模板的查询文本固定，只在第一次执行时规划，之后命中服务端执行计划缓存
+用法：python -m benchmarks.plan_cache --names 50 --rounds 3
+"""
+import re
+import time
+import argparse
+from KGQuery import CypherGenerator
+from GraphPool import shared_pool
+from CypherTemplates import TEMPLATES_BY_ID
+
+# 各实体类型的取样查询
+SAMPLE_QUERIES = {
+    "Author": "MATCH (n:Author) WHERE n.chinese_name <> '' RETURN n.chinese_name AS name LIMIT $limit",
+    "Journal": "MATCH (n:Journal) RETURN n.name AS name LIMIT $limit",
+    "Topic": "MATCH (n:Topic) RETURN n.chinese_name AS name LIMIT $limit",
+}
+# 测试问题：(实体类型, 意图)
+CASES = [
+    ("Author", "查询合作学者"),
+    ("Author", "查询学者的论文列表"),
+    ("Journal", "查询发表论文"),
+    ("Topic", "查询研究学者"),
+]
+
+
+def cypher_literal(value) -> str:
+    """把参数值转换为Cypher字面量"""
+    if isinstance(value, str):
+        return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+    return str(value)
+
+
+def inline(cypher: str, params: dict) -> str:
+    """把参数直接拼接进查询文本，模拟改造前按实体名称拼接查询字符串的做法"""
+    return re.sub(r"\$(\w+)", lambda m: cypher_literal(params[m.group(1)]), cypher)
+
+
+def run_round(graph, queries, parameterized: bool) -> float:
+    """执行一轮查询，返回平均耗时（毫秒）"""
+    start = time.perf_counter()
+    for query in queries:
+        template = TEMPLATES_BY_ID[query["template"]]
+        if parameterized:
+            graph.run(template["cypher"], query["params"]).data()
+        else:
+            graph.run(inline(template["cypher"], query["params"])).data()
+    return (time.perf_counter() - start) * 1000 / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='参数化查询模板的执行计划复用效果')
+    parser.add_argument('--names', type=int, default=50, help='每种实体类型取样的名称数量')
+    parser.add_argument('--rounds', type=int, default=3, help='重复提问的轮数')
+    args = parser.parse_args()
+
+    # 整个测试使用同一条连接，两种方式的耗时不受建立连接的影响
+    graph = shared_pool().acquire()
+    generator = CypherGenerator()
+    names = {entity_type: [r["name"] for r in graph.run(cypher, limit=args.names).data()]
+             for entity_type, cypher in SAMPLE_QUERIES.items()}
+
+    queries = []
+    for entity_type, intent in CASES:
+        for name in names[entity_type]:
+            query = generator.generate_for_intent({"name": name, "type": entity_type}, intent, "")
+            if query:
+                queries.append(query)
+    if not queries:
+        print("图谱中没有可用于测试的实体")
+        return
+
+    print(f"共{len(queries)}个查询（{len(CASES)}类问题 × 每类最多{args.names}个实体），重复{args.rounds}轮")
+    for parameterized, label in [(False, "字符串拼接"), (True, "参数化模板")]:
+        # 清空执行计划缓存，两种方式从相同的冷启动状态开始
+        graph.run("CALL db.clearQueryCaches()")
+        timings = [run_round(graph, queries, parameterized) for _ in range(args.rounds)]
+        detail = "  ".join(f"第{i}轮{t:.2f}ms" for i, t in enumerate(timings, 1))
+        print(f"{label}：平均每个查询 {sum(timings) / len(timings):.2f}ms（{detail}）")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,284 @@
+"""
+离线基准测试套件：本地模拟大模型服务 + 由数据集构建的图谱替身，不需要DeepSeek密钥和Neo4j
+场景：
+  ingest      批量导入（ScholarGraph批量/并行导入到图谱替身）的行/秒，只含客户端部分，不含Neo4j写入
+  single      单意图问题逐个提问的端到端延迟
+  multi       多意图问题（每题3个意图）逐个提问的端到端延迟
+  concurrent  多个问题同时提问的吞吐量与延迟
+结果写成JSON（带提交号），两次结果可用 --compare 对比，有场景变慢超过阈值时退出码为1
+用法：
+  python -m benchmarks.suite --data data/data_tast.json --output bench.json
+  python -m benchmarks.suite --compare old.json new.json --threshold 0.1
+"""
+import io
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+from contextlib import redirect_stdout
+from typing import Dict, List, Tuple
+from QuestionAnalyzer import Config, IntentAnalyzer
+from KGQuery import CypherGenerator, KGQueryExecutor
+from AnswerGenerator import AnswerGenerator
+from FastIntent import FastIntentMatcher
+from GraphSchema import write_graph_version
+from GraphSnapshot import export_snapshot
+from SnapshotQuery import sample_names
+from Tracing import tracer
+from build_graph import ScholarGraph
+from chatbot_graph import ScholarQASystem
+from benchmarks.fixture_graph import FixtureGraph, FixturePool
+from benchmarks.mock_llm import MockLLMServer
+
+# 对比时数值越大越好的指标，其余数值指标（耗时）越小越好
+HIGHER_IS_BETTER = {"rows_per_sec", "articles_per_sec", "qps"}
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """延迟样本（秒）的均值与p50/p95/p99（毫秒，最近秩法）"""
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+
+    def rank(q):
+        return ordered[min(len(ordered) - 1, max(0, int(q * len(ordered) + 0.5) - 1))] * 1000
+
+    return {"mean_ms": sum(ordered) * 1000 / len(ordered), "p50_ms": rank(0.5), "p95_ms": rank(0.95),
+            "p99_ms": rank(0.99)}
+
+
+def git_commit() -> Tuple[str, bool]:
+    """当前提交号，以及工作区是否有未提交的修改"""
+    cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=cwd, capture_output=True, text=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=cwd,
+                                    capture_output=True, text=True).stdout.strip())
+        return commit or None, dirty
+    except OSError:
+        return None, False
+
+
+def run_ingest(data_path: str, batch_size: int, workers: int) -> Tuple[FixtureGraph, Dict]:
+    """把数据集导入图谱替身，统计各类型行数和客户端导入速度"""
+    graph = FixtureGraph()
+    # 导入过程的逐批输出不计入结果
+    with redirect_stdout(io.StringIO()):
+        handler = ScholarGraph(True, data_path, pool=FixturePool(graph, max_size=workers + 1))
+        start = time.perf_counter()
+        if workers > 1:
+            stats = handler.create_graph_parallel(workers, batch_size)
+        else:
+            stats = handler.create_graph_bulk(batch_size)
+        handler.close()
+    seconds = time.perf_counter() - start
+    rows = sum(item['rows'] for item in stats.values())
+    counts = graph.counts()
+    return graph, {
+        "seconds": seconds,
+        "rows": rows,
+        "rows_per_sec": rows / seconds if seconds > 0 else 0.0,
+        "articles_per_sec": counts["Article"] / seconds if seconds > 0 else 0.0,
+        "counts": counts,
+    }
+
+
+def build_system(snapshot_path: str, server: MockLLMServer, fast_path: bool) -> ScholarQASystem:
+    """问答系统：查询快照后端（不使用结果缓存），大模型请求发往模拟服务，不使用问答缓存"""
+    Config.SNAPSHOT_PATH = snapshot_path
+    Config.ANSWER_CACHE_PATH = None
+    with redirect_stdout(io.StringIO()):
+        executor = KGQueryExecutor(cache_size=0, backend="snapshot")
+        generator = CypherGenerator()
+        matcher = FastIntentMatcher.from_snapshot(executor.snapshot.snapshot, generator) if fast_path else None
+    # 与ScholarQASystem默认创建时相同，意图识别和答案生成共用一个并发信号量
+    llm_limit = asyncio.Semaphore(Config.LLM_CONCURRENCY)
+    return ScholarQASystem(
+        cypher_generator=generator,
+        kg_executor=executor,
+        intent_analyzer=IntentAnalyzer(matcher, server.client(), server.async_client(), llm_limit),
+        answer_generator=AnswerGenerator(server.client(), server.async_client(), llm_limit),
+    )
+
+
+def make_questions(system: ScholarQASystem, server: MockLLMServer, count: int) -> Dict[str, List[str]]:
+    """从图谱中关联最多的学者生成单意图和多意图问题，并在模拟服务中登记对应的意图识别结果"""
+    names = sample_names(system.kg_executor.snapshot.snapshot, "Author", count)
+    questions = {"single": [], "multi": []}
+    for name in names:
+        entity = {"name": name, "type": "Author"}
+        cases = {
+            "single": (f"{name}的合作学者有哪些", ["查询合作学者"]),
+            "multi": (f"{name}发表了哪些论文，研究主题是什么，和哪些学者合作过", ["查询学者的论文列表", "查询研究主题", "查询合作学者"]),
+        }
+        for scenario, (question, intents) in cases.items():
+            server.register(system.preprocessor.process(question), {
+                "entities": [entity],
+                "intents": [{"entity": name, "intent": intent} for intent in intents],
+            })
+            questions[scenario].append(question)
+    return questions
+
+
+def run_sequential(system: ScholarQASystem, questions: List[str]) -> Dict:
+    """逐个提问，统计每个问题的端到端延迟"""
+    latencies = []
+    with redirect_stdout(io.StringIO()):
+        for question in questions:
+            start = time.perf_counter()
+            system.answer(question)
+            latencies.append(time.perf_counter() - start)
+    return {"questions": len(questions), **percentiles(latencies)}
+
+
+def run_concurrent(system: ScholarQASystem, questions: List[str], concurrency: int) -> Dict:
+    """最多concurrency个问题同时进行，统计总吞吐量和每个问题的延迟"""
+    limit = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def ask(question):
+        async with limit:
+            start = time.perf_counter()
+            await system.answer_async(question)
+            latencies.append(time.perf_counter() - start)
+
+    async def run_all():
+        await asyncio.gather(*(ask(question) for question in questions))
+
+    with redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        system.event_loop().run_until_complete(run_all())
+        seconds = time.perf_counter() - start
+    return {"questions": len(questions), "concurrency": concurrency, "seconds": seconds,
+            "qps": len(questions) / seconds if seconds > 0 else 0.0, **percentiles(latencies)}
+
+
+def stage_percentiles() -> Dict:
+    """各阶段耗时分位数（毫秒），来自Tracing的直方图"""
+    stages = {}
+    for item in tracer.snapshot()["histograms"].get("stage_seconds", []):
+        stages[item["labels"]["stage"]] = {key: (item[key] or 0.0) * 1000 for key in ("p50", "p95", "p99")}
+        stages[item["labels"]["stage"]]["count"] = item["count"]
+    return stages
+
+
+def run_suite(args) -> Dict:
+    commit, dirty = git_commit()
+    results = {
+        "commit": commit,
+        "dirty": dirty,
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {key: value for key, value in vars(args).items() if key not in ("compare", "output")},
+        "scenarios": {},
+    }
+    print("导入数据集到图谱替身……")
+    graph, results["scenarios"]["ingest"] = run_ingest(args.data, args.batch_size, args.workers)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_path = os.path.join(tmp, "graph.snapshot")
+        with redirect_stdout(io.StringIO()):
+            export_snapshot(graph, snapshot_path, write_graph_version(graph))
+        del graph
+
+        server = MockLLMServer(args.llm_latency, args.token_delay, args.answer_tokens).start()
+        try:
+            system = build_system(snapshot_path, server, not args.no_fast_path)
+            questions = make_questions(system, server, args.questions)
+            if not questions["single"]:
+                raise SystemExit("数据集中没有可用于提问的学者")
+            # 预热：建立到模拟服务的连接，加载快照页面
+            run_sequential(system, questions["single"][:1] + questions["multi"][:1])
+            tracer.enable()
+            for scenario in ("single", "multi"):
+                print(f"场景 {scenario}……")
+                results["scenarios"][scenario] = run_sequential(system, questions[scenario])
+            print("场景 concurrent……")
+            mixed = [q for pair in zip(questions["single"], questions["multi"]) for q in pair]
+            mixed = (mixed * (args.requests // len(mixed) + 1))[:args.requests]
+            results["scenarios"]["concurrent"] = run_concurrent(system, mixed, args.concurrency)
+            results["stages"] = stage_percentiles()
+            results["llm_requests"] = dict(server.requests)
+            system.kg_executor.snapshot.close()
+        finally:
+            server.stop()
+    return results
+
+
+def print_results(results: Dict):
+    ingest = results["scenarios"]["ingest"]
+    print(f"ingest：{ingest['rows']}行，{ingest['seconds']:.2f}秒，{ingest['rows_per_sec']:.0f}行/秒"
+          f"（{ingest['articles_per_sec']:.0f}篇/秒）")
+    for scenario in ("single", "multi", "concurrent"):
+        item = results["scenarios"].get(scenario)
+        if not item:
+            continue
+        extra = f"，{item['qps']:.1f}问/秒（并发{item['concurrency']}）" if "qps" in item else ""
+        print(f"{scenario}：{item['questions']}个问题，p50 {item['p50_ms']:.1f}ms，p95 {item['p95_ms']:.1f}ms，"
+              f"p99 {item['p99_ms']:.1f}ms{extra}")
+
+
+def compare(old_path: str, new_path: str, threshold: float) -> bool:
+    """对比两次结果的各场景数值指标，变差超过threshold（比例）的记为退化；返回是否没有退化"""
+    with open(old_path, encoding='utf-8') as f:
+        old = json.load(f)
+    with open(new_path, encoding='utf-8') as f:
+        new = json.load(f)
+    print(f"对比：{(old.get('commit') or '?')[:10]} -> {(new.get('commit') or '?')[:10]}")
+    changed = {key for key in set(old.get("settings", {})) | set(new.get("settings", {}))
+               if old.get("settings", {}).get(key) != new.get("settings", {}).get(key)}
+    if changed:
+        print(f"注意：两次运行的参数不同（{'、'.join(sorted(changed))}），结果不可直接比较")
+    regressions = 0
+    for scenario, metrics in new["scenarios"].items():
+        before = old["scenarios"].get(scenario, {})
+        for metric, value in metrics.items():
+            if not isinstance(value, (int, float)) or not isinstance(before.get(metric), (int, float)):
+                continue
+            if metric in ("questions", "concurrency", "rows", "seconds") or not before[metric]:
+                continue
+            change = (value - before[metric]) / before[metric]
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            flag = "  <- 退化" if worse > threshold else ""
+            regressions += bool(flag)
+            print(f"  {scenario}.{metric}: {before[metric]:.2f} -> {value:.2f} ({change:+.1%}){flag}")
+    print("没有超过阈值的退化" if not regressions else f"{regressions}项指标退化超过{threshold:.0%}")
+    return not regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='离线基准测试：模拟大模型服务 + 图谱替身')
+    parser.add_argument('--data', default='data/data_tast.json', help='构建图谱替身的数据集（.json或.jsonl）')
+    parser.add_argument('--batch-size', type=int, default=1000, help='导入时每批的论文数')
+    parser.add_argument('--workers', type=int, default=1, help='导入线程数，大于1时测试并行导入')
+    parser.add_argument('--llm-latency', type=float, default=0.3, help='模拟大模型首个token的延迟（秒）')
+    parser.add_argument('--token-delay', type=float, default=0.0, help='模拟大模型每个token的间隔（秒）')
+    parser.add_argument('--answer-tokens', type=int, default=40, help='模拟回答的token数')
+    parser.add_argument('--questions', type=int, default=20, help='单意图/多意图场景各自的问题数')
+    parser.add_argument('--concurrency', type=int, default=8, help='并发场景同时进行的问题数')
+    parser.add_argument('--requests', type=int, default=64, help='并发场景的问题总数')
+    parser.add_argument('--no-fast-path', action='store_true', help='关闭本地意图快速识别，每个问题都请求模拟大模型')
+    parser.add_argument('--output', default=None, help='结果JSON文件路径')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='对比两次结果JSON，不运行测试')
+    parser.add_argument('--threshold', type=float, default=0.1, help='对比时判定为退化的变差比例')
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(0 if compare(args.compare[0], args.compare[1], args.threshold) else 1)
+
+    results = run_suite(args)
+    print_results(results)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入{args.output}")
+
+
+if __name__ == '__main__':
+    main()
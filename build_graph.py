@@ -1,186 +1,801 @@
-# 导入必要的库：os用于文件路径处理，json用于解析JSON数据，py2neo用于操作Neo4j图数据库
-import os
-import json
-from py2neo import Graph, Node, Relationship
-
-# 定义ScholarGraph类，封装学术知识图谱的构建逻辑
-class ScholarGraph:
-    # 类的初始化方法，用于设置数据路径、连接数据库并清空现有数据
-    def __init__(self,clear_all):
-        # 获取当前文件的绝对路径，并截取到上一级目录（用于拼接数据文件路径）
-        cur_dir = '/'.join(os.path.abspath(__file__).split('/')[:-1])
-        # 拼接数据集路径：当前目录下的data文件夹中的data_test.json
-        self.data_path = os.path.join(cur_dir, 'data/data.json')
-        # 连接Neo4j数据库（地址、用户名、密码固定）
-        self.g = Graph("http://localhost:7474", auth=("neo4j", "密码"))
-        # 清空数据库中所有现有节点和关系，确保每次构建是全新图谱
-        if clear_all:
-            self.g.delete_all()
-            print("已清空原有图谱！")
-
-    # 核心方法：创建知识图谱的主逻辑
-    def create_graph(self):
-        # 打开并读取JSON数据集文件
-        with open(self.data_path, 'r', encoding='utf-8') as f:
-            # 将JSON数据解析为Python列表（每一项是一篇论文的信息）
-            articles = json.load(f)
-
-        # 遍历每篇论文，创建节点和关系
-        for article in articles:
-            # 创建Article（论文）节点，包含论文的核心属性
-            article_node = Node(
-                'Article',  # 节点标签为"Article"
-                id=article['id'],  # 论文唯一标识
-                title=article['title'],  # 论文标题
-                date=str(article['date_parts'][0][0]),  # 发表年份（转换为字符串）
-                keywords=article['keywords'],  # 关键词列表直接以列表形式存储，保留列表的结构化信息，后续可以直接通过 “关键词包含某词” 进行精确查询，保留查询灵活性
-                abstract=article['abstract'],  # 论文摘要
-                language=article['language']  # 论文语言（如en、zh）
-            )
-            # 将artical_node节点合并到数据库（根据属性id去重，避免重复创建）
-            self.g.merge(article_node, 'Article', 'id')
-
-            # 创建Journal（期刊）节点，并建立论文与期刊的关系
-            journal_node = Node(
-                'Journal',  # 节点标签为"Journal"
-                name=article['container_title'],  # 期刊名称
-                issn_isbn=article['ISSN_ISBN'],  # 期刊的ISSN/ISBN编号
-                impact_factor=article.get('impact_factor')  # 期刊影响因子（可能为null）
-            )
-            # 将期刊节点合并到数据库（根据name去重）
-            self.g.merge(journal_node, 'Journal', 'name')
-            # 创建"BE_PUBLISHED_IN"（刊载于）关系：论文 -> 期刊
-            rel = Relationship(article_node, 'BE_PUBLISHED_IN', journal_node)
-            self.g.merge(rel)  # 合并关系（避免重复）
-
-            # 处理作者节点及作者与论文、作者之间的关系
-            authors = []  # 存储当前论文的所有作者节点，用于后续创建合作关系
-            # 遍历论文的作者列表
-            for author in article['author']:
-                # 提取作者的姓、名、中文名（若有）
-                family = author.get('family', '')  # 姓（如"Chen"）
-                given = author.get('given', '')  # 名（如"Gang"）
-                chinese_name = author.get('chinese_name', '')  # 中文名（如"陈钢"）
-                # 从论文中提取二级学科信息（取第一个学科的缩写）
-                discipline = ""
-                if 'class_en' in article and 'Secondary disciplines' in article['class_en']:
-                    disciplines = article['class_en']['Secondary disciplines']
-                    if disciplines:
-                        # 取第一个学科的前3个字母作为缩写（如"Vibration Engineering" → "Vib"）
-                        discipline = disciplines[0].split()[0][:3].upper()
-
-                # 若作者姓名不为空（避免无效数据）
-                if family or given:
-                    # 创建Author（作者）节点
-                    author_node = Node(
-                        'Author',  # 节点标签为"Author"
-                        english_name=f"{family} {given}".strip(),  # 英文名（姓+名）
-                        chinese_name=chinese_name, # 中文名（可为空）
-                        unique_id = f"{family}{given}{discipline}"# 唯一标识：姓名 + 研究领域
-                    )
-
-                    # 将作者节点合并到数据库（根据english_name去重）
-                    self.g.merge(author_node, 'Author', 'unique_id')
-                    # 将作者节点加入列表，用于后续创建合作关系
-                    authors.append(author_node)
-
-                    # 创建"PUBLISH"（发表）关系：作者 -> 论文
-                    rel = Relationship(author_node, 'PUBLISH', article_node)
-                    self.g.merge(rel)  # 合并关系
-
-            # 创建作者之间的"COLLABORATE"（合作）关系
-            # 双重循环遍历作者列表，为每对不同作者创建合作关系
-            for i in range(len(authors)):
-                for j in range(i + 1, len(authors)):
-                    # 作者i与作者j之间建立合作关系
-                    rel = Relationship(authors[i], 'COLLABORATE', authors[j])
-                    self.g.merge(rel)  # 合并关系（同一对作者只保留一条）
-
-            # 处理二级学科分类：创建Discipline节点及论文与学科的关系
-            self.create_classification(
-                article_node,  # 关联的论文节点
-                article,  # 论文数据
-                'class_en', 'Secondary disciplines',  # 英文分类字段（大类+子字段）
-                'class_zh', '二级学科',  # 中文分类字段（大类+子字段）
-                'Discipline',  # 节点标签
-                'BELONG_TO'  # 关系类型（属于）
-            )
-
-            # 处理研究主题：创建Topic节点及论文与主题的关系
-            self.create_classification(
-                article_node,
-                article,
-                'class_en', 'Research direction clusters',  # 英文研究主题字段
-                'class_zh', '研究主题',  # 中文研究主题字段
-                'Topic',  # 节点标签
-                'INVOLVE'  # 关系类型（涉及）
-            )
-
-            # 处理方法技术：创建Method节点及论文与方法的关系
-            self.create_classification(
-                article_node,
-                article,
-                'class_en', 'Methods and technologies',  # 英文方法技术字段
-                'class_zh', '方法技术',  # 中文方法技术字段
-                'Method',  # 节点标签
-                'USE'  # 关系类型（使用）
-            )
-
-            # 处理应用场景：创建Scenario节点及论文与场景的关系
-            self.create_classification(
-                article_node,
-                article,
-                'class_en', 'Application scenarios',  # 英文应用场景字段
-                'class_zh', '应用场景',  # 中文应用场景字段
-                'Scenario',  # 节点标签
-                'APPLY_TO'  # 关系类型（应用于）
-            )
-
-    # 辅助方法：创建分类节点（如学科、主题等）及与论文的关系
-    def create_classification(self, article_node, article,
-                              en_key, en_subkey, zh_key, zh_subkey,
-                              node_type, rel_type):
-        """
-        :param article_node: 论文节点（起点）
-        :param article: 论文原始数据
-        :param en_key: 英文分类的父字段（如"class_en"）
-        :param en_subkey: 英文分类的子字段（如"Secondary disciplines"）
-        :param zh_key: 中文分类的父字段（如"class_zh"）
-        :param zh_subkey: 中文分类的子字段（如"二级学科"）
-        :param node_type: 分类节点的标签（如"Discipline"）
-        :param rel_type: 论文与分类节点的关系类型（如"BELONG_TO"）
-        """
-        # 检查数据中是否包含英文分类字段及子字段
-        if en_key in article and en_subkey in article[en_key]:
-            # 提取英文分类项列表（如["Vibration Engineering", ...]）
-            en_items = article[en_key][en_subkey]
-            # 提取中文分类项列表（若存在，否则为空列表）
-            zh_items = article[zh_key][zh_subkey] if (zh_key in article and zh_subkey in article[zh_key]) else []
-
-            # 遍历每个英文分类项，创建对应的分类节点
-            for i, item_en in enumerate(en_items):
-                # 匹配对应的中文分类项（若索引存在则取对应值，否则为空）
-                item_zh = zh_items[i] if i < len(zh_items) else ""
-
-                # 创建分类节点（包含中英文名称）
-                node = Node(
-                    node_type,  # 节点标签（如"Discipline"）
-                    english_name=item_en,  # 英文名称
-                    chinese_name=item_zh  # 中文名称
-                )
-                # 将分类节点合并到数据库（根据english_name去重）
-                self.g.merge(node, node_type, 'english_name')
-
-                # 创建论文与分类节点的关系（如论文->属于->学科）
-                rel = Relationship(article_node, rel_type, node)
-                self.g.merge(rel)  # 合并关系
-
-
-# 主程序入口：当脚本直接运行时执行
-if __name__ == '__main__':
-    # 创建ScholarGraph实例（初始化数据库连接并清空数据）
-    handler = ScholarGraph(True)
-    # 调用create_graph方法构建知识图谱
-    handler.create_graph()
-    # 输出构建完成的提示信息
-    print("知识图谱构建完成！")
+# 导入必要的库：os用于文件路径处理，py2neo用于操作Neo4j图数据库，ArticleReader用于流式读取数据集
+import os
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from py2neo import Node, Relationship
+from py2neo.errors import TransientError
+from ArticleReader import iter_articles
+from IngestManifest import IngestManifest, article_hash
+from GraphSchema import ensure_schema, write_graph_version
+from GraphSnapshot import export_snapshot
+from GraphPool import shared_pool
+from AuthorSummary import AUTHOR_SUMMARY_QUERY, article_authors, refresh_all
+
+# 四类分类节点的配置：(英文子字段, 中文子字段, 节点标签, 论文与分类节点的关系类型)
+CLASSIFICATIONS = [
+    ('Secondary disciplines', '二级学科', 'Discipline', 'BELONG_TO'),
+    ('Research direction clusters', '研究主题', 'Topic', 'INVOLVE'),
+    ('Methods and technologies', '方法技术', 'Method', 'USE'),
+    ('Application scenarios', '应用场景', 'Scenario', 'APPLY_TO'),
+]
+
+# 批量写入使用的参数化Cypher语句：每条语句用UNWIND一次写入一批数据
+# 节点语句按merge键去重后用 SET += 更新其余属性，与逐条 self.g.merge 的效果一致
+BULK_QUERIES = {
+    # 论文节点整体替换属性：增量导入更新论文时，源数据中已删除的可选字段（如摘要）不会保留旧值
+    'Article': """
+        UNWIND $rows AS row
+        MERGE (p:Article {id: row.id})
+        SET p = row
+    """,
+    'Journal': """
+        UNWIND $rows AS row
+        MERGE (j:Journal {name: row.name})
+        SET j += row
+    """,
+    'Author': """
+        UNWIND $rows AS row
+        MERGE (a:Author {unique_id: row.unique_id})
+        SET a += row
+    """,
+    'BE_PUBLISHED_IN': """
+        UNWIND $rows AS row
+        MATCH (p:Article {id: row.article_id})
+        MATCH (j:Journal {name: row.journal})
+        MERGE (p)-[:BE_PUBLISHED_IN]->(j)
+    """,
+    'PUBLISH': """
+        UNWIND $rows AS row
+        MATCH (a:Author {unique_id: row.author_id})
+        MATCH (p:Article {id: row.article_id})
+        MERGE (a)-[:PUBLISH]->(p)
+    """,
+    # 合作关系带权重：count为合著论文数，first_year/last_year为首次/最近合作年份；已有关系时累加
+    'COLLABORATE': """
+        UNWIND $rows AS row
+        MATCH (a:Author {unique_id: row.source})
+        MATCH (b:Author {unique_id: row.target})
+        MERGE (a)-[c:COLLABORATE]->(b)
+        ON CREATE SET c.count = row.count, c.first_year = row.first_year, c.last_year = row.last_year
+        ON MATCH SET c.count = coalesce(c.count, 0) + row.count,
+                     c.first_year = CASE WHEN c.first_year IS NULL OR row.first_year < c.first_year
+                                         THEN row.first_year ELSE c.first_year END,
+                     c.last_year = CASE WHEN c.last_year IS NULL OR row.last_year > c.last_year
+                                        THEN row.last_year ELSE c.last_year END
+    """,
+}
+# 分类节点及其关系的语句（标签不能参数化，因此按配置逐个生成）
+for _, _, _label, _rel_type in CLASSIFICATIONS:
+    BULK_QUERIES[_label] = f"""
+        UNWIND $rows AS row
+        MERGE (n:{_label} {{english_name: row.english_name}})
+        SET n += row
+    """
+    BULK_QUERIES[_rel_type] = f"""
+        UNWIND $rows AS row
+        MATCH (p:Article {{id: row.article_id}})
+        MATCH (n:{_label} {{english_name: row.english_name}})
+        MERGE (p)-[:{_rel_type}]->(n)
+    """
+
+# 增量导入时清理已变更论文的旧关系（在写入新数据前、同一事务中执行）
+# 先按其余论文重新统计这些论文旧作者之间的合作权重（依赖旧的PUBLISH关系），不再有合著论文的合作关系直接删除；
+# 随后写入的新数据再把本批论文的合作次数累加回去。最后删除论文自身的全部关系
+BULK_QUERIES['STALE_COLLABORATE'] = """
+    UNWIND $rows AS row
+    WITH collect(row.article_id) AS ids
+    UNWIND ids AS id
+    MATCH (p:Article {id: id})<-[:PUBLISH]-(a:Author)
+    WITH ids, p, collect(a) AS authors
+    UNWIND authors AS a
+    UNWIND authors AS b
+    MATCH (a)-[c:COLLABORATE]->(b)
+    WITH DISTINCT ids, a, b, c
+    OPTIONAL MATCH (a)-[:PUBLISH]->(q:Article)<-[:PUBLISH]-(b)
+    WHERE NOT q.id IN ids
+    WITH c, count(q) AS n, min(toInteger(q.date)) AS first_year, max(toInteger(q.date)) AS last_year
+    FOREACH (_ IN CASE WHEN n = 0 THEN [1] ELSE [] END | DELETE c)
+    FOREACH (_ IN CASE WHEN n > 0 THEN [1] ELSE [] END |
+        SET c.count = n, c.first_year = first_year, c.last_year = last_year)
+"""
+BULK_QUERIES['STALE_RELATIONS'] = """
+    UNWIND $rows AS row
+    MATCH (p:Article {id: row.article_id})-[r:PUBLISH|BE_PUBLISHED_IN|BELONG_TO|INVOLVE|USE|APPLY_TO]-()
+    DELETE r
+"""
+# 增量导入时重新计算受影响学者的汇总（见AuthorSummary.py），在本批数据写入后、同一事务中执行
+BULK_QUERIES['AUTHOR_SUMMARY'] = AUTHOR_SUMMARY_QUERY
+# 增量清单中没有记录、但图谱中已存在的论文（清单被删除、图谱由CSV离线导入或全量导入中途失败时）
+EXISTING_ARTICLES_QUERY = """
+    MATCH (p:Article)
+    WHERE p.id IN $ids
+    RETURN p.id AS id
+"""
+
+# 批量写入顺序：先写全部节点，再写依赖节点的关系（合作关系由合作计数表单独写入）
+BULK_ORDER = (['Article', 'Journal', 'Author'] + [c[2] for c in CLASSIFICATIONS] +
+              ['BE_PUBLISHED_IN', 'PUBLISH'] + [c[3] for c in CLASSIFICATIONS])
+
+# 并行导入的分组：共享节点（第一遍去重后写入）及其merge键
+SHARED_KEYS = {'Journal': 'name', 'Author': 'unique_id'}
+SHARED_KEYS.update({c[2]: 'english_name' for c in CLASSIFICATIONS})
+# 以论文为中心的数据（第二遍按论文分区并行写入），值为关系行中指向共享节点的字段
+ARTICLE_REFS = {'Article': None, 'BE_PUBLISHED_IN': 'journal', 'PUBLISH': 'author_id'}
+ARTICLE_REFS.update({c[3]: 'english_name' for c in CLASSIFICATIONS})
+# 事务遇到死锁等临时错误时的最大重试次数
+MAX_RETRIES = 5
+
+
+def drop_none(**props):
+    """去掉值为None的属性（py2neo的Node同样不会写入None属性）"""
+    return {k: v for k, v in props.items() if v is not None}
+
+
+def add_collaborations(table, author_ids, year):
+    """
+    把一篇论文中的每对合作者计入合作计数表
+    :param table: {(作者unique_id, 作者unique_id): [合著次数, 最早年份, 最晚年份]}，作者对按unique_id排序，每对只记一次
+    :param author_ids: 论文作者的unique_id列表
+    :param year: 论文发表年份
+    """
+    ids = sorted(set(author_ids))
+    for i in range(len(ids)):
+        for j in range(i + 1, len(ids)):
+            item = table.get((ids[i], ids[j]))
+            if item is None:
+                table[(ids[i], ids[j])] = [1, year, year]
+            else:
+                item[0] += 1
+                item[1] = min(item[1], year)
+                item[2] = max(item[2], year)
+
+
+def collaboration_rows(table):
+    """把合作计数表转换为COLLABORATE批量语句的行数据（按作者对排序）"""
+    return [{'source': source, 'target': target, 'count': count, 'first_year': first, 'last_year': last}
+            for (source, target), (count, first, last) in sorted(table.items())]
+
+
+def build_stats_path(data_path):
+    """在线导入耗时记录：与数据集位于同一目录，供离线CSV导出对比"""
+    return os.path.join(os.path.dirname(os.path.abspath(data_path)), 'build_stats.json')
+
+
+def record_build(data_path, mode, seconds, articles=None):
+    """记录一次在线导入的模式、耗时和数据集大小（每个数据集只保留最近一次）"""
+    path = build_stats_path(data_path)
+    records = {}
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+    records[os.path.abspath(data_path)] = {'mode': mode, 'seconds': seconds, 'articles': articles,
+                                           'size': os.path.getsize(data_path), 'finished_at': time.time()}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(records, f, ensure_ascii=False, indent=2)
+
+
+def last_build(data_path):
+    """该数据集最近一次在线导入的记录，没有时返回None"""
+    path = build_stats_path(data_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get(os.path.abspath(data_path))
+
+# 定义ScholarGraph类，封装学术知识图谱的构建逻辑
+class ScholarGraph:
+    # 类的初始化方法，用于设置数据路径、连接数据库并清空现有数据
+    def __init__(self,clear_all, data_path=None, pool=None):
+        # 获取当前文件的绝对路径，并截取到上一级目录（用于拼接数据文件路径）
+        cur_dir = '/'.join(os.path.abspath(__file__).split('/')[:-1])
+        # 拼接数据集路径：默认为当前目录下data文件夹中的data.json（支持JSON数组或JSON Lines文件）
+        self.data_path = data_path or os.path.join(cur_dir, 'data/data.json')
+        # 从连接池取出主线程使用的连接（连接配置见QuestionAnalyzer.py的Config，与问答端共用同一个连接池）
+        self.pool = pool or shared_pool()
+        self.g = self.pool.acquire()
+        # 清空数据库中所有现有节点和关系，确保每次构建是全新图谱
+        if clear_all:
+            self.g.delete_all()
+            print("已清空原有图谱！")
+
+    def refresh_author_summaries(self):
+        """全量导入后为全部学者计算汇总（论文年份分布、期刊、学科、方法、场景的论文数），供分析类查询直接读取"""
+        print(f"学者汇总已更新，耗时{refresh_all(self.g):.2f}秒")
+
+    def close(self):
+        """归还主线程的连接，并输出导入过程中连接池的使用情况"""
+        self.pool.release(self.g)
+        print(self.pool.summary())
+
+    # 核心方法：创建知识图谱的主逻辑
+    def create_graph(self):
+        # 流式读取数据集文件，每次只解析一篇论文，内存占用不随数据量增长
+        articles = iter_articles(self.data_path)
+        # 合作计数表：遍历过程中只在内存中累计，全部论文处理完后一次性写入带权重的合作关系
+        collaborations = {}
+
+        # 遍历每篇论文，创建节点和关系
+        for article in articles:
+            # 创建Article（论文）节点，包含论文的核心属性
+            article_node = Node(
+                'Article',  # 节点标签为"Article"
+                id=article['id'],  # 论文唯一标识
+                title=article['title'],  # 论文标题
+                date=str(article['date_parts'][0][0]),  # 发表年份（转换为字符串）
+                keywords=article['keywords'],  # 关键词列表直接以列表形式存储，保留列表的结构化信息，后续可以直接通过 “关键词包含某词” 进行精确查询，保留查询灵活性
+                abstract=article['abstract'],  # 论文摘要
+                language=article['language']  # 论文语言（如en、zh）
+            )
+            # 将artical_node节点合并到数据库（根据属性id去重，避免重复创建）
+            self.g.merge(article_node, 'Article', 'id')
+
+            # 创建Journal（期刊）节点，并建立论文与期刊的关系
+            journal_node = Node(
+                'Journal',  # 节点标签为"Journal"
+                name=article['container_title'],  # 期刊名称
+                issn_isbn=article['ISSN_ISBN'],  # 期刊的ISSN/ISBN编号
+                impact_factor=article.get('impact_factor')  # 期刊影响因子（可能为null）
+            )
+            # 将期刊节点合并到数据库（根据name去重）
+            self.g.merge(journal_node, 'Journal', 'name')
+            # 创建"BE_PUBLISHED_IN"（刊载于）关系：论文 -> 期刊
+            rel = Relationship(article_node, 'BE_PUBLISHED_IN', journal_node)
+            self.g.merge(rel)  # 合并关系（避免重复）
+
+            # 处理作者节点及作者与论文、作者之间的关系
+            authors = []  # 存储当前论文的所有作者节点，用于后续创建合作关系
+            # 遍历论文的作者列表
+            for author in article['author']:
+                # 提取作者的姓、名、中文名（若有）
+                family = author.get('family', '')  # 姓（如"Chen"）
+                given = author.get('given', '')  # 名（如"Gang"）
+                chinese_name = author.get('chinese_name', '')  # 中文名（如"陈钢"）
+                # 从论文中提取二级学科信息（取第一个学科的缩写）
+                discipline = ""
+                if 'class_en' in article and 'Secondary disciplines' in article['class_en']:
+                    disciplines = article['class_en']['Secondary disciplines']
+                    if disciplines:
+                        # 取第一个学科的前3个字母作为缩写（如"Vibration Engineering" → "Vib"）
+                        discipline = disciplines[0].split()[0][:3].upper()
+
+                # 若作者姓名不为空（避免无效数据）
+                if family or given:
+                    # 创建Author（作者）节点
+                    author_node = Node(
+                        'Author',  # 节点标签为"Author"
+                        english_name=f"{family} {given}".strip(),  # 英文名（姓+名）
+                        chinese_name=chinese_name, # 中文名（可为空）
+                        unique_id = f"{family}{given}{discipline}"# 唯一标识：姓名 + 研究领域
+                    )
+
+                    # 将作者节点合并到数据库（根据english_name去重）
+                    self.g.merge(author_node, 'Author', 'unique_id')
+                    # 将作者节点加入列表，用于后续创建合作关系
+                    authors.append(author_node)
+
+                    # 创建"PUBLISH"（发表）关系：作者 -> 论文
+                    rel = Relationship(author_node, 'PUBLISH', article_node)
+                    self.g.merge(rel)  # 合并关系
+
+            # 统计作者之间的"COLLABORATE"（合作）关系：每对不同作者的合著次数及首次/最近合作年份
+            add_collaborations(collaborations, [a['unique_id'] for a in authors], int(article['date_parts'][0][0]))
+
+            # 处理二级学科分类：创建Discipline节点及论文与学科的关系
+            self.create_classification(
+                article_node,  # 关联的论文节点
+                article,  # 论文数据
+                'class_en', 'Secondary disciplines',  # 英文分类字段（大类+子字段）
+                'class_zh', '二级学科',  # 中文分类字段（大类+子字段）
+                'Discipline',  # 节点标签
+                'BELONG_TO'  # 关系类型（属于）
+            )
+
+            # 处理研究主题：创建Topic节点及论文与主题的关系
+            self.create_classification(
+                article_node,
+                article,
+                'class_en', 'Research direction clusters',  # 英文研究主题字段
+                'class_zh', '研究主题',  # 中文研究主题字段
+                'Topic',  # 节点标签
+                'INVOLVE'  # 关系类型（涉及）
+            )
+
+            # 处理方法技术：创建Method节点及论文与方法的关系
+            self.create_classification(
+                article_node,
+                article,
+                'class_en', 'Methods and technologies',  # 英文方法技术字段
+                'class_zh', '方法技术',  # 中文方法技术字段
+                'Method',  # 节点标签
+                'USE'  # 关系类型（使用）
+            )
+
+            # 处理应用场景：创建Scenario节点及论文与场景的关系
+            self.create_classification(
+                article_node,
+                article,
+                'class_en', 'Application scenarios',  # 英文应用场景字段
+                'class_zh', '应用场景',  # 中文应用场景字段
+                'Scenario',  # 节点标签
+                'APPLY_TO'  # 关系类型（应用于）
+            )
+
+        # 写入带权重的合作关系（同一对作者只保留一条）
+        self.write_collaborations(collaborations)
+
+    # 辅助方法：创建分类节点（如学科、主题等）及与论文的关系
+    def create_classification(self, article_node, article,
+                              en_key, en_subkey, zh_key, zh_subkey,
+                              node_type, rel_type):
+        """
+        :param article_node: 论文节点（起点）
+        :param article: 论文原始数据
+        :param en_key: 英文分类的父字段（如"class_en"）
+        :param en_subkey: 英文分类的子字段（如"Secondary disciplines"）
+        :param zh_key: 中文分类的父字段（如"class_zh"）
+        :param zh_subkey: 中文分类的子字段（如"二级学科"）
+        :param node_type: 分类节点的标签（如"Discipline"）
+        :param rel_type: 论文与分类节点的关系类型（如"BELONG_TO"）
+        """
+        # 检查数据中是否包含英文分类字段及子字段
+        if en_key in article and en_subkey in article[en_key]:
+            # 提取英文分类项列表（如["Vibration Engineering", ...]）
+            en_items = article[en_key][en_subkey]
+            # 提取中文分类项列表（若存在，否则为空列表）
+            zh_items = article[zh_key][zh_subkey] if (zh_key in article and zh_subkey in article[zh_key]) else []
+
+            # 遍历每个英文分类项，创建对应的分类节点
+            for i, item_en in enumerate(en_items):
+                # 匹配对应的中文分类项（若索引存在则取对应值，否则为空）
+                item_zh = zh_items[i] if i < len(zh_items) else ""
+
+                # 创建分类节点（包含中英文名称）
+                node = Node(
+                    node_type,  # 节点标签（如"Discipline"）
+                    english_name=item_en,  # 英文名称
+                    chinese_name=item_zh  # 中文名称
+                )
+                # 将分类节点合并到数据库（根据english_name去重）
+                self.g.merge(node, node_type, 'english_name')
+
+                # 创建论文与分类节点的关系（如论文->属于->学科）
+                rel = Relationship(article_node, rel_type, node)
+                self.g.merge(rel)  # 合并关系
+
+    # 批量导入模式：按批次聚合多篇论文的数据，每批每种节点/关系只发送一条UNWIND语句
+    def create_graph_bulk(self, batch_size=1000):
+        """
+        :param batch_size: 每批包含的论文数量
+        :return: 各实体类型的写入统计 {类型: {"rows": 行数, "seconds": 耗时}}
+        """
+        # 流式读取论文，内存中最多只保留一个批次的数据
+        articles = iter_articles(self.data_path)
+
+        stats = {key: {'rows': 0, 'seconds': 0.0} for key in BULK_QUERIES}
+        collaborations = {}
+        batch = self.new_batch()
+        count = 0
+        for article in articles:
+            self.collect_rows(article, batch, collaborations)
+            count += 1
+            if count % batch_size == 0:
+                self.write_batch(batch, stats)
+                batch = self.new_batch()
+                print(f"已写入{count}篇论文")
+        self.write_batch(batch, stats)
+        self.write_collaborations(collaborations, batch_size, stats)
+
+        self.report_throughput(stats)
+        return stats
+
+    # 增量导入模式：只写入新增或内容变化的论文，按批提交并记录断点，中断后可从上次提交的批次继续
+    def create_graph_incremental(self, batch_size=1000, manifest_path=None):
+        """
+        :param batch_size: 每批包含的论文数量
+        :param manifest_path: 增量清单文件路径，默认为数据目录下的ingest_manifest.db
+        :return: 各实体类型的写入统计
+        """
+        manifest = IngestManifest(manifest_path or self.default_manifest_path())
+        resume = manifest.resume_position(self.data_path)
+        if resume:
+            print(f"从断点继续：跳过已提交的前{resume}篇论文")
+
+        stats = {key: {'rows': 0, 'seconds': 0.0} for key in BULK_QUERIES}
+        counts = {'new': 0, 'changed': 0, 'unchanged': 0}
+        pending = []
+        position = 0
+        for article in iter_articles(self.data_path):
+            position += 1
+            if position <= resume:
+                continue
+            pending.append(article)
+            if len(pending) >= batch_size:
+                self.write_incremental_batch(manifest, pending, position, stats, counts)
+                pending = []
+        self.write_incremental_batch(manifest, pending, position, stats, counts)
+        manifest.finish(self.data_path)
+        manifest.close()
+
+        print(f"增量导入完成：新增{counts['new']}篇，更新{counts['changed']}篇，未变化{counts['unchanged']}篇")
+        self.report_throughput(stats)
+        return stats
+
+    def default_manifest_path(self):
+        """默认增量清单路径：与数据集位于同一目录"""
+        return os.path.join(os.path.dirname(os.path.abspath(self.data_path)), 'ingest_manifest.db')
+
+    def write_manifest(self, manifest_path=None, batch_size=10000):
+        """
+        全量导入完成后重写增量清单：清空原有记录，再流式记录全部论文的内容哈希，
+        之后的增量导入只处理新增或变化的论文（全部导入成功后才写入，中途失败时清单为空）
+        :return: 记录的论文数
+        """
+        manifest = IngestManifest(manifest_path or self.default_manifest_path())
+        manifest.reset()
+        hashes = []
+        count = 0
+        for article in iter_articles(self.data_path):
+            hashes.append((article['id'], article_hash(article)))
+            count += 1
+            if len(hashes) >= batch_size:
+                manifest.record(hashes)
+                hashes = []
+        manifest.record(hashes)
+        manifest.close()
+        return count
+
+    def write_incremental_batch(self, manifest, articles, position, stats, counts):
+        """对比清单中的哈希，只写入新增/变化的论文；变化的论文先清理旧关系。图谱提交后再更新清单和断点"""
+        hashes = [(article['id'], article_hash(article)) for article in articles]
+        known = manifest.lookup(article_id for article_id, _ in hashes)
+        # 清单中没有、图谱中已有的论文按变化处理：先扣除其原有的合作次数和关系再写入，合作权重不会重复累加
+        existing = self.existing_articles([article_id for article_id, _ in hashes if article_id not in known])
+
+        batch = self.new_batch()
+        collaborations = {}
+        stale = []
+        changed = []
+        for article, (article_id, digest) in zip(articles, hashes):
+            old = known.get(article_id)
+            if old == digest:
+                counts['unchanged'] += 1
+                continue
+            if old is None and article_id not in existing:
+                counts['new'] += 1
+            else:
+                counts['changed'] += 1
+                stale.append({'article_id': article_id})
+            self.collect_rows(article, batch, collaborations)
+            changed.append((article_id, digest))
+
+        if changed:
+            # 受影响的学者：变更论文的原作者（清理旧关系前查询）和本批论文的作者
+            authors = set(article_authors(self.g, [row['article_id'] for row in stale]))
+            authors.update(row['author_id'] for row in batch['PUBLISH'])
+            items = [('STALE_COLLABORATE', stale), ('STALE_RELATIONS', stale)]
+            items += [(key, batch[key]) for key in BULK_ORDER]
+            # 本批论文的合作次数与论文数据在同一事务中累加，保证断点续传时权重不重复计算
+            items.append(('COLLABORATE', collaboration_rows(collaborations)))
+            items.append(('AUTHOR_SUMMARY', [{'author_id': author_id} for author_id in sorted(authors)]))
+            self.run_tx(self.g, items, stats)
+        manifest.commit(self.data_path, changed, position)
+
+    def existing_articles(self, article_ids):
+        """图谱中已存在的论文id"""
+        if not article_ids:
+            return set()
+        return {record['id'] for record in self.g.run(EXISTING_ARTICLES_QUERY, ids=article_ids)}
+
+    @staticmethod
+    def new_batch():
+        """创建空批次：每种节点/关系类型对应一个行列表"""
+        return {key: [] for key in BULK_ORDER}
+
+    @staticmethod
+    def collect_rows(article, batch, collaborations):
+        """
+        把一篇论文拆分成各类节点和关系的行数据，追加到批次中（字段与create_graph逐条写入时一致）
+        :param collaborations: 合作计数表，本篇论文的作者对计入其中（见add_collaborations）
+        """
+        article_id = article['id']
+        batch['Article'].append(drop_none(
+            id=article_id,
+            title=article['title'],
+            date=str(article['date_parts'][0][0]),
+            keywords=article['keywords'],
+            abstract=article['abstract'],
+            language=article['language']
+        ))
+
+        journal = article['container_title']
+        batch['Journal'].append(drop_none(
+            name=journal,
+            issn_isbn=article['ISSN_ISBN'],
+            impact_factor=article.get('impact_factor')
+        ))
+        batch['BE_PUBLISHED_IN'].append({'article_id': article_id, 'journal': journal})
+
+        # 作者唯一标识中的学科缩写（取第一个二级学科的前3个字母）
+        discipline = ""
+        if 'class_en' in article and 'Secondary disciplines' in article['class_en']:
+            disciplines = article['class_en']['Secondary disciplines']
+            if disciplines:
+                discipline = disciplines[0].split()[0][:3].upper()
+
+        author_ids = []
+        for author in article['author']:
+            family = author.get('family', '')
+            given = author.get('given', '')
+            chinese_name = author.get('chinese_name', '')
+            if family or given:
+                unique_id = f"{family}{given}{discipline}"
+                batch['Author'].append(drop_none(
+                    english_name=f"{family} {given}".strip(),
+                    chinese_name=chinese_name,
+                    unique_id=unique_id
+                ))
+                batch['PUBLISH'].append({'author_id': unique_id, 'article_id': article_id})
+                author_ids.append(unique_id)
+
+        add_collaborations(collaborations, author_ids, int(article['date_parts'][0][0]))
+
+        for en_subkey, zh_subkey, label, rel_type in CLASSIFICATIONS:
+            if 'class_en' in article and en_subkey in article['class_en']:
+                en_items = article['class_en'][en_subkey]
+                zh_items = article['class_zh'][zh_subkey] if ('class_zh' in article and zh_subkey in article['class_zh']) else []
+                for i, item_en in enumerate(en_items):
+                    item_zh = zh_items[i] if i < len(zh_items) else ""
+                    batch[label].append(drop_none(english_name=item_en, chinese_name=item_zh))
+                    batch[rel_type].append({'article_id': article_id, 'english_name': item_en})
+
+    def write_batch(self, batch, stats):
+        """在一个事务中按BULK_ORDER顺序写入一批数据，并累计各类型的行数与耗时"""
+        if not batch['Article']:
+            return
+        self.run_tx(self.g, [(key, batch[key]) for key in BULK_ORDER], stats)
+
+    def write_collaborations(self, collaborations, batch_size=1000, stats=None):
+        """把合作计数表分批写成带权重的COLLABORATE关系，写入后清空计数表"""
+        if stats is None:
+            stats = {'COLLABORATE': {'rows': 0, 'seconds': 0.0}}
+        rows = collaboration_rows(collaborations)
+        collaborations.clear()
+        for i in range(0, len(rows), batch_size):
+            self.run_tx(self.g, [('COLLABORATE', rows[i:i + batch_size])], stats)
+
+    @staticmethod
+    def run_tx(graph, items, stats, lock=None):
+        """
+        在一个事务中依次执行多条批量语句，遇到死锁等临时错误时整体重试
+        :param graph: 使用的数据库连接
+        :param items: [(BULK_QUERIES中的类型, 行列表), ...]
+        :param stats: 写入统计，成功提交后才累加
+        :param lock: 多线程共享stats时使用的锁
+        """
+        for attempt in range(MAX_RETRIES):
+            timings = []
+            tx = graph.begin()
+            try:
+                for key, rows in items:
+                    if not rows:
+                        continue
+                    start = time.perf_counter()
+                    tx.run(BULK_QUERIES[key], rows=rows)
+                    timings.append((key, len(rows), time.perf_counter() - start))
+                graph.commit(tx)
+                break
+            except TransientError:
+                graph.rollback(tx)
+                if attempt == MAX_RETRIES - 1:
+                    raise
+                time.sleep(0.1 * 2 ** attempt)
+            except Exception:
+                # 其他错误不重试：先回滚，连接归还连接池时不带未结束的事务；回滚失败（如连接已断开）时抛出原错误
+                try:
+                    graph.rollback(tx)
+                except Exception:
+                    pass
+                raise
+
+        if lock:
+            lock.acquire()
+        try:
+            for key, count, seconds in timings:
+                stats[key]['rows'] += count
+                stats[key]['seconds'] += seconds
+        finally:
+            if lock:
+                lock.release()
+
+    # 并行导入模式：共享节点先去重写入，再由多个工作线程按论文分区并行写入论文及其关系
+    def create_graph_parallel(self, workers=4, batch_size=1000):
+        """
+        三遍流式处理数据集：
+        1. 汇总去重Journal/Author/分类节点并并行写入（每个节点只出现在一个批次中，互不冲突）
+        2. 按论文分批，多个线程并行写入Article及以论文为中心的关系；
+           同一批次内关系行按共享节点的键排序，所有事务按相同顺序对共享节点加锁，不会形成死锁环
+        3. 两端都是共享节点的COLLABORATE关系（第一遍已统计合作次数）由单个线程按顺序写入
+        :param workers: 工作线程数
+        :param batch_size: 每批包含的论文数量（第一遍为每批节点数）
+        :return: 各实体类型的写入统计
+        """
+        stats = {key: {'rows': 0, 'seconds': 0.0} for key in BULK_QUERIES}
+        worker_stats = {}
+        lock = threading.Lock()
+        start = time.perf_counter()
+        # 每个工作线程同时占用一条连接，主线程另占一条
+        self.pool.ensure_capacity(workers + 1)
+
+        # 第一遍：汇总共享节点（同一键的属性按出现顺序合并，与逐条merge的SET +=一致）
+        shared = {label: {} for label in SHARED_KEYS}
+        collaborations = {}
+        article_count = 0
+        for article in iter_articles(self.data_path):
+            batch = self.new_batch()
+            self.collect_rows(article, batch, collaborations)
+            for label, key in SHARED_KEYS.items():
+                for row in batch[label]:
+                    shared[label].setdefault(row[key], {}).update(row)
+            article_count += 1
+        phase_times = {'汇总共享节点': time.perf_counter() - start}
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            phase_start = time.perf_counter()
+            jobs = []
+            for label, nodes in shared.items():
+                rows = list(nodes.values())
+                for i in range(0, len(rows), batch_size):
+                    jobs.append(pool.submit(self.parallel_job, [(label, rows[i:i + batch_size])],
+                                            stats, worker_stats, lock))
+            for job in jobs:
+                job.result()
+            shared.clear()
+            phase_times['写入共享节点'] = time.perf_counter() - phase_start
+
+            # 第二遍：按论文分区并行写入，在途批次数有上限，避免读取速度超过写入时内存增长
+            phase_start = time.perf_counter()
+            slots = threading.BoundedSemaphore(workers * 2)
+            jobs = []
+            batch = self.new_batch()
+            # 合作关系已在第一遍统计完毕，第二遍不再重复计数
+            for article in iter_articles(self.data_path):
+                self.collect_rows(article, batch, {})
+                if len(batch['Article']) >= batch_size:
+                    jobs.append(self.submit_article_batch(pool, slots, batch, stats, worker_stats, lock))
+                    batch = self.new_batch()
+            if batch['Article']:
+                jobs.append(self.submit_article_batch(pool, slots, batch, stats, worker_stats, lock))
+            for job in jobs:
+                job.result()
+            phase_times['并行写入论文及关系'] = time.perf_counter() - phase_start
+
+        # 第三遍：带权重的合作关系按作者对排序后单线程写入
+        phase_start = time.perf_counter()
+        rows = collaboration_rows(collaborations)
+        collaborations.clear()
+        for i in range(0, len(rows), batch_size):
+            self.parallel_job([('COLLABORATE', rows[i:i + batch_size])], stats, worker_stats, lock)
+        phase_times['写入合作关系'] = time.perf_counter() - phase_start
+
+        self.report_throughput(stats)
+        self.report_scaling(workers, article_count, time.perf_counter() - start, phase_times, worker_stats)
+        return stats
+
+    def submit_article_batch(self, pool, slots, batch, stats, worker_stats, lock):
+        """提交一个论文批次：关系行按共享节点键排序，保证各事务加锁顺序一致"""
+        items = []
+        for key, ref in ARTICLE_REFS.items():
+            rows = batch[key]
+            if ref:
+                rows = sorted(rows, key=lambda row: (row[ref], row['article_id']))
+            items.append((key, rows))
+        slots.acquire()
+        job = pool.submit(self.parallel_job, items, stats, worker_stats, lock)
+        job.add_done_callback(lambda _: slots.release())
+        return job
+
+    def parallel_job(self, items, stats, worker_stats, lock):
+        """工作线程执行一个批次：从连接池取用连接，并记录该线程的批次数与忙碌时间（不含等待连接的时间）"""
+        with self.pool.session() as graph:
+            start = time.perf_counter()
+            self.run_tx(graph, items, stats, lock)
+            elapsed = time.perf_counter() - start
+        with lock:
+            item = worker_stats.setdefault(threading.current_thread().name, {'batches': 0, 'rows': 0, 'seconds': 0.0})
+            item['batches'] += 1
+            item['rows'] += sum(len(rows) for _, rows in items)
+            item['seconds'] += elapsed
+
+    @staticmethod
+    def report_scaling(workers, article_count, total_seconds, phase_times, worker_stats):
+        """输出并行导入的扩展性报告：各阶段耗时、各线程负载及有效并行度"""
+        print(f"并行导入报告（{workers}个工作线程，{article_count}篇论文，总耗时{total_seconds:.2f}秒，"
+              f"{article_count / total_seconds if total_seconds > 0 else 0:.0f}篇/秒）：")
+        for phase, seconds in phase_times.items():
+            print(f"  {phase:<12}{seconds:>8.2f}秒")
+        busy = 0.0
+        for name, item in sorted(worker_stats.items()):
+            busy += item['seconds']
+            print(f"  {name:<28}{item['batches']:>6}批  {item['rows']:>10}行  {item['seconds']:>8.2f}秒")
+        # 有效并行度 = 各线程忙碌时间之和 / 墙钟时间，理想情况下接近工作线程数
+        if total_seconds > 0:
+            print(f"  有效并行度：{busy / total_seconds:.2f}（上限{workers}）")
+
+    @staticmethod
+    def report_throughput(stats):
+        """输出各实体类型的写入吞吐量（行/秒）"""
+        print("各类型写入吞吐量：")
+        for key, item in stats.items():
+            if item['rows']:
+                rate = item['rows'] / item['seconds'] if item['seconds'] > 0 else float('inf')
+                print(f"  {key:<16}{item['rows']:>10}行  {item['seconds']:>8.2f}秒  {rate:>10.0f}行/秒")
+
+
+# 主程序入口：当脚本直接运行时执行
+if __name__ == '__main__':
+    # 命令行参数：默认逐条写入，--bulk 使用批量UNWIND导入
+    parser = argparse.ArgumentParser(description='构建学术知识图谱')
+    parser.add_argument('--bulk', action='store_true', help='使用批量UNWIND导入模式')
+    parser.add_argument('--batch-size', type=int, default=1000, help='批量导入时每批的论文数量')
+    parser.add_argument('--data', default=None, help='数据集路径（.json数组或.jsonl），默认data/data.json')
+    parser.add_argument('--workers', type=int, default=1, help='并行导入的工作线程数，大于1时启用并行导入')
+    parser.add_argument('--incremental', action='store_true', help='增量导入：不清空图谱，只写入新增或变化的论文，支持断点续传')
+    parser.add_argument('--manifest', default=None, help='增量清单文件路径，默认为数据目录下的ingest_manifest.db')
+    parser.add_argument('--snapshot', nargs='?', const='data/graph.snapshot', default=None,
+                        help='导入结束后导出只读图谱快照（供问答端以快照后端查询），默认路径data/graph.snapshot')
+    parser.add_argument('--csv', nargs='?', const='data/import', default=None,
+                        help='不连接数据库，导出neo4j-admin database import用的CSV文件（离线全量重建），默认目录data/import')
+    args = parser.parse_args()
+
+    cur_dir = os.path.dirname(os.path.abspath(__file__))
+    if args.csv:
+        # 离线导出模式：只读取数据集、写CSV文件，不连接Neo4j
+        from CsvExport import export_csv, report
+        data_path = args.data or os.path.join(cur_dir, 'data/data.json')
+        out_dir = os.path.join(cur_dir, args.csv)
+        report(export_csv(data_path, out_dir), data_path, out_dir)
+        raise SystemExit(0)
+
+    # 创建ScholarGraph实例（初始化数据库连接；非增量模式下清空数据）
+    handler = ScholarGraph(not args.incremental, args.data)
+    manifest_path = args.manifest or handler.default_manifest_path()
+    if not args.incremental and os.path.exists(manifest_path):
+        # 图谱已清空重建，原有增量清单失效（导入完成后再写入本次全部论文的哈希）
+        manifest = IngestManifest(manifest_path)
+        manifest.reset()
+        manifest.close()
+    # 导入前创建merge键的唯一约束和查询索引，避免每次merge都扫描整个标签
+    ensure_schema(handler.g)
+    # 调用create_graph方法构建知识图谱
+    start = time.perf_counter()
+    stats = None
+    if args.incremental:
+        mode = 'incremental'
+        stats = handler.create_graph_incremental(args.batch_size, manifest_path)
+    elif args.workers > 1:
+        mode = 'parallel'
+        stats = handler.create_graph_parallel(args.workers, args.batch_size)
+    elif args.bulk:
+        mode = 'bulk'
+        stats = handler.create_graph_bulk(args.batch_size)
+    else:
+        mode = 'merge'
+        handler.create_graph()
+    # 全量导入后计算学者汇总（增量导入已在每批事务中更新受影响学者的汇总）
+    if not args.incremental:
+        handler.refresh_author_summaries()
+        # 全量导入的论文写入增量清单，之后的增量导入不再重复写入未变化的论文
+        print(f"增量清单已记录{handler.write_manifest(manifest_path)}篇论文")
+    # 更新图谱版本号，问答端缓存的查询结果随之失效
+    version = write_graph_version(handler.g)
+    # 记录本次在线导入的耗时（全量导入时），供 --csv 离线导出对比
+    if not args.incremental:
+        record_build(handler.data_path, mode, time.perf_counter() - start, stats['Article']['rows'] if stats else None)
+    if args.snapshot:
+        export_snapshot(handler.g, os.path.join(cur_dir, args.snapshot), version)
+    handler.close()
+    # 输出构建完成的提示信息
+    print("知识图谱构建完成！")
@@ -1,63 +1,244 @@
-from QuestionAnalyzer import QuestionPreprocessor, IntentAnalyzer
-from KGQuery import CypherGenerator, KGQueryExecutor
-from AnswerGenerator import AnswerGenerator
-import re
-
-class ScholarQASystem:
-    def __init__(self):
-        self.preprocessor = QuestionPreprocessor()
-        self.intent_analyzer = IntentAnalyzer()
-        self.cypher_generator = CypherGenerator()
-        self.kg_executor = KGQueryExecutor()
-        self.answer_generator = AnswerGenerator()
-
-    def answer(self, question: str) -> str:
-        processed_question = self.preprocessor.process(question)
-        if not processed_question:
-            return "请输入有效的问题。"
-
-        # 多意图分析
-        analysis = self.intent_analyzer.analyze(processed_question)
-        print(f"意图识别结果: {analysis}")
-
-        # 检查是否有有效的实体和意图
-        if not analysis["entities"] or not analysis["intents"]:
-            # 降级处理
-            author_pattern = re.compile(r'([\u4e00-\u9fa5]+)学者|与([\u4e00-\u9fa5]+)合作')
-            match = author_pattern.search(processed_question)
-            if match:
-                author_name = next((g for g in match.groups() if g), None)
-                if author_name:
-                    analysis = {
-                        "entities": [{"name": author_name, "type": "Author"}],
-                        "intents": [{"entity": author_name, "intent": "查询合作学者"}]
-                    }
-                    print(f"降级意图识别: {analysis}")
-                else:
-                    return "未能理解问题，请尝试重新表述。"
-            else:
-                return "未能理解问题，请尝试重新表述。"
-
-        # 为多个意图生成Cypher查询
-        cyphers = self.cypher_generator.generate(analysis["entities"], analysis["intents"], processed_question)
-        print(f"生成的Cypher查询: {[c['cypher'] for c in cyphers]}")
-
-        if not cyphers:
-            return "无法生成查询，请尝试其他问题。"
-
-        # 执行多个查询
-        kg_results = self.kg_executor.execute(cyphers)
-        print(f"知识图谱查询结果: {kg_results}")
-
-        # 生成综合回答
-        return self.answer_generator.generate(processed_question, kg_results)
-
-if __name__ == "__main__":
-    qa_system = ScholarQASystem()
-    print("学者知识问答系统已启动（输入'退出'结束）")
-    while True:
-        user_question = input("请输入问题：")
-        if user_question == "退出":
-            break
-        answer = qa_system.answer(user_question)
-        print(f"回答：\n{answer}\n")
\ No newline at end of file
+from QuestionAnalyzer import QuestionPreprocessor, IntentAnalyzer, Config
+from KGQuery import CypherGenerator, KGQueryExecutor
+from AnswerGenerator import AnswerGenerator
+from FastIntent import FastIntentMatcher
+from AnswerCache import AnswerCache
+from Tracing import tracer, NULL_SPAN
+import os
+import re
+import asyncio
+import time
+from typing import AsyncIterator, Dict, Iterator, Optional
+
+class ScholarQASystem:
+    def __init__(self, preprocessor=None, cypher_generator=None, kg_executor=None,
+                 intent_analyzer=None, answer_generator=None, answer_cache=None):
+        """
+        各组件均可传入替换（如连接本地模拟大模型服务的分析器、图谱替身执行器），未传入时按配置创建
+        """
+        self.preprocessor = preprocessor or QuestionPreprocessor()
+        self.cypher_generator = cypher_generator or CypherGenerator()
+        self.kg_executor = kg_executor or KGQueryExecutor()
+        # 意图识别和答案生成共用一个信号量，限制异步问答时同时进行的大模型请求数
+        self.llm_limit = asyncio.Semaphore(Config.LLM_CONCURRENCY)
+        if intent_analyzer is None:
+            # 本地意图快速识别：用图谱中的实体名称构建地名录，简单问题无需调用大模型
+            fast_path = None
+            if Config.FAST_INTENT_ENABLED:
+                if self.kg_executor.snapshot is not None:
+                    fast_path = FastIntentMatcher.from_snapshot(self.kg_executor.snapshot.snapshot, self.cypher_generator)
+                else:
+                    with self.kg_executor.graph_pool.session() as graph:
+                        fast_path = FastIntentMatcher.from_graph(graph, self.cypher_generator)
+            intent_analyzer = IntentAnalyzer(fast_path, llm_limit=self.llm_limit)
+        self.intent_analyzer = intent_analyzer
+        self.answer_generator = answer_generator or AnswerGenerator(llm_limit=self.llm_limit)
+        # 问答结果持久化缓存，相同问题（或相同查询意图）直接返回上次的回答
+        if answer_cache is None and Config.ANSWER_CACHE_PATH:
+            cur_dir = os.path.dirname(os.path.abspath(__file__))
+            answer_cache = AnswerCache(os.path.join(cur_dir, Config.ANSWER_CACHE_PATH), Config.ANSWER_CACHE_SIZE)
+        self.answer_cache = answer_cache
+        # 分阶段耗时跟踪与指标（Tracing.py），未启用时几乎没有开销
+        if Config.METRICS_ENABLED:
+            cur_dir = os.path.dirname(os.path.abspath(__file__))
+            tracer.enable(os.path.join(cur_dir, Config.TRACE_LOG_PATH) if Config.TRACE_LOG_PATH else None)
+        # 同步接口使用的事件循环：异步客户端的连接池绑定在首次使用的事件循环上，不能每次新建
+        self.loop = None
+
+    def event_loop(self) -> asyncio.AbstractEventLoop:
+        if self.loop is None:
+            self.loop = asyncio.new_event_loop()
+        return self.loop
+
+    def answer(self, question: str) -> str:
+        """同步接口：在自有的事件循环中运行answer_async"""
+        return self.event_loop().run_until_complete(self.answer_async(question))
+
+    def answer_stream(self, question: str) -> Iterator[str]:
+        """同步流式接口：在自有的事件循环中逐段取出answer_stream_async的输出"""
+        loop = self.event_loop()
+        chunks = self.answer_stream_async(question)
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(chunks.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            loop.run_until_complete(chunks.aclose())
+
+    async def answer_async(self, question: str) -> str:
+        """异步问答：等待大模型和图谱查询期间可以处理其他问题"""
+        trace = tracer.trace("qa", question=question)
+        try:
+            context = await self.retrieve(question, trace)
+            if context["reply"] is not None:
+                return context["reply"]
+            # 生成综合回答
+            failures = self.answer_generator.failures
+            with trace.span("answer"):
+                answer = await self.answer_generator.generate_async(context["question"], context["kg_results"])
+            self.remember(context, answer, failures)
+            return answer
+        finally:
+            trace.finish()
+
+    async def answer_stream_async(self, question: str) -> AsyncIterator[str]:
+        """异步流式问答：回答随大模型生成逐段产出"""
+        trace = tracer.trace("qa", question=question)
+        try:
+            context = await self.retrieve(question, trace)
+            if context["reply"] is not None:
+                yield context["reply"]
+                return
+            failures = self.answer_generator.failures
+            chunks = []
+            with trace.span("answer") as span:
+                start = time.perf_counter()
+                async for chunk in self.answer_generator.generate_stream_async(context["question"], context["kg_results"]):
+                    if not chunks:
+                        span.set(first_chunk_ms=round((time.perf_counter() - start) * 1000, 3))
+                    chunks.append(chunk)
+                    yield chunk
+            # 只缓存完整输出的回答（调用方中途停止读取时不会执行到这里）
+            self.remember(context, "".join(chunks), failures)
+        finally:
+            trace.finish()
+
+    async def retrieve(self, question: str, trace=NULL_SPAN) -> Dict:
+        """
+        预处理、查找问答缓存、意图识别、生成并执行查询
+        :param trace: 本问题的跟踪记录（Tracing.Trace），各阶段分别计时
+        :return: {"reply": 直接回复用户的内容（缓存的回答或提示），需要生成回答时为None,
+                  "question": 预处理后的问题, "kg_results": 查询结果, "cache_keys": 问答缓存键, "version": 图谱版本号}
+        """
+        with trace.span("preprocess"):
+            processed_question = self.preprocessor.process(question)
+        if not processed_question:
+            return {"reply": "请输入有效的问题。"}
+
+        cache_keys = []
+        version = None
+        use_cache = self.answer_cache is not None
+        if use_cache:
+            with trace.span("answer_cache") as span:
+                cached = None
+                try:
+                    version = await asyncio.to_thread(self.kg_executor.check_version, True)
+                except Exception:
+                    # 无法确认图谱版本时本问题不查找也不写入问答缓存，意图识别和查询照常进行
+                    use_cache = False
+                if use_cache:
+                    cache_keys.append(AnswerCache.question_key(processed_question))
+                    cached = self.answer_cache.get(cache_keys[0], version)
+                span.set(hit=cached is not None)
+            if cached is not None:
+                print("命中问答缓存（问题）")
+                tracer.count("answer_cache_total", outcome="question_hit")
+                return {"reply": cached}
+
+        # 多意图分析
+        with trace.span("intent"):
+            analysis = await self.intent_analyzer.analyze_async(processed_question)
+        print(f"意图识别结果: {analysis}")
+
+        # 检查是否有有效的实体和意图
+        if not analysis["entities"] or not analysis["intents"]:
+            analysis = self.degrade(processed_question)
+            if analysis is None:
+                return {"reply": "未能理解问题，请尝试重新表述。"}
+
+        # 为多个意图生成Cypher查询
+        with trace.span("cypher") as span:
+            cyphers = self.cypher_generator.generate(analysis["entities"], analysis["intents"], processed_question)
+            span.set(queries=len(cyphers))
+        print(f"生成的Cypher查询: {[(c['template'], c['params']) for c in cyphers]}")
+
+        if not cyphers:
+            return {"reply": "无法生成查询，请尝试其他问题。"}
+
+        if use_cache:
+            cache_keys.append(AnswerCache.intent_key(cyphers))
+            cached = self.answer_cache.get(cache_keys[1], version)
+            if cached is not None:
+                print("命中问答缓存（查询意图）")
+                tracer.count("answer_cache_total", outcome="intent_hit")
+                # 记住这种问法，下次直接在问题级命中
+                self.answer_cache.put(cache_keys[:1], cached, version)
+                return {"reply": cached}
+            tracer.count("answer_cache_total", outcome="miss")
+
+        # 执行多个查询
+        with trace.span("kg_query") as span:
+            kg_results = await self.kg_executor.execute_async(cyphers)
+            if tracer.enabled:
+                span.set(rows=[[r["template"], len(r["results"])] for r in kg_results],
+                         errors=sum(1 for r in kg_results if r.get("error")))
+        print(f"知识图谱查询结果: {kg_results}")
+        return {"reply": None, "question": processed_question, "kg_results": kg_results,
+                "cache_keys": cache_keys, "version": version}
+
+    def remember(self, context: Dict, answer: str, failures: int):
+        """
+        写入问答缓存；有查询失败/超时，或生成期间大模型调用失败（回答为降级的格式化输出），或未能确认图谱版本（没有缓存键）时不缓存
+        :param failures: 开始生成回答前AnswerGenerator的失败次数
+        """
+        if self.answer_cache is None or not context["cache_keys"] or not answer:
+            return
+        if self.answer_generator.failures != failures or any(r.get("error") for r in context["kg_results"]):
+            return
+        self.answer_cache.put(context["cache_keys"], answer, context["version"])
+
+    @staticmethod
+    def degrade(question: str) -> Optional[Dict]:
+        """降级处理：大模型未识别出实体或意图时，按"X学者"/"与X合作"的句式识别学者"""
+        author_pattern = re.compile(r'([\u4e00-\u9fa5]+)学者|与([\u4e00-\u9fa5]+)合作')
+        match = author_pattern.search(question)
+        if not match:
+            return None
+        author_name = next((g for g in match.groups() if g), None)
+        if not author_name:
+            return None
+        analysis = {
+            "entities": [{"name": author_name, "type": "Author"}],
+            "intents": [{"entity": author_name, "intent": "查询合作学者"}]
+        }
+        print(f"降级意图识别: {analysis}")
+        return analysis
+
+if __name__ == "__main__":
+    qa_system = ScholarQASystem()
+    print("学者知识问答系统已启动（输入'退出'结束）")
+    while True:
+        user_question = input("请输入问题：")
+        if user_question == "退出":
+            report = qa_system.intent_analyzer.fast_path_report()
+            print(f"意图快速识别：{report['questions']}个问题中命中{report['fast_hits']}个（命中率{report['hit_rate']:.0%}），"
+                  f"估计节省{report['saved_seconds']:.1f}秒")
+            generator = qa_system.answer_generator
+            print(f"回答生成：本地渲染{generator.rendered}个，调用大模型{generator.llm_calls}个")
+            rows = qa_system.kg_executor.row_stats()
+            print(f"图谱查询：{rows['queries']}个查询，读取{rows['fetched']}行，保留{rows['kept']}行（{rows['bytes']}字节）")
+            if qa_system.kg_executor.graph_pool is not None:
+                print(qa_system.kg_executor.graph_pool.summary())
+            if tracer.enabled:
+                print(tracer.report())
+                if Config.METRICS_EXPORT_PATH:
+                    tracer.write_prometheus(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                         Config.METRICS_EXPORT_PATH))
+                tracer.close()
+            if qa_system.answer_cache is not None:
+                stats = qa_system.answer_cache.stats()
+                print(f"问答缓存：问题级命中{stats['question_hits']}次，查询意图级命中{stats['intent_hits']}次，"
+                      f"当前缓存{stats['size']}条")
+            break
+        # 流式输出回答，分别统计首段文字到达时间和总耗时
+        start = time.perf_counter()
+        first_chunk = None
+        for chunk in qa_system.answer_stream(user_question):
+            if first_chunk is None:
+                first_chunk = time.perf_counter() - start
+                print("回答：")
+            print(chunk, end="", flush=True)
+        total = time.perf_counter() - start
+        print(f"\n（首段输出{first_chunk or total:.2f}秒，总耗时{total:.2f}秒）\n")
\ No newline at end of file
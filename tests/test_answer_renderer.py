@@ -0,0 +1,44 @@
+"""
+列表类意图的本地渲染：结果被截断时的说明按查询返回的行数计算，重复的行合并后项数较少时一并说明
+"""
+import unittest
+from AnswerRenderer import render
+
+
+def result(rows, truncated=False):
+    item = {"entity": "王伟", "template": "author.journal", "results": rows}
+    if truncated:
+        item["truncated"] = True
+    return item
+
+
+JSV = {"期刊名称": "Journal of Sound and Vibration", "影响因子": 4.5}
+MSSP = {"期刊名称": "Mechanical Systems and Signal Processing", "影响因子": 8.9}
+AL = {"期刊名称": "Acoustics Letters", "影响因子": None}
+
+
+class RenderTest(unittest.TestCase):
+    def test_truncated_without_duplicates(self):
+        text = render([result([JSV, MSSP, AL], truncated=True)])
+        self.assertEqual(text.splitlines()[1:], [
+            "1. Journal of Sound and Vibration（影响因子：4.5）",
+            "2. Mechanical Systems and Signal Processing（影响因子：8.9）",
+            "3. Acoustics Letters",
+            "（结果较多，只列出前3项）",
+        ])
+
+    def test_truncated_with_duplicates_counts_rows(self):
+        text = render([result([JSV, dict(JSV), MSSP, JSV], truncated=True)])
+        self.assertEqual(text.splitlines()[1:], [
+            "1. Journal of Sound and Vibration（影响因子：4.5）",
+            "2. Mechanical Systems and Signal Processing（影响因子：8.9）",
+            "（结果较多，只取了前4条结果，合并重复项后列出2项）",
+        ])
+
+    def test_duplicates_collapsed_to_one_item(self):
+        self.assertEqual(render([result([JSV, JSV])]), "王伟的发表期刊：Journal of Sound and Vibration（影响因子：4.5）")
+        self.assertTrue(render([result([JSV, JSV], truncated=True)]).endswith("合并重复项后列出1项）"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+"""
+本地意图快速识别：问句中含有论文标题（地名录中没有论文标题）时交给大模型，不按标题中的方法、主题等名称作答
+"""
+import io
+import unittest
+from contextlib import redirect_stdout
+from FastIntent import FastIntentMatcher
+from KGQuery import CypherGenerator
+
+ENTITIES = [("王伟", "Author"), ("振动工程学报", "Journal"), ("Deep learning", "Method"), ("深度学习", "Method"),
+            ("Fault diagnosis", "Topic"), ("故障诊断", "Topic")]
+
+
+class TitleQuestionTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.matcher = FastIntentMatcher(CypherGenerator())
+        for name, entity_type in ENTITIES:
+            cls.matcher.add_entity(name, entity_type)
+        with redirect_stdout(io.StringIO()):
+            cls.matcher.finish()
+
+    def test_title_questions_go_to_llm(self):
+        for question in ["《Deep learning for gearbox vibration analysis》的作者有哪些",
+                         "“基于深度学习的齿轮箱振动信号分析”的作者有哪些",
+                         "Deep learning for gearbox vibration analysis的作者有哪些",
+                         "基于深度学习的旋转机械齿轮箱早期微弱振动信号分析的作者有哪些"]:
+            with self.subTest(question=question):
+                self.assertIsNone(self.matcher.match(question))
+
+    def test_entity_questions_still_matched(self):
+        cases = {
+            "王伟的合作学者有哪些": ("王伟", "Author"),
+            "深度学习相关的论文有哪些": ("深度学习", "Method"),
+            "《振动工程学报》的影响因子是多少": ("振动工程学报", "Journal"),
+            "“Deep learning”相关的论文有哪些": ("Deep learning", "Method"),
+        }
+        for question, (name, entity_type) in cases.items():
+            with self.subTest(question=question):
+                result = self.matcher.match(question)
+                self.assertIsNotNone(result)
+                self.assertEqual(result["entities"], [{"name": name, "type": entity_type}])
+
+
+if __name__ == '__main__':
+    unittest.main()
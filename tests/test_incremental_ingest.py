@@ -0,0 +1,92 @@
+"""
+增量导入与全量导入的一致性：全量导入后对同一数据集增量导入，合作关系的次数和年份不变；
+清单丢失（图谱中已有、清单中没有的论文）时同样不会重复累加；论文变化后增量导入的结果与全量重建相同
+用图谱替身（benchmarks.fixture_graph）和合成数据集运行，不需要Neo4j
+替身用Python重新实现清理旧数据的语句、不计算学者汇总，这里只检查导入流程；
+BULK_QUERIES中Cypher本身的正确性见 tests/test_neo4j_ingest.py（需要Neo4j）
+"""
+import io
+import os
+import json
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from benchmarks.fixture_graph import FixtureGraph, FixturePool
+from build_graph import ScholarGraph
+from SyntheticData import SyntheticDataset
+
+
+def build(data_path, graph=None, incremental=False, manifest_path=None):
+    """全量（批量）或增量导入到图谱替身，全量导入后与build_graph主程序一样写入增量清单"""
+    graph = graph or FixtureGraph()
+    with redirect_stdout(io.StringIO()):
+        handler = ScholarGraph(not incremental, data_path, pool=FixturePool(graph))
+        if incremental:
+            handler.create_graph_incremental(50, manifest_path)
+        else:
+            handler.create_graph_bulk(50)
+            if manifest_path:
+                handler.write_manifest(manifest_path)
+        handler.close()
+    return graph
+
+
+def collaborations(graph):
+    """合作关系：{(作者unique_id, 作者unique_id): (次数, 首次年份, 最近年份)}"""
+    keys = {node_id: key for (label, key), node_id in graph.ids.items() if label == 'Author'}
+    return {(keys[s], keys[t]): (props['count'], props['first_year'], props['last_year'])
+            for (s, t), props in graph.rels['COLLABORATE'].items()}
+
+
+def relations(graph):
+    """除合作关系外的全部关系，以merge键表示"""
+    keys = {node_id: key for (_, key), node_id in graph.ids.items()}
+    return {rel: {(keys[s], keys[t]) for s, t in pairs} for rel, pairs in graph.rels.items() if rel != 'COLLABORATE'}
+
+
+class IncrementalIngestTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_path = os.path.join(self.tmp.name, 'data.jsonl')
+        self.manifest_path = os.path.join(self.tmp.name, 'ingest_manifest.db')
+        with redirect_stdout(io.StringIO()):
+            SyntheticDataset(300, authors=60, seed=7).write(self.data_path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_incremental_after_full_build_keeps_weights(self):
+        graph = build(self.data_path, manifest_path=self.manifest_path)
+        before = collaborations(graph)
+        self.assertTrue(any(count > 1 for count, _, _ in before.values()))
+        build(self.data_path, graph, incremental=True, manifest_path=self.manifest_path)
+        self.assertEqual(collaborations(graph), before)
+
+    def test_incremental_without_manifest_keeps_weights(self):
+        # 全量导入后没有写入清单：图谱中已有的论文按变化处理，先扣除旧的合作次数再写入
+        graph = build(self.data_path)
+        before = collaborations(graph)
+        rels = relations(graph)
+        build(self.data_path, graph, incremental=True, manifest_path=self.manifest_path)
+        self.assertEqual(collaborations(graph), before)
+        self.assertEqual(relations(graph), rels)
+
+    def test_changed_articles_match_full_rebuild(self):
+        graph = build(self.data_path, manifest_path=self.manifest_path)
+        # 修改部分论文的作者和年份后重新写出数据集
+        with open(self.data_path, 'r', encoding='utf-8') as f:
+            articles = [json.loads(line) for line in f]
+        for article in articles[::7]:
+            article['author'] = article['author'][1:] + articles[0]['author'][:1]
+            article['date_parts'] = [[article['date_parts'][0][0] - 3]]
+        with open(self.data_path, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(article, ensure_ascii=False) + "\n" for article in articles)
+
+        build(self.data_path, graph, incremental=True, manifest_path=self.manifest_path)
+        rebuilt = build(self.data_path)
+        self.assertEqual(collaborations(graph), collaborations(rebuilt))
+        self.assertEqual(relations(graph), relations(rebuilt))
+
+
+if __name__ == '__main__':
+    unittest.main()
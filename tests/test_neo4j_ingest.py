@@ -0,0 +1,139 @@
+"""
+在真实的Neo4j上执行build_graph.BULK_QUERIES中的Cypher（含清理旧数据和学者汇总的语句），检查增量导入与全量导入一致：
+全量导入后对同一数据集增量导入，图谱不变；清单丢失时同样不变；论文作者和年份变化后增量导入的合作权重和学者汇总与全量重建相同；
+更新论文时源数据中删除的属性不会保留
+会清空目标数据库，只在设置了环境变量NEO4J_TEST_URI（专用的测试实例，如 bolt://localhost:7687）时运行，否则跳过；
+用户名和密码取自NEO4J_TEST_USER（默认neo4j）和NEO4J_TEST_PASSWORD
+"""
+import io
+import os
+import json
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from build_graph import ScholarGraph
+from GraphPool import GraphPool
+from GraphSchema import ensure_schema
+from SyntheticData import SyntheticDataset
+
+NEO4J_TEST_URI = os.environ.get("NEO4J_TEST_URI")
+
+# 图谱状态：论文和有论文的学者的属性，以及全部关系（以两端节点的merge键表示，含关系属性和重复关系）
+# 增量导入后失去全部论文的学者和分类节点仍留在图谱中（全量重建时不存在），只比较有论文的学者
+STATE_QUERIES = {
+    "articles": "MATCH (p:Article) RETURN p.id AS key, properties(p) AS props",
+    "authors": "MATCH (a:Author) WHERE (a)-[:PUBLISH]->() RETURN a.unique_id AS key, properties(a) AS props",
+    "relations": """
+        MATCH (a)-[r]->(b)
+        RETURN type(r) AS type, coalesce(a.id, a.unique_id, a.name, a.english_name) AS source,
+               coalesce(b.id, b.unique_id, b.name, b.english_name) AS target, properties(r) AS props
+    """,
+}
+
+
+def dump(value) -> str:
+    return json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+
+@unittest.skipUnless(NEO4J_TEST_URI, "未设置NEO4J_TEST_URI，跳过需要Neo4j的测试")
+class Neo4jIncrementalIngestTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = GraphPool(uri=NEO4J_TEST_URI, auth=(os.environ.get("NEO4J_TEST_USER", "neo4j"),
+                                                       os.environ.get("NEO4J_TEST_PASSWORD", "")))
+        with cls.pool.session() as graph:
+            ensure_schema(graph)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_path = os.path.join(self.tmp.name, 'data.jsonl')
+        self.manifest_path = os.path.join(self.tmp.name, 'ingest_manifest.db')
+        with redirect_stdout(io.StringIO()):
+            SyntheticDataset(200, authors=40, seed=11).write(self.data_path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, incremental=False, manifest=True):
+        """与build_graph主程序相同：全量（批量）导入后计算学者汇总并写入增量清单；增量导入不清空图谱"""
+        with redirect_stdout(io.StringIO()):
+            handler = ScholarGraph(not incremental, self.data_path, pool=self.pool)
+            try:
+                if incremental:
+                    handler.create_graph_incremental(50, self.manifest_path)
+                else:
+                    handler.create_graph_bulk(50)
+                    handler.refresh_author_summaries()
+                    if manifest:
+                        handler.write_manifest(self.manifest_path)
+            finally:
+                handler.close()
+
+    def state(self):
+        with self.pool.session() as graph:
+            result = {name: graph.run(cypher).data() for name, cypher in STATE_QUERIES.items()}
+        return {
+            "articles": {row["key"]: dump(row["props"]) for row in result["articles"]},
+            "authors": {row["key"]: dump(row["props"]) for row in result["authors"]},
+            "relations": sorted((row["type"], row["source"], row["target"], dump(row["props"]))
+                                for row in result["relations"]),
+        }
+
+    def rewrite(self, change):
+        """修改数据集中的部分论文后重新写出"""
+        with open(self.data_path, 'r', encoding='utf-8') as f:
+            articles = [json.loads(line) for line in f]
+        change(articles)
+        with open(self.data_path, 'w', encoding='utf-8') as f:
+            f.writelines(dump(article) + "\n" for article in articles)
+
+    def test_incremental_after_full_build_keeps_graph(self):
+        self.build()
+        before = self.state()
+        self.assertTrue(any(json.loads(props)["count"] > 1
+                            for rel, _, _, props in before["relations"] if rel == 'COLLABORATE'))
+        self.build(incremental=True)
+        self.assertEqual(self.state(), before)
+
+    def test_incremental_without_manifest_keeps_graph(self):
+        # 清单缺失：图谱中已有的论文全部按变化处理，先执行STALE_COLLABORATE/STALE_RELATIONS再重新写入
+        self.build(manifest=False)
+        before = self.state()
+        self.build(incremental=True)
+        self.assertEqual(self.state(), before)
+
+    def test_changed_authors_match_full_rebuild(self):
+        # 部分论文的作者列表和年份变化：STALE_COLLABORATE按其余合著论文重新统计旧作者之间的次数和首次/最近年份，
+        # 随后累加新的合作；结果（含学者汇总）应与全量重建相同
+        self.build()
+
+        def change_authors(articles):
+            for article in articles[::7]:
+                article['author'] = article['author'][1:] + articles[0]['author'][:1]
+                article['date_parts'] = [[article['date_parts'][0][0] - 3]]
+        self.rewrite(change_authors)
+        self.build(incremental=True)
+        incremental = self.state()
+        self.build()
+        self.assertEqual(incremental, self.state())
+
+    def test_removed_property_cleared(self):
+        self.build()
+
+        def drop_abstracts(articles):
+            for article in articles[::5]:
+                article['abstract'] = None
+        self.rewrite(drop_abstracts)
+        self.build(incremental=True)
+        incremental = self.state()
+        self.assertTrue(any('"abstract"' not in props for props in incremental["articles"].values()))
+        self.build()
+        self.assertEqual(incremental["articles"], self.state()["articles"])
+
+
+if __name__ == '__main__':
+    unittest.main()
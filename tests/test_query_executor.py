@@ -0,0 +1,150 @@
+"""
+查询执行器的容错：读取图谱版本号失败时各查询照常执行，沿用上次的版本号并在下次调用时重试；
+调用方修改查询结果不影响结果缓存；
+快照被重新导出后切换到新快照，原快照在其上的查询结束后关闭，并发检查时只打开一次新快照
+用图谱替身（benchmarks.fixture_graph）运行，不需要Neo4j
+"""
+import io
+import os
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+from benchmarks.fixture_graph import FixtureGraph, FixturePool
+from build_graph import ScholarGraph
+from GraphSnapshot import export_snapshot
+from KGQuery import KGQueryExecutor
+from QueryCache import QueryCache
+from SnapshotQuery import SnapshotQueryEngine
+from SyntheticData import SyntheticDataset
+
+
+def query(template, name):
+    return {"entity": {"name": name, "type": "Author"}, "intent": "查询", "template": template,
+            "params": {"name": name}}
+
+
+QUERIES = [query("author.topic", "王伟"), query("author.collab", "王伟"), query("author.paper", "李娜")]
+
+
+class VersionCheckTest(unittest.TestCase):
+    def setUp(self):
+        self.graph = FixtureGraph()
+        self.graph.version = "v1"
+        self.executor = KGQueryExecutor(parallelism=2, backend="neo4j", graph_pool=FixturePool(self.graph))
+
+    def tearDown(self):
+        self.executor.pool.shutdown()
+
+    def test_version_read_failure_keeps_every_slot(self):
+        with redirect_stdout(io.StringIO()), \
+                mock.patch("KGQuery.read_graph_version", side_effect=ConnectionError("Bolt不可用")):
+            results = self.executor.execute(QUERIES)
+        self.assertEqual([r["template"] for r in results], [q["template"] for q in QUERIES])
+        self.assertFalse(any(r.get("error") for r in results))
+        # 检查时间不更新，下次调用时重试
+        self.assertIsNone(self.executor.version_checked_at)
+        self.executor.execute(QUERIES[:1])
+        self.assertEqual(self.executor.graph_version, "v1")
+
+    def test_version_read_failure_keeps_last_version(self):
+        self.assertEqual(self.executor.check_version(), "v1")
+        checked_at = self.executor.version_checked_at
+        self.executor.version_checked_at -= 3600
+        with redirect_stdout(io.StringIO()), \
+                mock.patch("KGQuery.read_graph_version", side_effect=TimeoutError()):
+            self.assertEqual(self.executor.check_version(), "v1")
+            self.assertEqual(self.executor.version_checked_at, checked_at - 3600)
+            with self.assertRaises(TimeoutError):
+                self.executor.check_version(raise_errors=True)
+        self.assertEqual(self.executor.cache.version, "v1")
+
+
+class QueryCacheTest(unittest.TestCase):
+    def test_callers_cannot_modify_cached_rows(self):
+        cache = QueryCache()
+        rows = [{"a": 1}, {"a": 2}]
+        cache.put("k", rows)
+        rows.append({"a": 3})
+        hit, cached = cache.get("k")
+        self.assertTrue(hit)
+        cached.pop()
+        cached.append({"a": 4})
+        self.assertEqual(cache.get("k"), (True, [{"a": 1}, {"a": 2}]))
+
+
+class SnapshotSwapTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        data_path = os.path.join(self.tmp.name, 'data.jsonl')
+        self.path = os.path.join(self.tmp.name, 'graph.snapshot')
+        self.graph = FixtureGraph()
+        with redirect_stdout(io.StringIO()):
+            SyntheticDataset(40, authors=10, seed=3).write(data_path)
+            handler = ScholarGraph(True, data_path, pool=FixturePool(self.graph))
+            handler.create_graph_bulk(50)
+            handler.close()
+            export_snapshot(self.graph, self.path, "v1")
+        with mock.patch.object(KGQueryExecutor, "snapshot_path", return_value=self.path):
+            self.executor = KGQueryExecutor(parallelism=4, backend="snapshot")
+
+    def tearDown(self):
+        self.executor.pool.shutdown()
+        self.executor.snapshot.close()
+        self.tmp.cleanup()
+
+    def reexport(self, version):
+        with redirect_stdout(io.StringIO()):
+            export_snapshot(self.graph, self.path, version)
+        # 保证修改时间与原快照不同
+        mtime = os.stat(self.path).st_mtime + 1
+        os.utime(self.path, (mtime, mtime))
+        self.executor.version_checked_at = None
+
+    def test_idle_snapshot_closed_after_swap(self):
+        old = self.executor.snapshot
+        self.reexport("v2")
+        self.assertEqual(self.executor.check_version(), "v2")
+        self.assertIsNot(self.executor.snapshot, old)
+        self.assertTrue(old.snapshot.mm.closed)
+        self.assertTrue(old.snapshot.file.closed)
+
+    def test_busy_snapshot_closed_after_last_query(self):
+        old = self.executor.snapshot
+        with self.executor.snapshot_session() as engine:
+            self.reexport("v2")
+            self.executor.check_version()
+            self.assertFalse(engine.snapshot.mm.closed)
+            self.assertEqual(len(engine.run("author.collab", {"name": "x", "limit": 3})), 0)
+        self.assertTrue(old.snapshot.mm.closed)
+        self.assertFalse(self.executor.snapshot.snapshot.mm.closed)
+
+    def test_concurrent_checks_open_one_snapshot(self):
+        self.reexport("v2")
+        opened = []
+        original = SnapshotQueryEngine.open
+
+        def counting_open(path):
+            engine = original(path)
+            opened.append(engine)
+            return engine
+
+        barrier = threading.Barrier(8)
+
+        def check():
+            barrier.wait()
+            self.executor.check_version()
+
+        with mock.patch.object(SnapshotQueryEngine, "open", side_effect=counting_open):
+            threads = [threading.Thread(target=check) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(opened, [self.executor.snapshot])
+        self.assertEqual(self.executor.graph_version, "v2")
+
+
+if __name__ == '__main__':
+    unittest.main()
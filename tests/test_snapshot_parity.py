@@ -0,0 +1,202 @@
+"""
+快照查询引擎与Cypher模板的一致性：在一个小数据集上对全部模板逐一执行，与按各模板Cypher语义得出的期望行比较
+（列名、取值类型、ORDER BY列的顺序和行集合）；数据集经ScholarGraph批量导入图谱替身后导出快照，不需要Neo4j
+全文索引入口的检索方式与Lucene不同（名称包含匹配，而非分词后的短语匹配），单独断言
+"""
+import io
+import os
+import json
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from benchmarks.fixture_graph import FixtureGraph, FixturePool
+from build_graph import ScholarGraph
+from CypherTemplates import TEMPLATES, TEMPLATES_BY_ID
+from GraphSnapshot import export_snapshot
+from KGQuery import CypherGenerator
+from SnapshotQuery import SnapshotQueryEngine
+
+
+def article(article_id, title, year, journal, authors, disciplines, topics, methods, scenarios, keywords):
+    """与data.json格式相同的一篇论文；作者为 (姓, 名, 中文名)，分类为 (英文名, 中文名)"""
+    issn, factor = JOURNALS[journal]
+    item = {
+        "id": article_id, "title": title, "date_parts": [[year]], "keywords": keywords,
+        "abstract": f"Abstract of {title}.", "language": "en",
+        "container_title": journal, "ISSN_ISBN": issn,
+        "author": [{"family": family, "given": given, "chinese_name": zh} for family, given, zh in authors],
+        "class_en": {}, "class_zh": {},
+    }
+    if factor is not None:
+        item["impact_factor"] = factor
+    for (en_key, zh_key), values in zip(CLASS_KEYS, (disciplines, topics, methods, scenarios)):
+        item["class_en"][en_key] = [en for en, _ in values]
+        item["class_zh"][zh_key] = [zh for _, zh in values]
+    return item
+
+
+JSV, MSSP, AL = "Journal of Sound and Vibration", "Mechanical Systems and Signal Processing", "Acoustics Letters"
+JOURNALS = {JSV: ("0022-460X", 4.5), MSSP: ("0888-3270", 8.9), AL: ("1234-5678", None)}
+CLASS_KEYS = [("Secondary disciplines", "二级学科"), ("Research direction clusters", "研究主题"),
+              ("Methods and technologies", "方法技术"), ("Application scenarios", "应用场景")]
+VE, ME = ("Vibration Engineering", "振动工程"), ("Mechanical Engineering", "机械工程")
+VIBRATION_CONTROL, NOISE_CONTROL, FAULT_DIAGNOSIS = ("Vibration control", "振动控制"), ("Noise control", "噪声控制"), \
+    ("Fault diagnosis", "故障诊断")
+CONTROL, CONTROLLABILITY, CONTROLLER = ("Control", "控制"), ("Controllability analysis", "可控性分析"), \
+    ("Controller", "控制器")
+FEM, DL = ("Finite element method", "有限元法"), ("Deep learning", "深度学习")
+BRIDGES, GEARBOXES = ("Bridges", "桥梁"), ("Gearboxes", "齿轮箱")
+WANG, LI, ZHANG = ("Wang", "Wei", "王伟"), ("Li", "Na", "李娜"), ("Zhang", "Min", "张敏")
+
+A1 = "Nonlinear vibration control of bridges"
+A2 = "Deep learning for gearbox fault diagnosis"
+A3 = "Active control of gearbox vibration"
+A4 = "Controllability analysis of rotor systems"
+# 作者唯一标识带第一个学科的缩写：王伟在a1、a3中为WangWeiVIB，在a2中为WangWeiMEC（同名的两个学者节点），张敏同理
+ARTICLES = [
+    article("a1", A1, 2020, JSV, [WANG, LI], [VE], [VIBRATION_CONTROL, NOISE_CONTROL], [FEM], [BRIDGES],
+            ["vibration control", "bridges"]),
+    article("a2", A2, 2022, MSSP, [WANG, ZHANG], [ME], [FAULT_DIAGNOSIS], [DL, FEM], [GEARBOXES],
+            ["deep learning", "fault diagnosis"]),
+    article("a3", A3, 2021, JSV, [LI, WANG, ZHANG], [VE, ME], [CONTROL, VIBRATION_CONTROL], [FEM], [],
+            ["active control", "gearbox"]),
+    article("a4", A4, 2019, AL, [ZHANG], [ME], [CONTROLLABILITY, CONTROLLER], [], [GEARBOXES],
+            ["controllability", "rotor"]),
+]
+
+
+def papers(*items):
+    return [{"论文标题": title, "发表年份": year} for title, year in items]
+
+
+def people(*items):
+    return [{"中文名": zh, "英文名": en, "论文数": count} for zh, en, count in items]
+
+
+# 模板id -> (实体名称, 期望行, 需与期望顺序一致的ORDER BY列；None表示模板没有ORDER BY，只比较行集合)
+# 同序值（如论文数相同）的行之间顺序不确定，只要求ORDER BY列的取值序列一致
+EXPECTED = {
+    "author.topic": ("王伟", [{"年份": "2020", "发表数量": 2}, {"年份": "2021", "发表数量": 2},
+                             {"年份": "2022", "发表数量": 1}], ["年份"]),
+    "author.discipline": ("王伟", [{"二级学科": "振动工程", "英文领域": "Vibration Engineering", "论文数": 2},
+                                  {"二级学科": "机械工程", "英文领域": "Mechanical Engineering", "论文数": 2}],
+                          ["论文数"]),
+    "author.journal": ("王伟", [{"期刊名称": JSV, "影响因子": 4.5, "论文数": 2},
+                               {"期刊名称": MSSP, "影响因子": 8.9, "论文数": 1}], ["论文数", "影响因子"]),
+    "author.method": ("王伟", [{"方法技术": "有限元法", "论文数": 3}, {"方法技术": "深度学习", "论文数": 1}], ["论文数"]),
+    "author.scenario": ("王伟", [{"应用场景": "桥梁", "论文数": 1}, {"应用场景": "齿轮箱", "论文数": 1}], ["论文数"]),
+    # 论文节点没有container_title属性，Neo4j返回null
+    "author.paper": ("王伟", [{"论文标题": A2, "发表年份": "2022", "期刊名称": None},
+                             {"论文标题": A3, "发表年份": "2021", "期刊名称": None},
+                             {"论文标题": A1, "发表年份": "2020", "期刊名称": None}], ["发表年份"]),
+    # 两个王伟节点的合作者：李娜合著2次；张敏为两个节点，各合著1次，最近合作年份晚的在前
+    "author.collab": ("王伟", [{"中文名": "李娜", "英文名": "Li Na", "合作次数": 2},
+                              {"中文名": "张敏", "英文名": "Zhang Min", "合作次数": 1},
+                              {"中文名": "张敏", "英文名": "Zhang Min", "合作次数": 1}], ["合作次数"]),
+    "article.abstract": (A3, [{"论文标题": A3, "摘要": f"Abstract of {A3}."}], None),
+    "article.author": (A3, [{"中文名": "李娜", "英文名": "Li Na"}, {"中文名": "王伟", "英文名": "Wang Wei"},
+                            {"中文名": "张敏", "英文名": "Zhang Min"}], None),
+    "article.journal": (A3, [{"期刊名称": JSV, "影响因子": 4.5, "发表年份": "2021"}], None),
+    "article.time": (A3, [{"发表年份": "2021"}], None),
+    "article.keyword": (A3, [{"关键词": ["active control", "gearbox"]}], None),
+    "article.discipline": (A3, [{"二级学科": "振动工程"}, {"二级学科": "机械工程"}], None),
+    "article.topic": (A3, [{"研究主题": "控制"}, {"研究主题": "振动控制"}], None),
+    "article.method": (A3, [{"方法技术": "有限元法"}], None),
+    "article.scenario": (A1, [{"应用场景": "桥梁"}], None),
+    "topic.paper": ("振动控制", papers((A3, "2021"), (A1, "2020")), ["发表年份"]),
+    "topic.author": ("振动控制", people(("王伟", "Wang Wei", 2), ("李娜", "Li Na", 2), ("张敏", "Zhang Min", 1)),
+                     ["论文数"]),
+    "journal.paper": (JSV, papers((A3, "2021"), (A1, "2020")), ["发表年份"]),
+    "journal.factor": (JSV, [{"影响因子": 4.5}], None),
+    "discipline.paper": ("振动工程", papers((A3, "2021"), (A1, "2020")), ["发表年份"]),
+    "discipline.author": ("振动工程", people(("王伟", "Wang Wei", 2), ("李娜", "Li Na", 2), ("张敏", "Zhang Min", 1)),
+                          ["论文数"]),
+    "method.author": ("深度学习", people(("王伟", "Wang Wei", 1), ("张敏", "Zhang Min", 1)), ["论文数"]),
+    "method.paper": ("深度学习", papers((A2, "2022")), ["发表年份"]),
+    "scenario.paper": ("齿轮箱", papers((A2, "2022"), (A4, "2019")), ["发表年份"]),
+    "scenario.author": ("齿轮箱", people(("张敏", "Zhang Min", 2), ("王伟", "Wang Wei", 1)), ["论文数"]),
+}
+
+
+def canonical(rows):
+    return sorted(json.dumps(row, ensure_ascii=False, sort_keys=True) for row in rows)
+
+
+class SnapshotParityTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        data_path = os.path.join(cls.tmp.name, 'data.json')
+        with open(data_path, 'w', encoding='utf-8') as f:
+            json.dump(ARTICLES, f, ensure_ascii=False)
+        graph = FixtureGraph()
+        snapshot_path = os.path.join(cls.tmp.name, 'graph.snapshot')
+        with redirect_stdout(io.StringIO()):
+            handler = ScholarGraph(True, data_path, pool=FixturePool(graph))
+            handler.create_graph_bulk()
+            handler.close()
+            export_snapshot(graph, snapshot_path, "test")
+            cls.generator = CypherGenerator()
+        cls.engine = SnapshotQueryEngine.open(snapshot_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.snapshot.close()
+        cls.tmp.cleanup()
+
+    def run_template(self, template_id, name):
+        """与KGQueryExecutor相同：由CypherGenerator生成参数（含全文索引参数和$limit）后执行"""
+        template = TEMPLATES_BY_ID[template_id]
+        entity_type = next(entity for (entity, _), item in TEMPLATES.items() if item is template)
+        query_info = self.generator.build_query(template, entity_type, name)
+        return self.engine.run(template_id, query_info["params"])
+
+    def test_every_template_has_expectation(self):
+        self.assertEqual(set(EXPECTED), set(TEMPLATES_BY_ID))
+        self.assertEqual(len(EXPECTED), 26)
+
+    def test_templates_match_expected_rows(self):
+        for template_id, (name, expected, order) in EXPECTED.items():
+            with self.subTest(template=template_id):
+                actual = self.run_template(template_id, name)
+                self.assertEqual(canonical(actual), canonical(expected))
+                if order:
+                    self.assertEqual([[row[column] for column in order] for row in actual],
+                                     [[row[column] for column in order] for row in expected])
+
+    def test_missing_values_are_null(self):
+        self.assertEqual(self.run_template("journal.factor", AL), [{"影响因子": None}])
+        self.assertEqual(self.run_template("author.paper", "Nobody"), [])
+
+    def test_limit(self):
+        # $limit为模板行数上限加1；直接传入更小的值时按LIMIT截断，保留ORDER BY靠前的行
+        rows = self.engine.run("author.paper", {"name": "王伟", "limit": 2})
+        self.assertEqual([row["论文标题"] for row in rows], [A2, A3])
+
+    def test_search_divergence_from_lucene(self):
+        """
+        快照按名称包含匹配（忽略大小写），完全相同的名称优先，其次名称短的优先；
+        Neo4j的全文索引对短语"control"按分词匹配，只命中含独立词control的名称（Control、Noise control、Vibration control），
+        不会命中Controller、Controllability analysis。快照则把Controller计入前$top_k个，挤掉了Vibration control
+        """
+        params = self.generator.build_query(TEMPLATES[("Topic", "paper")], "Topic", "control")["params"]
+        found = [self.engine.snapshot.value("Topic", "english_name", node) for node in self.engine.search("Topic", params)]
+        self.assertEqual(found, ["Control", "Controller", "Noise control"])
+        lucene = ["Control", "Noise control", "Vibration control"]
+        self.assertNotEqual(sorted(found), sorted(lucene))
+
+        # 模板结果随之不同：快照为 控制(a3)、控制器(a4)、噪声控制(a1) 的论文；
+        # Neo4j为 控制(a3)、噪声控制(a1)、振动控制(a1、a3) 的论文（PAPERS不去重，同一论文可出现两次）
+        rows = self.run_template("topic.paper", "control")
+        self.assertEqual(rows, papers((A3, "2021"), (A1, "2020"), (A4, "2019")))
+        neo4j_rows = papers((A3, "2021"), (A3, "2021"), (A1, "2020"), (A1, "2020"))
+        self.assertNotEqual(canonical(rows), canonical(neo4j_rows))
+
+        # 全文索引没有命中时Neo4j改用后备正则 (?i).*name.*，匹配范围与快照的包含匹配相同
+        params = self.generator.build_query(TEMPLATES[("Topic", "paper")], "Topic", "controlla")["params"]
+        found = [self.engine.snapshot.value("Topic", "english_name", node) for node in self.engine.search("Topic", params)]
+        self.assertEqual(found, ["Controllability analysis"])
+
+
+if __name__ == '__main__':
+    unittest.main()